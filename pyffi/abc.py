@@ -57,6 +57,8 @@ class DerivedMeta(abc.ABCMeta, object):
 class Readable(metaclass=DerivedMeta):
     """Abstract Readable class"""
 
+    __slots__ = ()
+
     @abc.abstractmethod
     def read(self, stream, context=Context()):
         """Read value from ``stream``, context may be required
@@ -71,6 +73,8 @@ class Readable(metaclass=DerivedMeta):
 class Writeable(metaclass=DerivedMeta):
     """Abstract Writable class"""
 
+    __slots__ = ()
+
     @abc.abstractmethod
     def write(self, stream, context=Context()):
         """Write value to ``stream``, context may be required
@@ -84,7 +88,7 @@ class Writeable(metaclass=DerivedMeta):
 
 class Duplex(Readable, Writeable):
     """Abstract Readable and Writable class"""
-    pass
+    __slots__ = ()
 
 
 class Inspectable(metaclass=DerivedMeta):
@@ -68,9 +68,9 @@ class Context(object):
 
         :rtype: ``str``"""
 
-        if self.data:
-            return getattr(self.data, '_byte_order', '<')
-        return '<'
+        # getattr on None also gives the default, and unlike a truth
+        # test, does not call __len__ on the data
+        return getattr(self.data, '_byte_order', '<')
 
     def get_type(self, name):
         if self.data:
@@ -68,12 +68,16 @@ Classes
 #  ***** END LICENSE BLOCK *****
 # ------------------------------------------------------------------------
 
+import collections.abc
 import logging
+import os
+import threading
 import time  # for timing stuff
 import xml.sax
 from typing import List, Dict
 
 import pyffi
+import pyffi.engines.xml.cache
 import pyffi.object_models
 from pyffi.errors import XMLException
 from pyffi.types.basic import BasicBase
@@ -83,6 +87,182 @@ from pyffi.engines.xml.expression import Expression
 from pyffi.engines.xml.struct_ import StructBase
 
 
+def _lazy_classes_enabled(cls):
+    """Whether the classes of the format *cls* are created on first use,
+    see :attr:`FileFormat.lazy_classes`.
+    """
+    if cls.lazy_classes is not None:
+        return cls.lazy_classes
+    return os.getenv("PYFFI_LAZY_CLASSES", "") not in ("", "0")
+
+
+def _is_lazy_class(cls, name):
+    """Whether the class *name* of the format *cls* has been parsed, but
+    not been created yet.
+    """
+    return name in cls.__dict__.get("_pending_classes", ())
+
+
+class _PendingClass(object):
+    """Everything needed to create a class whose creation was deferred:
+    its name, its bases (classes, or names of other classes of the
+    format), its class dictionary, and the customizer class if the
+    format has one.
+    """
+
+    __slots__ = ("name", "bases", "dct", "customizer")
+
+    def __init__(self, name, bases, dct, customizer):
+        self.name = name
+        self.bases = bases
+        self.dct = dct
+        self.customizer = customizer
+
+
+_lazy_lock = threading.RLock()
+_lazy_fixups = collections.deque()
+_lazy_busy = False
+
+
+def _run_lazy(func, *args):
+    """Call *func*, and then fix all struct classes it queued in
+    ``_lazy_fixups``. Fixing a class can create other classes, which are
+    queued in turn. Nested calls only queue, as fixing a class while
+    another one is still being created could create a class twice, and
+    as the chain of forward declarations can be long.
+    """
+    global _lazy_busy
+    with _lazy_lock:
+        if _lazy_busy:
+            return func(*args)
+        _lazy_busy = True
+        try:
+            result = func(*args)
+            while _lazy_fixups:
+                _fix_struct_class(*_lazy_fixups.popleft())
+            return result
+        finally:
+            _lazy_fixups.clear()
+            _lazy_busy = False
+
+
+def _get_lazy_class(cls, name):
+    """Create the class *name* of the format *cls* if its creation was
+    deferred, and return it. Raises ``AttributeError`` if there is no such
+    class.
+    """
+    for format_cls in cls.__mro__:
+        pending = format_cls.__dict__.get("_pending_classes")
+        if pending and name in pending:
+            with _lazy_lock:
+                # another thread may have been first
+                if name in pending:
+                    _run_lazy(
+                        _create_pending_class, format_cls, pending[name])
+            return getattr(format_cls, name)
+    raise AttributeError("type object '%s' has no attribute '%s'"
+                         % (cls.__name__, name))
+
+
+def _create_pending_class(cls, pending_class):
+    """Create a deferred class exactly as
+    :meth:`XmlSaxHandler.endElement` would have done, and queue the
+    fixes of :meth:`XmlSaxHandler.endDocument` for it.
+    """
+    name = pending_class.name
+    bases = tuple(getattr(cls, base) if isinstance(base, str) else base
+                  for base in pending_class.bases)
+    _resolve_lazy_types(cls, pending_class.dct)
+    customizer = pending_class.customizer
+    if customizer:
+        gen_klass = type("_" + name, bases, pending_class.dct)
+        setattr(cls, "_" + name, gen_klass)
+        setattr(cls, name, type(
+            customizer.__name__,
+            (gen_klass,) + customizer.__bases__,
+            dict(customizer.__dict__)))
+    else:
+        gen_klass = type(name, bases, pending_class.dct)
+        setattr(cls, name, gen_klass)
+    del cls._pending_classes[name]
+    cls._pending_classes.pop("_" + name, None)
+    # forward declarations can only be resolved once the xml is parsed;
+    # until then, endDocument takes care of them
+    if "_klass_filter" in cls.__dict__ and issubclass(gen_klass, StructBase):
+        _lazy_fixups.append((cls, gen_klass))
+
+
+def _resolve_lazy_types(cls, dct):
+    """Resolve the attribute types in the class dictionary *dct* which
+    refer to classes whose creation was deferred. Unlike forward
+    declarations, these must be resolved before the class is created, so
+    the struct metaclass sees them.
+    """
+    for attr in dct.get("_attrs", ()):
+        if getattr(attr, "_lazy_type", False):
+            attr.type_ = getattr(cls, attr.type_)
+            del attr._lazy_type
+            attr.convert_default()
+
+
+def _fix_struct_classes(cls, klasses):
+    """Resolve forward declared attribute types and templates, and class
+    names in conditions, of the given struct classes of the format *cls*,
+    and of all classes which are created while doing so.
+    """
+    _run_lazy(_lazy_fixups.extend, [(cls, klass) for klass in klasses])
+
+
+def _fix_struct_class(cls, klass):
+    klass_filter = cls._klass_filter
+
+    def map_klass(name):
+        if name in klass_filter:
+            name = klass_filter[name]
+            if isinstance(name, str):
+                return getattr(cls, name)
+        return name
+
+    for attr in klass._attrs:
+        templ = attr.template
+        if isinstance(templ, str):
+            attr.template = \
+                getattr(cls, templ) if templ != "TEMPLATE" \
+                else type(None)
+        attrtype = attr.type_
+        if isinstance(attrtype, str):
+            attr.type_ = getattr(cls, attrtype)
+        # fix refs to types in conditions
+        if attr.cond:
+            attr.cond.map_(map_klass)
+
+
+class _LazyClassList(collections.abc.Sequence):
+    """Ordered list of the generated classes of one kind (see
+    :attr:`FileFormat.xml_struct`), which stores the names of classes
+    that have not been created yet and creates them when they are
+    accessed.
+    """
+
+    def __init__(self, cls, items):
+        self._cls = cls
+        self._items = list(items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        item = self._items[index]
+        if isinstance(item, str):
+            item = self._items[index] = getattr(self._cls, item)
+        return item
+
+    def append(self, item):
+        self._items.append(item)
+
+
 class MetaFileFormat(pyffi.object_models.MetaFileFormat):
     """The MetaFileFormat metaclass transforms the XML description
     of a file format into a bunch of classes which can be directly
@@ -119,24 +299,29 @@ class MetaFileFormat(pyffi.object_models.MetaFileFormat):
         # the hierarchy
         xml_file_name = dct.get('xml_file_name')
         if xml_file_name:
-            # set up XML parser
-            parser = xml.sax.make_parser()
-            parser.setContentHandler(XmlSaxHandler(cls, name, bases, dct))
-
-            # open XML file
+            # read XML file
             xml_file = cls.openfile(xml_file_name, cls.xml_file_path)
-
-            # parse the XML file: control is now passed on to XmlSaxHandler
-            # which takes care of the class creation
-            cls.logger.debug("Parsing %s and generating classes."
-                             % xml_file_name)
-            start = time.clock()
             try:
-                parser.parse(xml_file)
+                xml_text = xml_file.read()
             finally:
                 xml_file.close()
+
+            # parse the XML file, or replay it from the cache: control is
+            # now passed on to XmlSaxHandler which takes care of the class
+            # creation
+            cls.logger.debug("Parsing %s and generating classes."
+                             % xml_file_name)
+            start = time.perf_counter()
+            pyffi.engines.xml.cache.parse(
+                xml_text, XmlSaxHandler(cls, name, bases, dct),
+                pyffi.engines.xml.cache.get_cache_dir())
             cls.logger.debug("Parsing finished in %.3f seconds."
-                             % (time.clock() - start))
+                             % (time.perf_counter() - start))
+
+    def __getattr__(cls, name):
+        """Create classes whose creation was deferred, see
+        :attr:`FileFormat.lazy_classes`."""
+        return _get_lazy_class(cls, name)
 
 
 class FileFormat(pyffi.object_models.FileFormat, metaclass=MetaFileFormat):
@@ -146,6 +331,14 @@ class FileFormat(pyffi.object_models.FileFormat, metaclass=MetaFileFormat):
     xml_file_path = None  #: Override.
     logger = logging.getLogger("pyffi.engines.xml")
 
+    #: Whether classes are only created when they are first accessed, as
+    #: attribute of the format or through the xml_* lists. The xml is
+    #: still parsed completely when the format is created. ``None`` means
+    #: that the PYFFI_LAZY_CLASSES environment variable decides (any
+    #: value other than empty or ``0`` enables it). Must be set in the
+    #: class body of the format.
+    lazy_classes = None
+
     # We also keep an ordered list of all classes that have been created.
     # The xml_struct list includes all xml generated struct classes,
     # including those that are replaced by a native class in cls (for
@@ -219,6 +412,8 @@ class StructAttribute(object):
     is_abstract = False
     """Whether the attribute is abstract or not (read and written)."""
 
+    _lazy_type = False
+
     def __init__(self, cls, attrs):
         """Initialize attribute from the xml attrs dictionary of an
         add tag.
@@ -234,11 +429,16 @@ class StructAttribute(object):
             raise AttributeError("'%s' is missing a type attribute"
                                  % self.displayname)
         if attrs_type_str != "TEMPLATE":
-            try:
-                self.type_ = getattr(cls, attrs_type_str)
-            except AttributeError:
-                # forward declaration, resolved at endDocument
+            if _is_lazy_class(cls, attrs_type_str):
+                # resolved when the struct is created
                 self.type_ = attrs_type_str
+                self._lazy_type = True
+            else:
+                try:
+                    self.type_ = getattr(cls, attrs_type_str)
+                except AttributeError:
+                    # forward declaration, resolved at endDocument
+                    self.type_ = attrs_type_str
         else:
             self.type_ = type(None)  # type determined at runtime
         # optional parameters
@@ -256,15 +456,8 @@ class StructAttribute(object):
         self.is_abstract = (attrs.get("abstract") == "1")
 
         # post-processing
-        if self.default:
-            try:
-                tmp = self.type_()
-                tmp.set_value(self.default)
-                self.default = tmp.get_value()
-                del tmp
-            except Exception:
-                # conversion failed; not a big problem
-                self.default = None
+        if not self._lazy_type:
+            self.convert_default()
         if self.arr1:
             self.arr1 = Expression(self.arr1, cls.name_attribute)
         if self.arr2:
@@ -285,6 +478,19 @@ class StructAttribute(object):
         if self.ver2:
             self.ver2 = cls.version_number(self.ver2)
 
+    def convert_default(self):
+        """Convert the default value from the xml string to a value of
+        the attribute type."""
+        if self.default:
+            try:
+                tmp = self.type_()
+                tmp.set_value(self.default)
+                self.default = tmp.get_value()
+                del tmp
+            except Exception:
+                # conversion failed; not a big problem
+                self.default = None
+
 
 class BitStructAttribute(object):
     """Helper class to collect attribute data of bitstruct bits tags."""
@@ -417,6 +623,15 @@ class XmlSaxHandler(xml.sax.handler.ContentHandler):
         # elements for basic classes
         self.basic_class = None
 
+        # classes are created on first use rather than at their end tag
+        self.lazy = _lazy_classes_enabled(cls)
+        if self.lazy:
+            cls._pending_classes = {}
+            cls.xml_enum = _LazyClassList(cls, cls.xml_enum)
+            cls.xml_alias = _LazyClassList(cls, cls.xml_alias)
+            cls.xml_bit_struct = _LazyClassList(cls, cls.xml_bit_struct)
+            cls.xml_struct = _LazyClassList(cls, cls.xml_struct)
+
         # elements for versions
         self.version_string: str = None
 
@@ -427,6 +642,17 @@ class XmlSaxHandler(xml.sax.handler.ContentHandler):
         self.__tag: int = None
         self.__chars: str = None
 
+    def get_base_class(self, name):
+        """Return the class C{name} of C{self.cls}, to be used as base
+        class. If the creation of that class is deferred, its name is
+        returned instead, and the class is looked up when the derived
+        class is created.
+
+        :param name: The name of the class."""
+        if _is_lazy_class(self.cls, name):
+            return name
+        return getattr(self.cls, name)
+
     def push_tag(self, tag):
         """Push tag C{tag} on the stack and make it the current tag.
 
@@ -563,7 +789,7 @@ class XmlSaxHandler(xml.sax.handler.ContentHandler):
                 # class, then we have a problem
                 try:
                     self.class_bases += (
-                        getattr(self.cls, class_basename),)
+                        self.get_base_class(class_basename),)
                 except KeyError:
                     raise XMLException(
                         "typo, or forward declaration of struct %s"
@@ -622,7 +848,7 @@ class XmlSaxHandler(xml.sax.handler.ContentHandler):
             self.class_name = self.__attrs["name"]
             typename = self.__attrs["type"]
             try:
-                self.class_bases += (getattr(self.cls, typename),)
+                self.class_bases += (self.get_base_class(typename),)
             except AttributeError:
                 raise XMLException(
                     "typo, or forward declaration of type %s" % typename)
@@ -765,7 +991,31 @@ class XmlSaxHandler(xml.sax.handler.ContentHandler):
         if cls_klass and issubclass(cls_klass, BasicBase):
             # overrides a basic type - not much to do
             pass
+        elif self.lazy and (
+                cls_klass is None
+                or (self.cls.__dict__.get(self.class_name) is cls_klass
+                    and not issubclass(
+                        cls_klass, pyffi.object_models.FileFormat.Data))):
+            # defer creation until first use, see _get_lazy_class
+            pending_class = _PendingClass(
+                self.class_name, self.class_bases, self.class_dict,
+                cls_klass)
+            self.cls._pending_classes[self.class_name] = pending_class
+            if cls_klass:
+                # the customizer is merged when the class is created
+                delattr(self.cls, self.class_name)
+                self.cls._pending_classes["_" + self.class_name] = \
+                    pending_class
+                gen_name = "_" + self.class_name
+            else:
+                gen_name = self.class_name
+            self.get_class_list().append(gen_name)
         else:
+            # classes whose creation was deferred are needed now
+            self.class_bases = tuple(
+                getattr(self.cls, base) if isinstance(base, str) else base
+                for base in self.class_bases)
+            _resolve_lazy_types(self.cls, self.class_dict)
             # check if we have a customizer class
             if cls_klass:
                 # exists: create and add to base class of customizer
@@ -795,19 +1045,23 @@ class XmlSaxHandler(xml.sax.handler.ContentHandler):
                     str(self.class_name), self.class_bases, self.class_dict)
                 setattr(self.cls, self.class_name, gen_klass)
             # append class to the appropriate list
-            if self.__tag == self.tag_struct:
-                self.cls.xml_struct.append(gen_klass)
-            elif self.__tag == self.tag_enum:
-                self.cls.xml_enum.append(gen_klass)
-            elif self.__tag == self.tag_alias:
-                self.cls.xml_alias.append(gen_klass)
-            elif self.__tag == self.tag_bit_struct:
-                self.cls.xml_bit_struct.append(gen_klass)
+            self.get_class_list().append(gen_klass)
         # reset variables
         self.class_name = None
         self.class_dict = None
         self.class_bases = ()
 
+    def get_class_list(self):
+        """Return the list of generated classes for the current tag."""
+        if self.__tag == self.tag_struct:
+            return self.cls.xml_struct
+        elif self.__tag == self.tag_enum:
+            return self.cls.xml_enum
+        elif self.__tag == self.tag_alias:
+            return self.cls.xml_alias
+        elif self.__tag == self.tag_bit_struct:
+            return self.cls.xml_bit_struct
+
     def end_tag_struct(self):
         self.__end_general_tags()
 
@@ -839,28 +1093,20 @@ class XmlSaxHandler(xml.sax.handler.ContentHandler):
 
         # get 'name_attribute' for all classes
         # we need this to fix them in cond="..." later
+        # (classes whose creation is deferred are stored by name)
         klass_filter = {}
-        for klass in self.cls.xml_struct:
-            klass_filter[self.cls.name_attribute(klass.__name__)] = klass
-        for obj in list(self.cls.__dict__.values()):
-            # skip objects that are not generated by the C{type} function
-            # or that do not derive from StructBase
-            if not (isinstance(obj, type) and issubclass(obj, StructBase)):
-                continue
-            # fix templates
-            for attr in obj._attrs:
-                templ = attr.template
-                if isinstance(templ, str):
-                    attr.template = \
-                        getattr(self.cls, templ) if templ != "TEMPLATE" \
-                            else type(None)
-                attrtype = attr.type_
-                if isinstance(attrtype, str):
-                    attr.type_ = getattr(self.cls, attrtype)
-                # fix refs to types in conditions
-                if attr.cond:
-                    attr.cond.map_(
-                        lambda x: klass_filter[x] if x in klass_filter else x)
+        for klass in getattr(self.cls.xml_struct, "_items",
+                             self.cls.xml_struct):
+            klass_name = klass if isinstance(klass, str) else klass.__name__
+            klass_filter[self.cls.name_attribute(klass_name)] = klass
+        self.cls._klass_filter = klass_filter
+        # fix all struct classes created so far, the others are fixed
+        # when they are created
+        # skip objects that are not generated by the C{type} function
+        # or that do not derive from StructBase
+        _fix_struct_classes(self.cls, [
+            obj for obj in list(self.cls.__dict__.values())
+            if isinstance(obj, type) and issubclass(obj, StructBase)])
 
     def characters(self, chars):
         """Add the string C{chars} to the docstring.
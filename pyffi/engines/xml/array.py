@@ -40,18 +40,109 @@
 # ------------------------------------------------------------------------
 
 # note: some imports are defined at the end to avoid problems with circularity
+import array
 import logging
+import struct
+import sys
 import weakref
 
 from pyffi.utils.graph import DetailNode, EdgeFilter
+from pyffi.utils.memoryreader import read_view
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# cache of bulk codecs, see _get_bulk_codec
+_BULK_CODECS = {}
+
+
+def _get_basic_bulk_format(element_type):
+    """Return the struct format character of a basic type whose read and
+    write methods are plain struct codecs, or ``None`` if the type has a
+    custom implementation."""
+    if element_type._has_links or element_type._has_strings:
+        return None
+    if (element_type.read is NumericalType.read
+            and element_type.write is NumericalType.write):
+        return element_type._struct
+    if element_type.read is Float.read and element_type.write is Float.write:
+        # Float.read always uses a 32 bit float
+        return 'f'
+    return None
+
+
+def _get_bulk_codec(element_type, data):
+    """Get a codec for reading and writing many elements of the given type
+    at once, for the given data. The codec is a tuple ``(codec, slots)``,
+    where C{codec} is a :class:`struct.Struct` for a single element, and
+    C{slots} is ``None`` for basic elements, or the list of value slots for
+    plain structures. Returns ``None`` if the elements must be read one by
+    one, that is, if they have links, strings, conditions, or custom
+    read and write methods.
+    """
+    version = getattr(data, "version", None)
+    user_version = getattr(data, "user_version", None)
+    try:
+        byte_order = data._byte_order
+    except AttributeError:
+        # a Context instead of a Data instance
+        byte_order = getattr(data, "byte_order", "<")
+    key = (element_type, version, user_version, byte_order)
+    try:
+        return _BULK_CODECS[key]
+    except KeyError:
+        pass
+    bulk_format = None
+    slots = None
+    if issubclass(element_type, BasicBase):
+        bulk_format = _get_basic_bulk_format(element_type)
+    elif (issubclass(element_type, StructBase)
+          and not element_type._is_template
+          and not element_type._has_links
+          and not element_type._has_strings
+          and element_type.read is StructBase.read
+          and element_type.write is StructBase.write):
+        steps, has_duplicates = element_type._get_plan(version, user_version)
+        formats = []
+        slots = []
+        for (attr, slot, arg_name), cond, vercond in steps:
+            if (has_duplicates or cond is not None or vercond is not None
+                    or attr.arr1 is not None or attr.is_abstract
+                    or isinstance(attr.type_, str)
+                    or not issubclass(attr.type_, BasicBase)):
+                formats = None
+                break
+            attr_format = _get_basic_bulk_format(attr.type_)
+            if attr_format is None:
+                formats = None
+                break
+            formats.append(attr_format)
+            slots.append(slot)
+        if formats:
+            bulk_format = "".join(formats)
+    if bulk_format is None:
+        codec = None
+    else:
+        codec = (get_struct(bulk_format, byte_order), slots)
+    _BULK_CODECS[key] = codec
+    return codec
 
 
 class _ListWrap(list, DetailNode):
     """A wrapper for list, which uses get_value and set_value for
     getting and setting items of the basic type."""
 
+    __slots__ = ("_parent", "_owner", "_elementType", "_get_item_hook",
+                 "_set_item_hook", "_iter_item_hook", "arg", "__weakref__")
+
     def __init__(self, element_type, parent=None):
+        self.arg = None
         self._parent = weakref.ref(parent) if parent else None
+        # the block which contains this list, see StructBase.get_digest
+        self._owner = getattr(parent, "_owner", None)
         self._elementType = element_type
         # we link to the unbound methods (that is, self.__class__.xxx
         # instead of self.xxx) to avoid circular references!!
@@ -103,7 +194,8 @@ class _ListWrap(list, DetailNode):
 
     def set_basic_item(self, index, value):
         """Item setter which calls C{set_value()} on the C{index}'d item."""
-        return list.__getitem__(self, index).set_value(value)
+        list.__getitem__(self, index).set_value(value)
+        _invalidate_digest(self)
 
     def get_item(self, index):
         """Regular item getter, used when the list does not have BasicBase
@@ -125,8 +217,10 @@ class Array(_ListWrap):
     """A general purpose class for 1 or 2 dimensional arrays consisting of
     either BasicBase or StructBase elements."""
 
+    __slots__ = ("_elementTypeTemplate", "_elementTypeArgument",
+                 "_count1", "_count2")
+
     logger = logging.getLogger("pyffi.nif.data.array")
-    arg = None  # default argument
 
     def __init__(
             self,
@@ -255,6 +349,7 @@ class Array(_ListWrap):
         """Update the array size. Call this function whenever the size
         parameters change in C{parent}."""
         ## TODO also update row numbers
+        _invalidate_digest(self)
         old_size = len(self)
         new_size = self._len1()
         if self._count2 is None:
@@ -264,14 +359,15 @@ class Array(_ListWrap):
                 for i in range(new_size - old_size):
                     elem = self._elementType(
                         template=self._elementTypeTemplate,
-                        argument=self._elementTypeArgument)
+                        argument=self._elementTypeArgument,
+                        parent=self)
                     self.append(elem)
         else:
             if new_size < old_size:
                 del self[new_size:old_size]
             else:
                 for i in range(new_size - old_size):
-                    self.append(_ListWrap(self._elementType))
+                    self.append(_ListWrap(self._elementType, parent=self))
             for i, elemlist in enumerate(list.__iter__(self)):
                 old_size_i = len(elemlist)
                 new_size_i = self._len2(i)
@@ -281,7 +377,8 @@ class Array(_ListWrap):
                     for j in range(new_size_i - old_size_i):
                         elem = self._elementType(
                             template=self._elementTypeTemplate,
-                            argument=self._elementTypeArgument)
+                            argument=self._elementTypeArgument,
+                            parent=elemlist)
                         elemlist.append(elem)
 
     def read(self, stream, data):
@@ -297,7 +394,11 @@ class Array(_ListWrap):
         del self[0:self.__len__()]
 
         # read array
+        codec = _get_bulk_codec(self._elementType, data)
         if self._count2 is None:
+            if codec is not None:
+                self._read_bulk(self, len1, codec, stream)
+                return
             for i in range(len1):
                 elem = self._elementType(
                     template=self._elementTypeTemplate,
@@ -311,15 +412,60 @@ class Array(_ListWrap):
                 if len2i > 0x10000000:
                     raise ValueError('array too long (%i)' % len2i)
                 elemlist = _ListWrap(self._elementType, parent=self)
-                for j in range(len2i):
-                    elem = self._elementType(
-                        template=self._elementTypeTemplate,
-                        argument=self._elementTypeArgument,
-                        parent=elemlist)
-                    elem.read(stream, data)
-                    elemlist.append(elem)
+                if codec is not None:
+                    self._read_bulk(elemlist, len2i, codec, stream)
+                else:
+                    for j in range(len2i):
+                        elem = self._elementType(
+                            template=self._elementTypeTemplate,
+                            argument=self._elementTypeArgument,
+                            parent=elemlist)
+                        elem.read(stream, data)
+                        elemlist.append(elem)
                 self.append(elemlist)
 
+    def _read_bulk(self, elemlist, count, codec, stream):
+        """Read C{count} elements into C{elemlist} with a single read call,
+        decoding them with the given bulk codec."""
+        codec, slots = codec
+        buf = read_view(stream, codec.size * count)
+        if len(buf) != codec.size * count:
+            raise struct.error(
+                "unpack requires a buffer of %i bytes" % (codec.size * count))
+        for values in codec.iter_unpack(buf):
+            elem = self._elementType(
+                template=self._elementTypeTemplate,
+                argument=self._elementTypeArgument,
+                parent=elemlist)
+            if slots is None:
+                elem._value = values[0]
+            else:
+                for slot, value in zip(slots, values):
+                    getattr(elem, slot)._value = value
+            elemlist.append(elem)
+
+    def _write_bulk(self, elemlist, codec, stream, data):
+        """Write all elements of C{elemlist} with a single write call,
+        encoding them with the given bulk codec. Falls back to writing
+        elements one by one if a value cannot be encoded."""
+        codec, slots = codec
+        try:
+            if slots is None:
+                buf = b"".join(
+                    codec.pack(elem._value)
+                    for elem in list.__iter__(elemlist))
+            else:
+                buf = b"".join(
+                    codec.pack(*[getattr(elem, slot)._value
+                                 for slot in slots])
+                    for elem in list.__iter__(elemlist))
+        except (struct.error, OverflowError):
+            # let the element types deal with it
+            for elem in list.__iter__(elemlist):
+                elem.write(stream, data)
+        else:
+            stream.write(buf)
+
     def write(self, stream, data):
         """Write array to stream."""
         self._elementTypeArgument = self.arg
@@ -329,7 +475,11 @@ class Array(_ListWrap):
 describing number of elements (%i)' % (self.__len__(), len1))
         if len1 > 0x10000000:
             raise ValueError('array too long (%i)' % len1)
+        codec = _get_bulk_codec(self._elementType, data)
         if self._count2 is None:
+            if codec is not None:
+                self._write_bulk(self, codec, stream, data)
+                return
             for elem in list.__iter__(self):
                 elem.write(stream, data)
         else:
@@ -340,6 +490,9 @@ describing number of elements (%i)' % (self.__len__(), len1))
 describing number of elements (%i)" % (elemlist.__len__(), len2i))
                 if len2i > 0x10000000:
                     raise ValueError('array too long (%i)' % len2i)
+                if codec is not None:
+                    self._write_bulk(elemlist, codec, stream, data)
+                    continue
                 for elem in list.__iter__(elemlist):
                     elem.write(stream, data)
 
@@ -396,6 +549,10 @@ describing number of elements (%i)" % (elemlist.__len__(), len2i))
     def replace_global_node(self, oldbranch, newbranch, **kwargs):
         """Calculate a hash value for the array, as a tuple."""
         for elem in self._elementList():
+            if (isinstance(elem, BasicBase)
+                    and elem.get_value() is oldbranch):
+                # the link is replaced
+                _invalidate_digest(self)
             elem.replace_global_node(oldbranch, newbranch, **kwargs)
 
     def _elementList(self, **kwargs):
@@ -409,5 +566,500 @@ describing number of elements (%i)" % (elemlist.__len__(), len2i))
                     yield elem
 
 
+# native byte order, as struct byte order character
+_NATIVE_BYTE_ORDER = '<' if sys.byteorder == 'little' else '>'
+
+# cache of column layouts, see _get_column_layout
+_COLUMN_LAYOUTS = {}
+
+
+class _ColumnLayout(object):
+    """Describes how elements of a given type are stored in a column."""
+
+    def __init__(self, element_type, typecode, slots):
+        self.element_type = element_type
+        # array.array type code of all fields
+        self.typecode = typecode
+        # number of fields per element
+        self.stride = len(slots) if slots is not None else 1
+        self.itemsize = array.array(typecode).itemsize
+        # value slots, or None for basic elements
+        self.slots = slots
+        if slots is None:
+            self.names = None
+            elem = element_type()
+            self.defaults = (elem._value,)
+            self.scratch = (elem,)
+            self.proxy_class = None
+        else:
+            self.names = tuple(slot[1:-7] for slot in slots)
+            elem = element_type()
+            self.defaults = tuple(getattr(elem, slot)._value for slot in slots)
+            # one instance per field type, used for computing hashes
+            self.scratch = tuple(
+                getattr(element_type(), slot) for slot in slots)
+            self.proxy_class = _make_proxy_class(element_type, self.names)
+            self.proxy_class._column_scratch = self.scratch
+
+
+def _get_column_layout(element_type):
+    """Get the column layout for the given element type, or ``None`` if
+    the element type cannot be stored in a column. This is the case
+    unless all fields of the element are plain numbers of the same
+    type, see :func:`pyffi.engines.xml.array._get_bulk_codec`.
+    """
+    try:
+        return _COLUMN_LAYOUTS[element_type]
+    except KeyError:
+        pass
+    layout = None
+    codec = _get_bulk_codec(element_type, None)
+    if codec is not None:
+        codec, slots = codec
+        fmt = codec.format
+        if isinstance(fmt, bytes):
+            fmt = fmt.decode("ascii")
+        typecodes = set(fmt[1:])
+        if len(typecodes) == 1:
+            typecode = typecodes.pop()
+            if array.array(typecode).itemsize == codec.size // len(fmt[1:]):
+                layout = _ColumnLayout(element_type, typecode, slots)
+    _COLUMN_LAYOUTS[element_type] = layout
+    return layout
+
+
+def _column_field(index, doc):
+    """Property for getting and setting a field of a column element."""
+
+    def fget(self):
+        return self._column[self._offset + index]
+
+    def fset(self, value):
+        self._column[self._offset + index] = value
+        _invalidate_digest(self)
+
+    return property(fget, fset, doc=doc)
+
+
+class _ColumnProxy(object):
+    """Base class for lightweight views on elements of a column. Proxy
+    classes derive from the element type, so all its methods and
+    properties remain available.
+    """
+
+    def __str__(self):
+        text = '%s instance at 0x%08X\n' % (self.__class__, id(self))
+        for name in self._column_names:
+            text += '* %s : %s\n' % (name, getattr(self, name))
+        return text
+
+    def get_hash(self, data=None):
+        hsh = []
+        for scratch, value in zip(self._column_scratch, self.as_column_tuple()):
+            scratch._value = value
+            hsh.append(scratch.get_hash(data))
+        return tuple(hsh)
+
+    def as_column_tuple(self):
+        """Return the values of all fields, as a tuple."""
+        return tuple(
+            self._column[self._offset:self._offset + self._column_stride])
+
+    def get_detail_child_nodes(self, edge_filter=EdgeFilter()):
+        return iter(())
+
+    def get_detail_child_names(self, edge_filter=EdgeFilter()):
+        return iter(())
+
+
+def _make_proxy_class(element_type, names):
+    """Create the proxy class for elements of the given struct type."""
+    dct = {
+        '_column_names': names,
+        '_column_stride': len(names),
+        '__module__': element_type.__module__,
+    }
+    for index, name in enumerate(names):
+        dct[name] = _column_field(
+            index, getattr(element_type, name).__doc__)
+    # keep customized methods of the element type
+    for method in ('__str__', 'get_hash'):
+        if getattr(element_type, method) is not getattr(StructBase, method):
+            dct[method] = getattr(element_type, method)
+    return type(element_type.__name__, (_ColumnProxy, element_type), dct)
+
+
+class _Column(DetailNode):
+    """A one dimensional list of elements, stored in a flat array."""
+
+    __slots__ = ("_layout", "_column", "_owner")
+
+    def __init__(self, layout, count=0, owner=None):
+        self._layout = layout
+        # the block which contains the column, see StructBase.get_digest
+        self._owner = owner
+        self._column = array.array(layout.typecode,
+                                   layout.defaults * count)
+
+    def __len__(self):
+        return len(self._column) // self._layout.stride
+
+    def _get_element(self, index):
+        layout = self._layout
+        if layout.slots is None:
+            return self._column[index]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("list index out of range")
+        proxy = layout.proxy_class.__new__(layout.proxy_class)
+        proxy._column = self._column
+        proxy._offset = index * layout.stride
+        proxy._owner = self._owner
+        return proxy
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get_element(i)
+                    for i in range(*index.indices(len(self)))]
+        return self._get_element(index)
+
+    def __setitem__(self, index, value):
+        layout = self._layout
+        if isinstance(index, slice):
+            raise TypeError(
+                "cannot assign a slice of a column, it has a fixed size")
+        if layout.slots is None:
+            self._column[index] = value
+        else:
+            # copy the fields of the value into the column
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError("list assignment index out of range")
+            if not isinstance(value, layout.element_type):
+                raise TypeError(
+                    "cannot assign %s to an element of type %s"
+                    % (value.__class__.__name__,
+                       layout.element_type.__name__))
+            if isinstance(value, _ColumnProxy):
+                values = value.as_column_tuple()
+            else:
+                values = [getattr(value, slot)._value
+                          for slot in layout.slots]
+            offset = index * layout.stride
+            self._column[offset:offset + layout.stride] = array.array(
+                layout.typecode, values)
+        _invalidate_digest(self)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self._get_element(index)
+
+    def __contains__(self, value):
+        for elem in self.__iter__():
+            if elem == value:
+                return True
+        return False
+
+    def resize(self, count):
+        """Change the number of elements, padding with default values."""
+        stride = self._layout.stride
+        old_count = len(self)
+        if count < old_count:
+            del self._column[count * stride:]
+        elif count > old_count:
+            self._column.extend(self._layout.defaults * (count - old_count))
+
+    def read(self, stream, count, byte_order):
+        """Replace all elements by C{count} elements read from stream."""
+        size = count * self._layout.stride * self._layout.itemsize
+        buf = read_view(stream, size)
+        if len(buf) != size:
+            raise ValueError("expected %i bytes but got %i" % (size, len(buf)))
+        self._column = array.array(self._layout.typecode)
+        self._column.frombytes(buf)
+        if byte_order != _NATIVE_BYTE_ORDER:
+            self._column.byteswap()
+
+    def write(self, stream, byte_order):
+        """Write all elements to stream."""
+        if byte_order != _NATIVE_BYTE_ORDER:
+            column = array.array(self._layout.typecode, self._column)
+            column.byteswap()
+            stream.write(column.tobytes())
+        else:
+            stream.write(self._column.tobytes())
+
+    def get_size(self):
+        return len(self._column) * self._layout.itemsize
+
+    def get_hash(self, data=None):
+        if self._layout.slots is None:
+            scratch, = self._layout.scratch
+            hsh = []
+            for value in self._column:
+                scratch._value = value
+                hsh.append(scratch.get_hash(data))
+            return tuple(hsh)
+        return tuple(elem.get_hash(data) for elem in self.__iter__())
+
+    def get_buffer(self):
+        """Return the underlying flat buffer: a writable NumPy array of
+        shape (len, stride) if NumPy is available, otherwise the
+        ``array.array`` itself. Both share memory with the column, so
+        the column must not be resized while the buffer is in use. As
+        the buffer can be written to, getting it invalidates the digest
+        of the block, see
+        :meth:`pyffi.engines.xml.struct_.StructBase.get_digest`."""
+        _invalidate_digest(self)
+        if numpy is None:
+            return self._column
+        buf = numpy.frombuffer(self._column, dtype=self._layout.typecode)
+        if self._layout.slots is None:
+            return buf
+        return buf.reshape(-1, self._layout.stride)
+
+    def get_field_names(self):
+        """Return the names of the fields of every element in the buffer,
+        in order, or ``None`` if elements are basic values."""
+        return self._layout.names
+
+    # DetailNode
+
+    def get_detail_child_nodes(self, edge_filter=EdgeFilter()):
+        return self.__iter__()
+
+    def get_detail_child_names(self, edge_filter=EdgeFilter()):
+        return ("[%i]" % row for row in range(len(self)))
+
+
+class ColumnArray(Array):
+    """An array of plain numeric elements, such as vertices or triangles,
+    which stores all values in flat typed buffers rather than in one
+    instance per element. Elements are accessed through lightweight
+    proxies, so ``vertices[i].x`` works as usual, but these proxies are
+    views: they are created on access, and are not identical between
+    accesses.
+
+    Structures opt in through their ``_columnar_attrs`` and
+    ``use_columnar_arrays`` class variables, see
+    :class:`pyffi.engines.xml.struct_.StructBase`.
+    """
+
+    __slots__ = ("_layout", "_rows")
+
+    def __init__(
+            self,
+            element_type=None,
+            element_type_template=None,
+            element_type_argument=None,
+            count1=None, count2=None,
+            parent=None):
+        list.__init__(self)
+        self.arg = None
+        self._layout = _get_column_layout(element_type)
+        if self._layout is None:
+            raise TypeError(
+                "cannot store %s in a column" % element_type.__name__)
+        self._elementType = element_type
+        self._parent = weakref.ref(parent) if parent else None
+        self._owner = getattr(parent, "_owner", None)
+        self._elementTypeTemplate = element_type_template
+        self._elementTypeArgument = element_type_argument
+        self._count1 = count1
+        self._count2 = count2
+        if self._count2 is None:
+            self._rows = _Column(self._layout, self._len1(), self._owner)
+        else:
+            self._rows = [
+                _Column(self._layout, self._len2(i), self._owner)
+                for i in range(self._len1())]
+
+    @staticmethod
+    def is_supported(element_type):
+        """Check whether elements of the given type can be stored in a
+        column array."""
+        return _get_column_layout(element_type) is not None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        return self._rows[index]
+
+    def __setitem__(self, index, value):
+        if self._count2 is not None:
+            raise TypeError(
+                "cannot replace a row of a two dimensional column array,"
+                " assign its elements instead")
+        self._rows[index] = value
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __reversed__(self):
+        return reversed(self._rows)
+
+    def _fixed_size(name):
+        """List method which is not supported, as the size of the
+        array follows its count fields, see :meth:`update_size`."""
+
+        def method(self, *args, **kwargs):
+            raise TypeError(
+                "%s does not support %s, call update_size to resize it"
+                % (self.__class__.__name__, name))
+
+        method.__name__ = name
+        return method
+
+    append = _fixed_size("append")
+    extend = _fixed_size("extend")
+    insert = _fixed_size("insert")
+    pop = _fixed_size("pop")
+    remove = _fixed_size("remove")
+    clear = _fixed_size("clear")
+    sort = _fixed_size("sort")
+    reverse = _fixed_size("reverse")
+    __delitem__ = _fixed_size("__delitem__")
+    __iadd__ = _fixed_size("__iadd__")
+    __imul__ = _fixed_size("__imul__")
+    del _fixed_size
+
+    def __str__(self):
+        text = '%s instance at 0x%08X\n' % (self.__class__, id(self))
+        k = 0
+        for i, elem in enumerate(self._elementList()):
+            if k > 16:
+                text += "etc...\n"
+                break
+            text += "%i: %s" % (i, elem)
+            if text[-1:] != "\n":
+                text += "\n"
+            k += 1
+        return text
+
+    def _columns(self):
+        """List of all columns."""
+        if self._count2 is None:
+            return [self._rows]
+        return self._rows
+
+    def get_buffer(self):
+        """Return the flat buffer of a one dimensional array, see
+        :meth:`_Column.get_buffer`."""
+        if self._count2 is not None:
+            raise ValueError("two dimensional array has one buffer per row")
+        return self._rows.get_buffer()
+
+    def get_field_names(self):
+        """Return the names of the fields of every element in the buffer,
+        see :meth:`_Column.get_field_names`."""
+        return self._layout.names
+
+    def update_size(self):
+        """Update the array size. Call this function whenever the size
+        parameters change in C{parent}."""
+        _invalidate_digest(self)
+        if self._count2 is None:
+            self._rows.resize(self._len1())
+        else:
+            len1 = self._len1()
+            del self._rows[len1:]
+            while len(self._rows) < len1:
+                self._rows.append(_Column(self._layout, owner=self._owner))
+            for i, row in enumerate(self._rows):
+                row.resize(self._len2(i))
+
+    def read(self, stream, data):
+        """Read array from stream."""
+        self._elementTypeArgument = self.arg
+        byte_order = _get_byte_order(data)
+        len1 = self._len1()
+        if len1 > 0x10000000:
+            raise ValueError('array too long (%i)' % len1)
+        if self._count2 is None:
+            self._rows.read(stream, len1, byte_order)
+        else:
+            rows = []
+            for i in range(len1):
+                len2i = self._len2(i)
+                if len2i > 0x10000000:
+                    raise ValueError('array too long (%i)' % len2i)
+                row = _Column(self._layout, owner=self._owner)
+                row.read(stream, len2i, byte_order)
+                rows.append(row)
+            self._rows = rows
+
+    def write(self, stream, data):
+        """Write array to stream."""
+        self._elementTypeArgument = self.arg
+        byte_order = _get_byte_order(data)
+        len1 = self._len1()
+        if len1 != len(self):
+            raise ValueError('array size (%i) different from to field \
+describing number of elements (%i)' % (len(self), len1))
+        if self._count2 is None:
+            self._rows.write(stream, byte_order)
+        else:
+            for i, row in enumerate(self._rows):
+                len2i = self._len2(i)
+                if len2i != len(row):
+                    raise ValueError("array size (%i) different from to \
+field describing number of elements (%i)" % (len(row), len2i))
+                row.write(stream, byte_order)
+
+    def fix_links(self, data):
+        pass
+
+    def get_links(self, data=None):
+        return []
+
+    def get_strings(self, data):
+        return []
+
+    def get_refs(self, data=None):
+        return []
+
+    def get_size(self, data=None):
+        return sum(row.get_size() for row in self._columns())
+
+    def get_hash(self, data=None):
+        if self._count2 is None:
+            return self._rows.get_hash(data)
+        hsh = []
+        for row in self._rows:
+            hsh.extend(row.get_hash(data))
+        return tuple(hsh)
+
+    def replace_global_node(self, oldbranch, newbranch, **kwargs):
+        pass
+
+    def _elementList(self, **kwargs):
+        """Generator for listing all elements."""
+        for row in self._columns():
+            for elem in row:
+                yield elem
+
+    # DetailNode
+
+    def get_detail_child_nodes(self, edge_filter=EdgeFilter()):
+        return iter(self._rows)
+
+    def get_detail_child_names(self, edge_filter=EdgeFilter()):
+        return ("[%i]" % row for row in range(len(self)))
+
+
+def _get_byte_order(data):
+    """Byte order of the data, see _get_bulk_codec."""
+    try:
+        return data._byte_order
+    except AttributeError:
+        return getattr(data, "byte_order", "<")
+
+
+from pyffi.types.base import NumericalType
 from pyffi.types.basic import BasicBase
-from pyffi.engines.xml.struct_ import StructBase
+from pyffi.types.codec import get_struct
+from pyffi.types.common import Float
+from pyffi.engines.xml.struct_ import StructBase, _invalidate_digest
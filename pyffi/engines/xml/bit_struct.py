@@ -41,9 +41,9 @@
 
 # note: some imports are defined at the end to avoid problems with circularity
 
-import struct
 from functools import partial
 
+from pyffi.types.codec import BitLayout, get_codec_table
 from pyffi.types.editable import EditableSpinBox  # for Bits
 from pyffi.utils.graph import DetailNode, EdgeFilter
 
@@ -53,6 +53,27 @@ class _MetaBitStructBase(type):
     For each attribute in _attrs, an <attrname> property is generated which gets and sets bit fields.
     Used as metaclass of BitStructBase."""
 
+    def __new__(metacls, name, bases, dct):
+        if "__slots__" not in dct:
+            # store the bits in slots, see
+            # pyffi.engines.xml.struct_._MetaStructBase.__new__
+            dct = dict(dct)
+            dct.pop("__dict__", None)
+            dct.pop("__weakref__", None)
+            base_names = set()
+            for base in bases:
+                base_names.update(getattr(base, "_names", ()))
+            slots = []
+            for attr in dct.get("_attrs", ()):
+                slot = "_%s_value_" % attr.name
+                if (attr.name not in base_names and slot not in slots
+                        and slot.isidentifier()
+                        and not slot.startswith("__")):
+                    slots.append(slot)
+            dct["__slots__"] = tuple(slots)
+        return super(_MetaBitStructBase, metacls).__new__(
+            metacls, name, bases, dct)
+
     def __init__(cls, name, bases, dct):
         super(_MetaBitStructBase, cls).__init__(name, bases, dct)
         # consistency checks
@@ -70,6 +91,10 @@ class _MetaBitStructBase(type):
             cls._struct = 'I'
         else:
             raise RuntimeError("unsupported bitstruct numbytes")
+        # compiled storage codec for each byte order
+        cls._codecs = get_codec_table(cls._struct)
+        # bit layouts per (version, user_version), see _get_layout
+        cls._layouts = {}
 
         # template type?
         cls._is_template = False
@@ -99,6 +124,8 @@ class _MetaBitStructBase(type):
 class Bits(DetailNode, EditableSpinBox):
     """Basic implementation of a n-bit unsigned integer type (without read and write)."""
 
+    __slots__ = ("_value", "_numbits")
+
     def __init__(self, numbits=1, default=0, parent=None):
         # parent disabled for performance
         # self._parent = weakref.ref(parent) if parent else None
@@ -190,10 +217,12 @@ class BitStructBase(DetailNode, metaclass=_MetaBitStructBase):
     <BLANKLINE>
     """
 
+    # the bits are stored in slots generated by the metaclass
+    __slots__ = ("arg", "_items", "_owner")
+
     _attrs = []
     _numbytes = 1  # default width of a bitstruct
     _games = {}
-    arg = None  # default argument
 
     # initialize all attributes
     def __init__(self, template=None, argument=None, parent=None):
@@ -215,6 +244,9 @@ class BitStructBase(DetailNode, metaclass=_MetaBitStructBase):
         self.arg = argument
         # save parent (note: disabled for performance)
         # self._parent = weakref.ref(parent) if parent else None
+        # but keep the block which contains this instance, see
+        # pyffi.engines.xml.struct_.StructBase.get_digest
+        self._owner = getattr(parent, "_owner", None)
 
         # initialize item list
         # list is used for instance by qskope to display the structure in a tree view
@@ -289,35 +321,29 @@ class BitStructBase(DetailNode, metaclass=_MetaBitStructBase):
     def read(self, stream, data):
         """Read structure from stream."""
         # read all attributes
-        value = struct.unpack(data._byte_order + self._struct, stream.read(self._numbytes))[0]
+        value = self._codecs[data._byte_order].unpack(
+            stream.read(self._numbytes))[0]
 
         # set the structure variables
         self.populate_attribute_values(value, data)
 
     def populate_attribute_values(self, value, data):
         """Set structure values from integer."""
-        bitpos = 0
-        for attr in self._get_filtered_attribute_list(data):
-            # print(attr.name) # debug
-            attrvalue = (value >> bitpos) & ((1 << attr.numbits) - 1)
-            setattr(self, attr.name, attrvalue)
-            bitpos += attr.numbits
+        names, layout = self._get_layout(data)
+        for name, attrvalue in zip(names, layout.unpack(value)):
+            setattr(self, name, attrvalue)
 
     def get_attributes_values(self, data):
         # implementation note: not defined via __int__ because conversion
         # takes arguments
         """Get as integer."""
-        value = 0
-        bitpos = 0
-        for attr in self._get_filtered_attribute_list(data):
-            attrvalue = getattr(self, attr.name)
-            value |= (attrvalue & ((1 << attr.numbits) - 1)) << bitpos
-            bitpos += attr.numbits
-        return value
+        names, layout = self._get_layout(data)
+        return layout.pack([getattr(self, name) for name in names])
 
     def write(self, stream, data):
         """Write structure to stream."""
-        stream.write(struct.pack(data._byte_order + self._struct, self.get_attributes_values(data)))
+        stream.write(self._codecs[data._byte_order].pack(
+            self.get_attributes_values(data)))
 
     def fix_links(self, data):
         """Fix links in the structure."""
@@ -386,6 +412,27 @@ class BitStructBase(DetailNode, metaclass=_MetaBitStructBase):
                 names.append(attr.name)
         return names
 
+    def _get_layout(self, data=None):
+        """Get the names of the 'active' attributes, and the
+        :class:`~pyffi.types.codec.BitLayout` of their bits. The result
+        is cached per version and user version, unless some attribute
+        has a condition.
+        """
+        if data:
+            key = (data.version, data.user_version)
+        else:
+            key = (None, None)
+        try:
+            return self._layouts[key]
+        except KeyError:
+            pass
+        attrs = list(self._get_filtered_attribute_list(data))
+        layout = ([attr.name for attr in attrs],
+                  BitLayout(attr.numbits for attr in attrs))
+        if all(attr.cond is None for attr in self._attribute_list):
+            self._layouts[key] = layout
+        return layout
+
     def _get_filtered_attribute_list(self, data=None):
         """Generator for listing all 'active' attributes, that is, attributes whose condition evaluates ``True``,
         whose version interval contains C{version}, and whose user version is C{user_version}.
@@ -441,6 +488,7 @@ class BitStructBase(DetailNode, metaclass=_MetaBitStructBase):
     def set_attribute(self, value, name):
         """Set the value of a basic attribute."""
         getattr(self, "_" + name + "_value_").set_value(value)
+        _invalidate_digest(self)
 
     def tree(self):
         """A generator for parsing all blocks in the tree (starting from and
@@ -458,3 +506,6 @@ class BitStructBase(DetailNode, metaclass=_MetaBitStructBase):
     def get_detail_child_names(self, edge_filter=EdgeFilter()):
         """Yield name of each child."""
         return (name for name in self._names)
+
+
+from pyffi.engines.xml.struct_ import _invalidate_digest
@@ -0,0 +1,232 @@
+"""A cache of parsed xml format descriptions, so the xml files need not
+be parsed again on every start up.
+
+The first time a format description is parsed, all events sent by the
+SAX parser to the content handler are recorded, and stored with
+:mod:`marshal` in the cache directory, together with the partitions of
+all expressions of the description (see
+:class:`pyffi.engines.xml.expression.Expression`). Later, the events are
+replayed from the cache straight into the content handler, which then
+generates the classes as usual, but without scanning the expression
+strings again. Generated classes themselves cannot be stored. Cache
+files are keyed by a hash of the xml contents, the pyffi version, and
+the content handler class, so edited xml files and upgrades never pick
+up stale entries.
+
+The cache directory is taken from the :envvar:`PYFFI_CACHE_DIR`
+environment variable, and defaults to :file:`pyffi` in the user cache
+directory. Set :envvar:`PYFFI_CACHE_DIR` to an empty string to disable
+the cache. Failures to read or write the cache are never fatal: the
+xml file is simply parsed.
+
+>>> import tempfile, xml.sax.handler
+>>> class Handler(xml.sax.handler.ContentHandler):
+...     def __init__(self):
+...         self.events = []
+...     def startElement(self, name, attrs):
+...         self.events.append((name, attrs.get("name")))
+...     def characters(self, chars):
+...         if chars.strip():
+...             self.events.append(chars.strip())
+>>> text = '<niftoolsxml><basic name="int">Integer.</basic></niftoolsxml>'
+>>> cache_dir = tempfile.mkdtemp()
+>>> handler = Handler()
+>>> parse(text, handler, cache_dir)
+False
+>>> handler.events
+[('niftoolsxml', None), ('basic', 'int'), 'Integer.']
+>>> handler = Handler()
+>>> parse(text, handler, cache_dir)
+True
+>>> handler.events
+[('niftoolsxml', None), ('basic', 'int'), 'Integer.']
+>>> import shutil
+>>> shutil.rmtree(cache_dir)
+"""
+
+# ------------------------------------------------------------------------
+#  ***** BEGIN LICENSE BLOCK *****
+#
+#  Copyright © 2007-2019, Python File Format Interface.
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#
+#     * Redistributions in binary form must reproduce the above
+#       copyright notice, this list of conditions and the following
+#       disclaimer in the documentation and/or other materials provided
+#       with the distribution.
+#
+#     * Neither the name of the Python File Format Interface
+#       project nor the names of its contributors may be used to endorse
+#       or promote products derived from this software without specific
+#       prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+#  LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+#
+#  ***** END LICENSE BLOCK *****
+# ------------------------------------------------------------------------
+
+import hashlib
+import io
+import logging
+import marshal
+import os
+import tempfile
+import xml.sax
+import xml.sax.handler
+import xml.sax.xmlreader
+
+import pyffi
+from pyffi.engines.xml.expression import Expression
+
+# bump when the layout of the cache files changes
+CACHE_FORMAT = 1
+
+# event codes
+_START_DOCUMENT = 0
+_END_DOCUMENT = 1
+_START_ELEMENT = 2
+_END_ELEMENT = 3
+_CHARACTERS = 4
+
+
+def get_cache_dir():
+    """Return the cache directory, or ``None`` if the cache is disabled."""
+    cache_dir = os.getenv("PYFFI_CACHE_DIR")
+    if cache_dir is None:
+        cache_home = (os.getenv("XDG_CACHE_HOME")
+                      or os.path.join(os.path.expanduser("~"), ".cache"))
+        cache_dir = os.path.join(cache_home, "pyffi")
+    return cache_dir or None
+
+
+class _RecordingHandler(xml.sax.handler.ContentHandler):
+    """Forwards all events to a content handler, and records them."""
+
+    def __init__(self, handler):
+        xml.sax.handler.ContentHandler.__init__(self)
+        self.handler = handler
+        self.events = []
+
+    def startDocument(self):
+        self.events.append((_START_DOCUMENT,))
+        self.handler.startDocument()
+
+    def endDocument(self):
+        self.events.append((_END_DOCUMENT,))
+        self.handler.endDocument()
+
+    def startElement(self, name, attrs):
+        self.events.append((_START_ELEMENT, name, dict(attrs.items())))
+        self.handler.startElement(name, attrs)
+
+    def endElement(self, name):
+        self.events.append((_END_ELEMENT, name))
+        self.handler.endElement(name)
+
+    def characters(self, content):
+        self.events.append((_CHARACTERS, content))
+        self.handler.characters(content)
+
+
+def _replay(events, handler):
+    """Send recorded events to a content handler."""
+    attributes = xml.sax.xmlreader.AttributesImpl
+    for event in events:
+        code = event[0]
+        if code == _START_ELEMENT:
+            handler.startElement(event[1], attributes(event[2]))
+        elif code == _END_ELEMENT:
+            handler.endElement(event[1])
+        elif code == _CHARACTERS:
+            handler.characters(event[1])
+        elif code == _START_DOCUMENT:
+            handler.startDocument()
+        else:
+            handler.endDocument()
+
+
+def _get_cache_file(text, handler, cache_dir):
+    """Name of the cache file for the given xml text and handler."""
+    key = hashlib.sha1()
+    for part in (str(CACHE_FORMAT), pyffi.__version__,
+                 handler.__class__.__module__,
+                 handler.__class__.__name__, text):
+        key.update(part.encode("utf-8"))
+        key.update(b"\0")
+    return os.path.join(cache_dir, key.hexdigest() + ".marshal")
+
+
+def parse(text, handler, cache_dir=None):
+    """Send the SAX events of the given xml text to the handler, from
+    the cache if possible.
+
+    :param text: The contents of the xml file.
+    :type text: ``str``
+    :param handler: The content handler.
+    :type handler: ``xml.sax.handler.ContentHandler``
+    :param cache_dir: The cache directory, or ``None`` to parse the xml
+        without caching.
+    :type cache_dir: ``str``
+    :return: ``True`` if the events came from the cache, ``False`` if the
+        xml was parsed.
+    :rtype: ``bool``
+    """
+    logger = logging.getLogger("pyffi.engines.xml.cache")
+    cache_file = None
+    if cache_dir:
+        cache_file = _get_cache_file(text, handler, cache_dir)
+        try:
+            with open(cache_file, "rb") as stream:
+                # loads on the full contents is much faster than load
+                events, partitions = marshal.loads(stream.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+        else:
+            logger.debug("Loading parsed xml from %s." % cache_file)
+            Expression._partitions.update(partitions)
+            _replay(events, handler)
+            return True
+    recorder = _RecordingHandler(handler)
+    parser = xml.sax.make_parser()
+    parser.setContentHandler(recorder if cache_file else handler)
+    parser.parse(io.StringIO(text))
+    if cache_file:
+        _write_cache(
+            cache_file, (recorder.events, Expression._partitions), logger)
+    return False
+
+
+def _write_cache(cache_file, contents, logger):
+    """Write the cache contents atomically, so concurrent processes never
+    read half written cache files."""
+    cache_dir = os.path.dirname(cache_file)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as stream:
+                marshal.dump(contents, stream)
+            os.replace(tmp_name, cache_file)
+        except:
+            os.remove(tmp_name)
+            raise
+    except OSError as exc:
+        logger.debug("Could not write xml cache %s: %s" % (cache_file, exc))
@@ -54,6 +54,17 @@ class _MetaEnumBase(DerivedMeta):
 
     Used as metaclass of EnumBase."""
 
+    def __new__(metacls, name, bases, dct):
+        if "__slots__" not in dct:
+            # the value is stored in a slot of the base class, see
+            # pyffi.engines.xml.struct_._MetaStructBase.__new__
+            dct = dict(dct)
+            dct.pop("__dict__", None)
+            dct.pop("__weakref__", None)
+            dct["__slots__"] = ()
+        return super(_MetaEnumBase, metacls).__new__(
+            metacls, name, bases, dct)
+
     def __init__(cls, name, bases, dct):
         super(_MetaEnumBase, cls).__init__(name, bases, dct)
         # consistency checks
@@ -129,6 +140,8 @@ class _MetaEnumBase(DerivedMeta):
 
 
 class EnumBase(BasicBase, EditableComboBox, metaclass=_MetaEnumBase):
+    __slots__ = ()
+
     _enumkeys = []
     _enumvalues = []
     _numbytes = 1  # default width of an enum
@@ -40,6 +40,7 @@
 #  ***** END LICENSE BLOCK *****
 # ------------------------------------------------------------------------
 
+import operator
 import re
 
 
@@ -117,99 +118,131 @@ class Expression(object):
     """
     operators = {'==', '!=', '>=', '<=', '&&', '||', '&', '|', '-', '!', '<', '>', '/', '*', '+'}
 
+    # functions implementing the binary operators
+    _operator_functions = {
+        '==': operator.eq,
+        '!=': operator.ne,
+        '>=': operator.ge,
+        '<=': operator.le,
+        '&&': lambda left, right: left and right,
+        '||': lambda left, right: left or right,
+        '&': operator.and_,
+        '|': operator.or_,
+        '-': operator.sub,
+        '>': operator.gt,
+        '<': operator.lt,
+        '/': operator.truediv,
+        '*': operator.mul,
+        '+': operator.add,
+    }
+
+    # results of _partition, shared by all expressions, and stored in the
+    # xml cache (see pyffi.engines.xml.cache)
+    _partitions = {}
+
     def __init__(self, expr_str, name_filter=None):
         try:
-            left, self._op, right = self._partition(expr_str)
+            try:
+                partition = self._partitions[expr_str]
+            except KeyError:
+                partition = self._partition(expr_str)
+                self._partitions[expr_str] = partition
+            left, self._op, right = partition
             self._left = self._parse(left, name_filter)
             self._right = self._parse(right, name_filter)
+            self._compile()
         except:
             print("error while parsing expression '%s'" % expr_str)
             raise
 
     def eval(self, data=None):
-        """Evaluate the expression to an integer."""
+        """Evaluate the expression to an integer.
 
-        if isinstance(self._left, Expression):
-            left = self._left.eval(data)
-        elif isinstance(self._left, str):
-            if self._left == '""':
-                left = ""
-            elif "." in self._left:
-                left = data
-                for part in self._left.split("."):
-                    left = getattr(left, part)
+        This method is replaced on every instance by a closure, compiled
+        from the expression tree by :meth:`_compile`.
+        """
+        return self._compile()(data)
 
-            # value is an arg attribute type, lookup parent for value to evaluate
-            elif self._left == 'arg':
-                left = (getattr(data, self._left)).to_int(None)
+    def _compile(self):
+        """Compile the expression tree into a single closure, store it as
+        the :meth:`eval` method of this instance, and return it. Operands
+        are evaluated exactly as the original tree walking evaluation did:
+        both operands are always evaluated, also for ``&&`` and ``||``.
+        """
+        left, left_value = self._compile_operand(self._left, ('""',))
+        op = self._op
+        if not op:
+            if left is None:
+                def func(data=None):
+                    return left_value
             else:
-                left = getattr(data, self._left)
-        elif isinstance(self._left, type):
-            left = isinstance(data, self._left)
-        elif self._left is None:
-            pass
-        else:
-            assert (isinstance(self._left, int))  # debug
-            left = self._left
-
-        if not self._op:
-            return left
-
-        if isinstance(self._right, Expression):
-            right = self._right.eval(data)
-        elif isinstance(self._right, str):
-            if (not self._right) or self._right == '""':
-                right = ""
-            elif "." in self._right:
-                right = data
-                for part in self._right.split("."):
-                    right = getattr(right, part)
-
-            # value is an arg attribute type, lookup parent for value to evaluate
-            elif self._right == 'arg':
-                right = (getattr(data, self._right)).to_int(None)
+                def func(data=None):
+                    return left(data)
+            self.eval = func
+            return func
+        right, right_value = self._compile_operand(self._right, ('', '""'))
+        if op == '!':
+            if right is None:
+                def func(data=None):
+                    return int(not right_value)
             else:
-                right = getattr(data, self._right)
-        elif isinstance(self._right, type):
-            right = isinstance(data, self._right)
-        elif self._right is None:
-            pass
+                def func(data=None):
+                    return int(not right(data))
+            self.eval = func
+            return func
+        try:
+            opfunc = self._operator_functions[op]
+        except KeyError:
+            def func(data=None):
+                raise NotImplementedError(
+                    "expression syntax error: operator '"
+                    + op + "' not implemented")
+            self.eval = func
+            return func
+        if left is None and right is None:
+            def func(data=None):
+                return opfunc(left_value, right_value)
+        elif left is None:
+            def func(data=None):
+                return opfunc(left_value, right(data))
+        elif right is None:
+            def func(data=None):
+                return opfunc(left(data), right_value)
         else:
-            assert (isinstance(self._right, int))  # debug
-            right = self._right
+            def func(data=None):
+                return opfunc(left(data), right(data))
+        self.eval = func
+        return func
 
-        if self._op == '==':
-            return left == right
-        elif self._op == '!=':
-            return left != right
-        elif self._op == '>=':
-            return left >= right
-        elif self._op == '<=':
-            return left <= right
-        elif self._op == '&&':
-            return left and right
-        elif self._op == '||':
-            return left or right
-        elif self._op == '&':
-            return left & right
-        elif self._op == '|':
-            return left | right
-        elif self._op == '-':
-            return left - right
-        elif self._op == '!':
-            return int(not right)
-        elif self._op == '>':
-            return left > right
-        elif self._op == '<':
-            return left < right
-        elif self._op == '/':
-            return left / right
-        elif self._op == '*':
-            return left * right
-        elif self._op == '+':
-            return left + right
+    @staticmethod
+    def _compile_operand(operand, empty_strings):
+        """Compile an operand into a tuple ``(getter, value)``. The getter
+        is a function which evaluates the operand on the data, or ``None``
+        if the operand is the constant *value*.
+        """
+        if isinstance(operand, Expression):
+            return operand.eval, None
+        elif isinstance(operand, str):
+            if operand in empty_strings:
+                return None, ""
+            elif "." in operand:
+                # attrgetter resolves dotted names one part at a time
+                return operator.attrgetter(operand), None
+            elif operand == 'arg':
+                # value is an arg attribute type, lookup parent for value
+                # to evaluate
+                return (lambda data: data.arg.to_int(None)), None
+            else:
+                return operator.attrgetter(operand), None
+        elif isinstance(operand, type):
+            return (lambda data: isinstance(data, operand)), None
+        elif operand is None:
+            def missing(data):
+                raise ValueError("expression syntax error: missing operand")
+            return missing, None
         else:
-            raise NotImplementedError("expression syntax error: operator '" + self._op + "' not implemented")
+            assert (isinstance(operand, int))  # debug
+            return None, operand
 
     def __str__(self):
         """Reconstruct the expression to a string."""
@@ -400,6 +433,7 @@ class Expression(object):
             self._right.map_(func)
         else:
             self._right = func(self._right)
+        self._compile()
 
 
 if __name__ == "__main__":
@@ -49,13 +49,14 @@ Classes
 import collections
 import logging
 import time  # for timing stuff
-import xml.sax
 from typing import Dict, List, Union
 
 import pyffi
+import pyffi.engines.xml.cache
 import pyffi.object_models
 from pyffi.errors import XMLException
 from pyffi.engines.xml import XmlSaxHandler as OldXmlHandler
+from pyffi.engines.xml import _get_lazy_class, _is_lazy_class
 from pyffi.engines.xml.niftools.expression import Expression
 from pyffi.engines.xml.niftools.version import Version
 from pyffi.engines.xml.niftools.struct_ import StructBase
@@ -128,6 +129,8 @@ class StructAttribute(object):
     is_abstract = False
     """Whether the attribute is abstract or not (read and written)."""
 
+    _lazy_type = False
+
     def __init__(self, cls, attrs):
         """Initialize attribute from the xml attrs dictionary of an
         add tag.
@@ -145,11 +148,16 @@ class StructAttribute(object):
             raise AttributeError("'%s' is missing a type attribute"
                                  % self.displayname)
         if attrs_type_str != "TEMPLATE":
-            try:
-                self.type_ = getattr(cls, attrs_type_str)
-            except AttributeError:
-                # forward declaration, resolved at endDocument
+            if _is_lazy_class(cls, attrs_type_str):
+                # resolved when the struct is created
                 self.type_ = attrs_type_str
+                self._lazy_type = True
+            else:
+                try:
+                    self.type_ = getattr(cls, attrs_type_str)
+                except AttributeError:
+                    # forward declaration, resolved at endDocument
+                    self.type_ = attrs_type_str
         else:
             self.type_ = type(None)  # type determined at runtime
         # optional parameters
@@ -169,15 +177,8 @@ class StructAttribute(object):
         self.is_abstract = (attrs.get("abstract") == "1")
 
         # post-processing
-        if self.default:
-            try:
-                tmp = self.type_()
-                tmp.set_value(self.default)
-                self.default = tmp.get_value()
-                del tmp
-            except Exception:
-                # conversion failed; not a big problem
-                self.default = None
+        if not self._lazy_type:
+            self.convert_default()
         if self.arr1:
             self.arr1 = Expression(self.arr1, cls.name_attribute)
         if self.arr2:
@@ -198,6 +199,19 @@ class StructAttribute(object):
         if self.until:
             self.until = cls.version_number(self.until)
 
+    def convert_default(self):
+        """Convert the default value from the xml string to a value of
+        the attribute type."""
+        if self.default:
+            try:
+                tmp = self.type_()
+                tmp.set_value(self.default)
+                self.default = tmp.get_value()
+                del tmp
+            except Exception:
+                # conversion failed; not a big problem
+                self.default = None
+
 
 class StructAttributeReference(StructAttribute):
     """"""
@@ -245,24 +259,29 @@ class MetaFileFormat(pyffi.object_models.MetaFileFormat):
         # the hierarchy
         xml_file_name = dct.get('xml_file_name')
         if xml_file_name:
-            # set up XML parser
-            parser = xml.sax.make_parser()
-            parser.setContentHandler(XmlSaxHandler(cls, name, bases, dct))
-
-            # open XML file
+            # read XML file
             xml_file = cls.openfile(xml_file_name, cls.xml_file_path)
-
-            # parse the XML file: control is now passed on to XmlSaxHandler
-            # which takes care of the class creation
-            cls.logger.debug("Parsing %s and generating classes."
-                             % xml_file_name)
-            start = time.clock()
             try:
-                parser.parse(xml_file)
+                xml_text = xml_file.read()
             finally:
                 xml_file.close()
+
+            # parse the XML file, or replay it from the cache: control is
+            # now passed on to XmlSaxHandler which takes care of the class
+            # creation
+            cls.logger.debug("Parsing %s and generating classes."
+                             % xml_file_name)
+            start = time.perf_counter()
+            pyffi.engines.xml.cache.parse(
+                xml_text, XmlSaxHandler(cls, name, bases, dct),
+                pyffi.engines.xml.cache.get_cache_dir())
             cls.logger.debug("Parsing finished in %.3f seconds."
-                             % (time.clock() - start))
+                             % (time.perf_counter() - start))
+
+    def __getattr__(cls, name):
+        """Create classes whose creation was deferred, see
+        :attr:`FileFormat.lazy_classes`."""
+        return _get_lazy_class(cls, name)
 
 
 class FileFormat(pyffi.object_models.FileFormat, metaclass=MetaFileFormat):
@@ -286,6 +305,9 @@ class FileFormat(pyffi.object_models.FileFormat, metaclass=MetaFileFormat):
     logger = logging.getLogger("pyffi.engines.xml.niftools")
     #: Activate Debug mode, defaults to false.
     debug: bool = False
+    #: Create classes on first access, see
+    #: :attr:`pyffi.engines.xml.FileFormat.lazy_classes`.
+    lazy_classes: bool = None
 
     # We also keep an ordered list of all classes that have been created.
     # The xml_struct list includes all xml generated struct classes,
@@ -399,7 +421,8 @@ class XmlSaxHandler(OldXmlHandler):
                 # if that base struct has not yet been assigned to a
                 # class, then we have a problem
                 try:
-                    self.class_bases += (getattr(self.cls, class_basename),)
+                    self.class_bases += (
+                        self.get_base_class(class_basename),)
                 except KeyError:
                     raise XMLException(
                         "typo, or forward declaration of struct %s"
@@ -41,6 +41,8 @@
 
 # note: some imports are defined at the end to avoid problems with circularity
 
+import weakref
+
 import pyffi.engines.xml.struct_
 
 
@@ -59,8 +61,8 @@ class StructBase(pyffi.engines.xml.struct_.StructBase):
     instance.
 
     Direct access to the attributes is implemented using a <name>
-    property which invokes the get_attribute and set_attribute
-    functions, as demonstrated below.
+    descriptor, which is generated for each attribute by the metaclass,
+    as demonstrated below.
 
     See the pyffi.XmlHandler class for a more advanced example.
 
@@ -128,6 +130,9 @@ class StructBase(pyffi.engines.xml.struct_.StructBase):
     <BLANKLINE>
     """
 
+    # attributes with duplicate names are all kept
+    _skip_duplicates = False
+
     # initialize all attributes
     def __init__(self, template=None, argument=None, parent=None):
         """The constructor takes a template: any attribute whose type,
@@ -144,10 +149,14 @@ class StructBase(pyffi.engines.xml.struct_.StructBase):
         # used to track names of attributes that have already been added
         # is faster than self.__dict__.has_key(...)
         names = set()
+        slot_names = self._slot_names
         # initialize argument
         self.arg = argument
         # save parent (note: disabled for performance)
         # self._parent = weakref.ref(parent) if parent else None
+        # but keep the block which contains this instance, see get_digest
+        self._owner = weakref.ref(self) if parent is None \
+            else getattr(parent, "_owner", None)
         # initialize item list
         # this list is used for instance by qskope to display the structure
         # in a tree view
@@ -176,6 +185,15 @@ class StructBase(pyffi.engines.xml.struct_.StructBase):
                     parent=self)
                 if attr.default != None:
                     attr_instance.set_value(attr.default)
+            elif (self.use_columnar_arrays
+                  and attr.name in self._columnar_attrs
+                  and ColumnArray.is_supported(rt_type)):
+                attr_instance = ColumnArray(
+                    element_type=rt_type,
+                    element_type_template=rt_template,
+                    element_type_argument=rt_arg,
+                    count1=attr.arr1, count2=attr.arr2,
+                    parent=self)
             elif attr.arr2 == None:
                 attr_instance = Array(
                     element_type=rt_type,
@@ -192,7 +210,7 @@ class StructBase(pyffi.engines.xml.struct_.StructBase):
                     parent=self)
 
             # assign attribute value
-            setattr(self, "_%s_value_" % attr.name, attr_instance)
+            setattr(self, slot_names[attr.name], attr_instance)
 
             # add instance to item list
             self._items.append(attr_instance)
@@ -226,10 +244,9 @@ class StructBase(pyffi.engines.xml.struct_.StructBase):
         text = '%s instance at 0x%08X\n' % (self.__class__, id(self))
         # used to track names of attributes that have already been added
         # is faster than self.__dict__.has_key(...)
-        for attr in self._get_filtered_attribute_list():
+        for attr, slot, arg_name in self._get_filtered_plan():
             # append string
-            attr_str_lines = str(
-                getattr(self, "_%s_value_" % attr.name)).splitlines()
+            attr_str_lines = str(getattr(self, slot)).splitlines()
             if len(attr_str_lines) > 1:
                 text += '* %s :\n' % attr.name
                 for attr_str in attr_str_lines:
@@ -237,12 +254,11 @@ class StructBase(pyffi.engines.xml.struct_.StructBase):
             elif attr_str_lines:
                 text += '* %s : %s\n' % (attr.name, attr_str_lines[0])
             else:
-                # print(getattr(self, "_%s_value_" % attr.name))
                 text += '* %s : <None>\n' % attr.name
         return text
 
     def _log_struct(self, stream, attr):
-        val = getattr(self, "_%s_value_" % attr.name)  # debug
+        val = getattr(self, self._slot_names[attr.name])  # debug
         if not isinstance(val, BasicBase):  # debug
             self.logger.debug(val.__class__.__name__ + ":" + attr.name)
         else:
@@ -258,63 +274,28 @@ class StructBase(pyffi.engines.xml.struct_.StructBase):
                                                                              str(out), attr.type_, hex_ver,
                                                                              offset))  # debug
 
-    def read(self, stream, data):
-        """Read structure from stream."""
-        # read all attributes
-        for attr in self._get_filtered_attribute_list(data):
-            # skip abstract attributes
-            if attr.is_abstract:
-                continue
-            # get attribute argument (can only be done at runtime)
-            rt_arg = attr.arg if isinstance(attr.arg, (int, type(None))) \
-                else getattr(self, attr.arg)
-            # read the attribute
-            attr_value = getattr(self, "_%s_value_" % attr.name)
-            attr_value.arg = rt_arg
-            # if hasattr(attr, "type_"):
-            #     attr_value._elementType = attr.type_
-            self._log_struct(stream, attr)
-            attr_value.read(stream, data)
-
-    def write(self, stream, data):
-        """Write structure to stream."""
-        # write all attributes
-        for attr in self._get_filtered_attribute_list(data):
-            # skip abstract attributes
-            if attr.is_abstract:
-                continue
-            # get attribute argument (can only be done at runtime)
-            rt_arg = attr.arg if isinstance(attr.arg, (int, type(None))) \
-                else getattr(self, attr.arg)
-            # write the attribute
-            attr_value = getattr(self, "_%s_value_" % attr.name)
-            attr_value.arg = rt_arg
-            getattr(self, "_%s_value_" % attr.name).write(stream, data)
-            self._log_struct(stream, attr)
-
     def fix_links(self, data):
         """Fix links in the structure."""
         # parse arguments
         # fix links in all attributes
-        for attr in self._get_filtered_attribute_list(data):
+        for attr, slot, arg_name in self._get_filtered_plan(data):
             # check if there are any links at all, commonly this speeds things up considerably
             if not attr.type_._has_links:
                 continue
             self.logger.debug("fixlinks %s" % attr.name)
             # fix the links in the attribute
-            getattr(self, "_%s_value_" % attr.name).fix_links(data)
+            getattr(self, slot).fix_links(data)
 
     def get_links(self, data=None):
         """Get list of all links in the structure."""
         # get all links
         links = []
-        for attr in self._get_filtered_attribute_list(data):
+        for attr, slot, arg_name in self._get_filtered_plan(data):
             # check if there are any links at all, this speeds things up considerably
             if not attr.type_._has_links:
                 continue
             # extend list of links
-            links.extend(
-                getattr(self, "_" + attr.name + "_value_").get_links(data))
+            links.extend(getattr(self, slot).get_links(data))
         # return the list of all links in all attributes
         return links
 
@@ -322,13 +303,12 @@ class StructBase(pyffi.engines.xml.struct_.StructBase):
         """Get list of all strings in the structure."""
         # get all strings
         strings = []
-        for attr in self._get_filtered_attribute_list(data):
+        for attr, slot, arg_name in self._get_filtered_plan(data):
             # check if there are any strings at all, this speeds things up considerably
             if (not attr.type_ is type(None)) and (not attr.type_._has_strings):
                 continue
             # extend list of strings
-            strings.extend(
-                getattr(self, "_%s_value_" % attr.name).get_strings(data))
+            strings.extend(getattr(self, slot).get_strings(data))
         # return the list of all strings in all attributes
         return strings
 
@@ -339,45 +319,32 @@ class StructBase(pyffi.engines.xml.struct_.StructBase):
         get_links, as get_links could result in infinite recursion."""
         # get all refs
         refs = []
-        for attr in self._get_filtered_attribute_list(data):
+        for attr, slot, arg_name in self._get_filtered_plan(data):
             # check if there are any links at all
             # (this speeds things up considerably)
             if (not attr.type_ is type(None)) and (not attr.type_._has_links):
                 continue
             # extend list of refs
-            refs.extend(
-                getattr(self, "_%s_value_" % attr.name).get_refs(data))
+            refs.extend(getattr(self, slot).get_refs(data))
         # return the list of all refs in all attributes
         return refs
 
-    def get_size(self, data=None):
-        """Calculate the structure size in bytes."""
-        # calculate size
-        size = 0
-        for attr in self._get_filtered_attribute_list(data):
-            # skip abstract attributes
-            if attr.is_abstract:
-                continue
-            size += getattr(self, "_%s_value_" % attr.name).get_size(data)
-        return size
-
     def get_hash(self, data=None):
         """Calculate a hash for the structure, as a tuple."""
         # calculate hash
         hsh = []
-        for attr in self._get_filtered_attribute_list(data):
-            hsh.append(
-                getattr(self, "_%s_value_" % attr.name).get_hash(data))
+        for attr, slot, arg_name in self._get_filtered_plan(data):
+            hsh.append(getattr(self, slot).get_hash(data))
         return tuple(hsh)
 
     def replace_global_node(self, oldbranch, newbranch, **kwargs):
-        for attr in self._get_filtered_attribute_list():
+        for attr, slot, arg_name in self._get_filtered_plan():
             # check if there are any links at all
             # (this speeds things up considerably)
             if not attr.type_._has_links:
                 continue
-            getattr(self, "_%s_value_" % attr.name).replace_global_node(
-                oldbranch, newbranch, **kwargs)
+            getattr(self, slot).replace_global_node(oldbranch, newbranch,
+                                                    **kwargs)
 
     @classmethod
     def _get_attribute_list(cls):
@@ -410,106 +377,19 @@ class StructBase(pyffi.engines.xml.struct_.StructBase):
                 names.append(attr.name)
         return names
 
-    def _get_filtered_attribute_list(self, data=None):
-        """Generator for listing all 'active' attributes, that is,
-        attributes whose condition evaluates ``True``, whose version
-        interval contains C{version}, and whose user version is
-        C{user_version}. ``None`` for C{version} or C{user_version} means
-        that these checks are ignored. Duplicate names are skipped as
-        well.
-
-        Note: version and user_version arguments are deprecated, use
-        the data argument instead.
+    @staticmethod
+    def _is_version_active(attr, version, user_version):
+        """Check whether the attribute is present for the given version,
+        using the since and until versions of the attribute. ``None`` for
+        C{version} means that the check is ignored.
         """
-        if data is not None:
-            version = data.version
-            user_version = data.user_version
-        else:
-            version = None
-            user_version = None
-        names = set()
-        for attr in self._attribute_list:
-            # print(attr.name, version, attr.ver1, attr.ver2) # debug
-
-            # check version
-            if version is not None:
-                if attr.ver1 is not None and version < attr.ver1:
-                    continue
-                if attr.ver2 is not None and version > attr.ver2:
-                    continue
-            # print("version check passed") # debug
-
-            # check user version
-            if (attr.userver is not None and user_version is not None
-                    and user_version != attr.userver):
-                continue
-            # print("user version check passed") # debug
-
-            # check conditions
-            if attr.cond is not None and not attr.cond.eval(self):
-                continue
-
-            if (version is not None and user_version is not None
-                    and attr.vercond is not None):
-                if not attr.vercond.eval(data):
-                    continue
-
-            # print("condition passed") # debug
-
-            # skip dupiclate names
-
-            # if attr.name in names:
-            #     continue
-            # print("duplicate check passed") # debug
-
-            names.add(attr.name)
-            # passed all tests
-            # so yield the attribute
-            yield attr
-
-    def get_attribute(self, name):
-        """Get a (non-basic) attribute."""
-        return getattr(self, "_" + name + "_value_")
-
-    # important note: to apply partial(set_attribute, name = 'xyz') the
-    # name argument must be last
-    def set_attribute(self, value, name):
-        """Set a (non-basic) attribute."""
-        # check class
-        attr = getattr(self, "_" + name + "_value_")
-        if attr.__class__ is not value.__class__:
-            raise TypeError("expected %s but got %s"
-                            % (attr.__class__.__name__,
-                               value.__class__.__name__))
-        # set it
-        setattr(self, "_" + name + "_value_", value)
-
-    def get_basic_attribute(self, name):
-        """Get a basic attribute."""
-        return getattr(self, "_" + name + "_value_").get_value()
-
-    # important note: to apply partial(set_attribute, name = 'xyz') the
-    # name argument must be last
-    def set_basic_attribute(self, value, name):
-        """Set the value of a basic attribute."""
-        getattr(self, "_" + name + "_value_").set_value(value)
-
-    def get_template_attribute(self, name):
-        """Get a template attribute."""
-        try:
-            return self.get_basic_attribute(name)
-        except AttributeError:
-            return self.get_attribute(name)
-
-    # important note: to apply partial(set_attribute, name = 'xyz') the
-    # name argument must be last
-    def set_template_attribute(self, value, name):
-        """Set the value of a template attribute."""
-        try:
-            self.set_basic_attribute(value, name)
-        except AttributeError:
-            self.set_attribute(value, name)
+        if version is not None:
+            if attr.since is not None and version < attr.since:
+                return False
+            if attr.until is not None and version > attr.until:
+                return False
+        return True
 
 
 from pyffi.types.basic import BasicBase
-from pyffi.engines.xml.array import Array
+from pyffi.engines.xml.array import Array, ColumnArray
@@ -0,0 +1,387 @@
+"""Block level patches of the data of xml based file formats.
+
+A patch describes how to turn the data as read from a file into the data
+as changed by, for instance, a spell. Every block of the changed data is
+either copied from a block of the original data with the same digest
+(see :meth:`pyffi.engines.xml.struct_.StructBase.get_digest`), in which
+case the patch only stores the index and the digest of the original
+block and where its links point to, or it is stored in full. Of the
+other nodes of the data, such as the header, the patch only stores
+those parts which changed. So, unlike a binary diff, a patch remains
+small when blocks are reordered, or when the blocks around a change
+shift.
+
+To create a patch, take a :class:`PatchBase` of the data before changing
+it, and call :func:`dumps` afterwards. To apply a patch, read the
+original file, and call :func:`apply`. Patches are stored in a simple
+tagged binary encoding, so applying a patch from an untrusted source
+cannot execute code.
+"""
+
+# ------------------------------------------------------------------------
+#  ***** BEGIN LICENSE BLOCK *****
+#
+#  Copyright © 2007-2019, Python File Format Interface.
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#
+#     * Redistributions in binary form must reproduce the above
+#       copyright notice, this list of conditions and the following
+#       disclaimer in the documentation and/or other materials provided
+#       with the distribution.
+#
+#     * Neither the name of the Python File Format Interface
+#       project nor the names of its contributors may be used to endorse
+#       or promote products derived from this software without specific
+#       prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+#  LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+#
+#  ***** END LICENSE BLOCK *****
+# ------------------------------------------------------------------------
+
+# note: some imports are defined at the end to avoid problems with circularity
+import struct
+import zlib
+
+# increase whenever the patch layout changes
+PATCH_VERSION = 1
+
+_MAGIC = b"PyFFI patch\x00"
+_DOUBLE = struct.Struct("<d")
+
+
+class PatchBase(object):
+    """The state of the data as read, against which :func:`dumps` makes
+    a patch. Take it before changing the data.
+
+    :param data: The data, as read from the file to be patched.
+    :type data: :class:`pyffi.object_models.FileFormat.Data`
+    """
+
+    def __init__(self, data):
+        nodes, lists, values = _get_attributes(data)
+        blocks = _get_base_blocks(lists)
+        self.block_digests = [block.get_digest(data) for block in blocks]
+        # payloads of the nodes of the data, to find out which parts of
+        # them change; nodes with links are always stored in full
+        self.node_payloads = dict(
+            (name, _dump_node(node, data, _BlockTable()))
+            for name, node in nodes if not _has_links(node))
+
+
+def _get_base_blocks(lists):
+    """Blocks in the lists of blocks of the data, in order of first
+    appearance. Patches refer to the blocks of the original data by their
+    index in this list."""
+    table = _BlockTable()
+    for name, blocks in lists:
+        for block in blocks:
+            table.get_index(block)
+    return table.blocks
+
+
+def _has_links(node):
+    """Whether the node can contain links, see :func:`_is_binary`."""
+    if isinstance(node, BasicBase):
+        return node._has_links
+    return not _is_binary(node)
+
+
+def _iter_links(node, data):
+    """Yield the basic types which link to a block in a structure or
+    array, in order."""
+    if isinstance(node, BasicBase):
+        if node._has_links:
+            yield node
+    elif not _has_links(node):
+        return
+    elif isinstance(node, StructBase):
+        for attr, slot, arg_name in node._get_filtered_plan(data):
+            if attr.is_abstract:
+                continue
+            yield from _iter_links(getattr(node, slot), data)
+    elif isinstance(node, Array):
+        for elem in list.__iter__(node):
+            if node._count2 is None:
+                yield from _iter_links(elem, data)
+            else:
+                for sub_elem in list.__iter__(elem):
+                    yield from _iter_links(sub_elem, data)
+
+
+def _encode_uint(out, value):
+    """Append an unsigned integer, 7 bits per byte."""
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _decode_uint(buf, pos):
+    value = 0
+    shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _encode(out, obj):
+    """Append the encoding of ``obj``, which consists of lists, tuples,
+    strings, bytes, numbers, booleans, and ``None``, to the bytearray
+    ``out``."""
+    if obj is None:
+        out += b"N"
+    elif obj is True:
+        out += b"T"
+    elif obj is False:
+        out += b"F"
+    elif isinstance(obj, int):
+        out += b"i"
+        _encode_uint(out, obj << 1 if obj >= 0 else (-obj << 1) - 1)
+    elif isinstance(obj, float):
+        out += b"d"
+        out += _DOUBLE.pack(obj)
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        obj = bytes(obj)
+        out += b"b"
+        _encode_uint(out, len(obj))
+        out += obj
+    elif isinstance(obj, str):
+        obj = obj.encode("utf-8")
+        out += b"s"
+        _encode_uint(out, len(obj))
+        out += obj
+    elif isinstance(obj, (list, tuple)):
+        out += b"l"
+        _encode_uint(out, len(obj))
+        for item in obj:
+            _encode(out, item)
+    else:
+        raise TypeError("cannot encode %s in a patch"
+                        % obj.__class__.__name__)
+
+
+def _decode(buf, pos):
+    """Decode the object at position ``pos`` of ``buf``, and return it,
+    along with the position that follows it."""
+    tag = buf[pos:pos + 1]
+    pos += 1
+    if tag == b"N":
+        return None, pos
+    elif tag == b"T":
+        return True, pos
+    elif tag == b"F":
+        return False, pos
+    elif tag == b"i":
+        value, pos = _decode_uint(buf, pos)
+        return (value >> 1 if not value & 1 else -((value + 1) >> 1)), pos
+    elif tag == b"d":
+        return _DOUBLE.unpack_from(buf, pos)[0], pos + _DOUBLE.size
+    elif tag in (b"b", b"s"):
+        size, pos = _decode_uint(buf, pos)
+        if pos + size > len(buf):
+            raise ValueError("unexpected end of patch")
+        value = bytes(buf[pos:pos + size])
+        return (value if tag == b"b" else value.decode("utf-8")), pos + size
+    elif tag == b"l":
+        size, pos = _decode_uint(buf, pos)
+        items = []
+        for i in range(size):
+            item, pos = _decode(buf, pos)
+            items.append(item)
+        return items, pos
+    raise ValueError("invalid patch")
+
+
+def dumps(data, base):
+    """Make a patch which turns the data described by ``base`` into
+    ``data``.
+
+    :param data: The changed data.
+    :type data: :class:`pyffi.object_models.FileFormat.Data`
+    :param base: The state of the data before it was changed.
+    :type base: :class:`PatchBase`
+    :return: The patch.
+    :rtype: ``bytes``
+    """
+    data_class = data.__class__
+    format_class = _get_format_class(
+        data_class.__module__, data_class.__qualname__)
+    nodes, lists, values = _get_attributes(data)
+    table = _BlockTable()
+    lists = [[name, [table.get_index(block) for block in blocks]]
+             for name, blocks in lists]
+    node_deltas = []  # [name, is_delta, payload or (index, payload) list]
+    for name, node in nodes:
+        payload = _dump_node(node, data, table)
+        base_payload = base.node_payloads.get(name)
+        if payload == base_payload:
+            continue
+        if (isinstance(payload, list) and isinstance(base_payload, list)
+                and len(payload) == len(base_payload)):
+            node_deltas.append([name, True, [
+                [index, item] for index, (item, base_item)
+                in enumerate(zip(payload, base_payload))
+                if item != base_item]])
+        else:
+            node_deltas.append([name, False, payload])
+    # original blocks by digest, each can be copied only once
+    base_indices = {}
+    for index, digest in enumerate(base.block_digests):
+        base_indices.setdefault(digest, []).append(index)
+    # entries are [index, digest, link indices] for copied blocks, and
+    # [block type, payload] for other blocks; storing a block can add
+    # more blocks to the table
+    entries = []
+    while len(entries) < len(table.blocks):
+        block = table.blocks[len(entries)]
+        digest = block.get_digest(data)
+        candidates = base_indices.get(digest)
+        if candidates:
+            entries.append([candidates.pop(0), digest, [
+                table.get_index(link.get_value())
+                for link in _iter_links(block, data)]])
+            continue
+        block_type = block.__class__.__name__
+        if getattr(format_class, block_type, None) is not block.__class__:
+            raise ValueError("block type %s is not defined by %s"
+                             % (block_type, format_class.__name__))
+        entries.append([block_type, _dump_node(block, data, table)])
+    out = bytearray()
+    _encode(out, [PATCH_VERSION, len(base.block_digests),
+                  [list(item) for item in values],
+                  node_deltas, entries, lists])
+    return _MAGIC + zlib.compress(bytes(out))
+
+
+def apply(data, patch):
+    """Apply a patch made by :func:`dumps`.
+
+    :param data: The data, as read from the original file. It is changed
+        in place.
+    :type data: :class:`pyffi.object_models.FileFormat.Data`
+    :param patch: The patch.
+    :type patch: ``bytes``
+    :raise ``ValueError``: If the patch is invalid, or was not made for
+        this data.
+    """
+    if not patch.startswith(_MAGIC):
+        raise ValueError("not a patch")
+    try:
+        state, pos = _decode(zlib.decompress(patch[len(_MAGIC):]), 0)
+    except (IndexError, RecursionError, struct.error, UnicodeDecodeError,
+            zlib.error):
+        raise ValueError("invalid patch")
+    if not isinstance(state, list) or not state \
+            or state[0] != PATCH_VERSION:
+        raise ValueError("unsupported patch version")
+    try:
+        _apply(data, *state[1:])
+    except (IndexError, KeyError, TypeError, RecursionError):
+        # well formed encoding, but the content does not make sense
+        raise ValueError("invalid patch")
+
+
+def _get_block_type(format_class, block_type):
+    """The class of the blocks of type ``block_type`` in a patch."""
+    block_class = getattr(format_class, block_type, None) \
+        if isinstance(block_type, str) else None
+    if not (isinstance(block_class, type)
+            and issubclass(block_class, StructBase)):
+        raise ValueError("%r is not a block type of %s"
+                         % (block_type, format_class.__name__))
+    return block_class
+
+
+def _apply(data, num_base_blocks, values, node_deltas, entries, lists):
+    """Apply the decoded state of a patch, see :func:`apply`."""
+    data_class = data.__class__
+    format_class = _get_format_class(
+        data_class.__module__, data_class.__qualname__)
+    nodes, base_lists, base_values = _get_attributes(data)
+    nodes = dict(nodes)
+    # a patch can only set the attributes that a snapshot would restore
+    names = set(nodes)
+    names.update(name for name, value in base_values)
+    names.update(name for name, blocks in base_lists)
+    for name, value in values + lists:
+        if name not in names:
+            raise ValueError("patch sets unknown attribute %r" % name)
+    base_blocks = _get_base_blocks(base_lists)
+    if len(base_blocks) != num_base_blocks:
+        raise ValueError("patch expects %i blocks, but data has %i"
+                         % (num_base_blocks, len(base_blocks)))
+    # check the data before changing anything, as changes affect digests
+    for entry in entries:
+        if isinstance(entry[0], int):
+            index, digest, links = entry
+            if not 0 <= index < num_base_blocks \
+                    or base_blocks[index].get_digest(data) != digest:
+                raise ValueError("patch does not match block %i" % index)
+    payloads = {}
+    for name, is_delta, delta in node_deltas:
+        if is_delta:
+            payload = _dump_node(nodes[name], data, _BlockTable())
+            for index, item in delta:
+                payload[index] = item
+        else:
+            payload = delta
+        payloads[name] = payload
+    # check the block types before changing anything
+    block_types = iter([_get_block_type(format_class, entry[0])
+                        for entry in entries
+                        if not isinstance(entry[0], int)])
+    # now change the data
+    for name, value in values:
+        setattr(data, name, value)
+    blocks = [base_blocks[entry[0]] if isinstance(entry[0], int)
+              else next(block_types)()
+              for entry in entries]
+    # basic nodes go first, as they hold the version
+    for name in sorted(payloads, key=lambda name: not isinstance(
+            nodes[name], BasicBase)):
+        _load_node(nodes[name], payloads[name], data, blocks)
+        if not isinstance(nodes[name], BasicBase):
+            _invalidate_digest(nodes[name])
+    for block, entry in zip(blocks, entries):
+        if isinstance(entry[0], int):
+            link_nodes = list(_iter_links(block, data))
+            if len(link_nodes) != len(entry[2]):
+                raise ValueError("patch does not match block %i" % entry[0])
+            for link_node, index in zip(link_nodes, entry[2]):
+                link_node.set_value(None if index is None else blocks[index])
+            _invalidate_digest(block)
+        else:
+            _load_node(block, entry[1], data, blocks)
+    for name, indices in lists:
+        setattr(data, name, [blocks[index] for index in indices])
+
+
+from pyffi.types.basic import BasicBase
+from pyffi.engines.xml.array import Array
+from pyffi.engines.xml.snapshot import (
+    _BlockTable, _dump_node, _get_attributes, _get_format_class, _load_node)
+from pyffi.engines.xml.struct_ import (
+    StructBase, _invalidate_digest, _is_binary)
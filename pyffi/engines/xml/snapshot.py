@@ -0,0 +1,298 @@
+"""Compact snapshots of the data of xml based file formats, for sending
+parsed data between processes, or caching it on disk, without pickling
+the object tree itself.
+
+A snapshot stores a flat table of blocks, that is, of all structures
+which are listed in the data (such as the blocks and roots of a nif) or
+which are the target of a link. Links are stored as indices into this
+table. Structures and arrays without links and strings are stored in
+their binary form, so arrays of numbers are stored as packed bytes;
+other structures are stored as lists of the snapshots of their active
+attributes. Restoring a snapshot creates all blocks up front, so links
+are resolved in the same pass, and neither the header nor the block
+sizes need to be parsed again.
+
+Use :func:`dumps` to take a snapshot, and :func:`loads` to restore it.
+To receive snapshots from :meth:`pyffi.object_models.FileFormat.read_many`,
+pass :func:`dumps` as *summary* function.
+"""
+
+# ------------------------------------------------------------------------
+#  ***** BEGIN LICENSE BLOCK *****
+#
+#  Copyright © 2007-2019, Python File Format Interface.
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#
+#     * Redistributions in binary form must reproduce the above
+#       copyright notice, this list of conditions and the following
+#       disclaimer in the documentation and/or other materials provided
+#       with the distribution.
+#
+#     * Neither the name of the Python File Format Interface
+#       project nor the names of its contributors may be used to endorse
+#       or promote products derived from this software without specific
+#       prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+#  LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+#
+#  ***** END LICENSE BLOCK *****
+# ------------------------------------------------------------------------
+
+# note: some imports are defined at the end to avoid problems with circularity
+import importlib
+import io
+import pickle
+
+# increase whenever the snapshot layout changes
+SNAPSHOT_VERSION = 1
+
+
+class _BlockTable(object):
+    """Assigns an index to every block of a snapshot, in order of first
+    use."""
+
+    def __init__(self):
+        self.blocks = []
+        self._indices = {}  # maps id of block to its index
+
+    def get_index(self, block):
+        if block is None:
+            return None
+        try:
+            return self._indices[id(block)]
+        except KeyError:
+            index = self._indices[id(block)] = len(self.blocks)
+            self.blocks.append(block)
+            return index
+
+
+def _dump_value(value):
+    """Get the snapshot of the value of a basic type without links: views
+    of a MemoryReader buffer, also in lists, are copied to bytes, as they
+    cannot be pickled.
+    """
+    if isinstance(value, (bytearray, memoryview)):
+        return bytes(value)
+    if isinstance(value, list):
+        return [_dump_value(elem) for elem in value]
+    return value
+
+
+def _dump_node(node, data, table):
+    """Get the snapshot of a basic type, structure, or array."""
+    if isinstance(node, BasicBase):
+        if node._has_links:
+            return table.get_index(node.get_value())
+        return _dump_value(node._value)
+    if _is_binary(node):
+        stream = io.BytesIO()
+        node.write(stream, data)
+        return stream.getvalue()
+    if isinstance(node, StructBase):
+        payload = []
+        for attr, slot, arg_name in node._get_filtered_plan(data):
+            if attr.is_abstract:
+                continue
+            attr_value = getattr(node, slot)
+            attr_value.arg = attr.arg if arg_name is None \
+                else getattr(node, arg_name)
+            payload.append(_dump_node(attr_value, data, table))
+        return payload
+    if isinstance(node, Array):
+        node._elementTypeArgument = node.arg
+        if node._count2 is None:
+            return [_dump_node(elem, data, table)
+                    for elem in list.__iter__(node)]
+        return [[_dump_node(elem, data, table)
+                 for elem in list.__iter__(elemlist)]
+                for elemlist in list.__iter__(node)]
+    raise TypeError("cannot take a snapshot of %s"
+                    % node.__class__.__name__)
+
+
+def _load_node(node, payload, data, blocks):
+    """Restore a basic type, structure, or array from its snapshot."""
+    if isinstance(node, BasicBase):
+        if node._has_links:
+            node.set_value(None if payload is None else blocks[payload])
+        else:
+            node._value = payload
+    elif _is_binary(node):
+        node.read(io.BytesIO(payload), data)
+    elif isinstance(node, StructBase):
+        payload = iter(payload)
+        for attr, slot, arg_name in node._get_filtered_plan(data):
+            if attr.is_abstract:
+                continue
+            attr_value = getattr(node, slot)
+            attr_value.arg = attr.arg if arg_name is None \
+                else getattr(node, arg_name)
+            _load_node(attr_value, next(payload), data, blocks)
+    elif isinstance(node, Array):
+        node._elementTypeArgument = node.arg
+        del node[0:node.__len__()]
+        if node._count2 is None:
+            _load_elements(node, node, payload, data, blocks)
+        else:
+            for row in payload:
+                elemlist = _ListWrap(node._elementType, parent=node)
+                _load_elements(node, elemlist, row, data, blocks)
+                node.append(elemlist)
+    else:
+        raise TypeError("cannot restore a snapshot of %s"
+                        % node.__class__.__name__)
+
+
+def _load_elements(array, elemlist, payload, data, blocks):
+    """Restore the elements of an array, or of a row of an array."""
+    for elem_payload in payload:
+        elem = array._elementType(
+            template=array._elementTypeTemplate,
+            argument=array._elementTypeArgument,
+            parent=elemlist)
+        _load_node(elem, elem_payload, data, blocks)
+        elemlist.append(elem)
+
+
+def _is_node(value):
+    return isinstance(value, (BasicBase, StructBase, Array))
+
+
+def _get_block_list(value):
+    """Return the blocks in ``value`` as a list, if ``value`` is a non-empty
+    sequence of structures, or ``None`` otherwise."""
+    if isinstance(value, (str, bytes, dict)) or _is_node(value) \
+            or not hasattr(value, "__len__") or not len(value):
+        return None
+    try:
+        items = list(value)
+    except TypeError:
+        return None
+    if all(isinstance(item, StructBase) for item in items):
+        return items
+    return None
+
+
+def _get_attributes(data):
+    """Sort the attributes of the data into nodes, lists of blocks, and
+    other values, each as a list of ``(name, value)`` pairs. Caches, such
+    as the block index and the string table, are left out.
+    """
+    nodes = []
+    lists = []
+    values = []
+    for name, value in vars(data).items():
+        if _is_node(value):
+            nodes.append((name, value))
+        elif name.startswith("_") and name != "_byte_order":
+            continue
+        else:
+            blocks = _get_block_list(value)
+            if blocks is not None:
+                lists.append((name, blocks))
+            else:
+                values.append((name, value))
+    return nodes, lists, values
+
+
+def _get_format_class(module_name, qualname):
+    """Find the format class of the data class with the given name."""
+    format_class = importlib.import_module(module_name)
+    for part in qualname.split(".")[:-1]:
+        format_class = getattr(format_class, part)
+    return format_class
+
+
+def dumps(data):
+    """Take a snapshot of the data.
+
+    :param data: The data, which must have been read in full, or read
+        lazily from a stream that is still open.
+    :type data: :class:`pyffi.object_models.FileFormat.Data`
+    :return: The snapshot.
+    :rtype: ``bytes``
+    """
+    data_class = data.__class__
+    format_class = _get_format_class(
+        data_class.__module__, data_class.__qualname__)
+    table = _BlockTable()
+    nodes, lists, values = _get_attributes(data)
+    lists = [(name, [table.get_index(block) for block in blocks])
+             for name, blocks in lists]
+    # the data nodes hold the version, so they are dumped first
+    nodes = [(name, node.__class__.__name__, _dump_node(node, data, table))
+             for name, node in nodes]
+    # dumping a block can add more blocks to the table
+    block_payloads = []
+    while len(block_payloads) < len(table.blocks):
+        block = table.blocks[len(block_payloads)]
+        block_payloads.append(_dump_node(block, data, table))
+    block_types = [block.__class__.__name__ for block in table.blocks]
+    for block, block_type in zip(table.blocks, block_types):
+        if getattr(format_class, block_type, None) is not block.__class__:
+            raise ValueError("block type %s is not defined by %s"
+                             % (block_type, format_class.__name__))
+    return pickle.dumps(
+        (SNAPSHOT_VERSION, data_class.__module__, data_class.__qualname__,
+         values, nodes, block_types, block_payloads, lists),
+        pickle.HIGHEST_PROTOCOL)
+
+
+def loads(snapshot):
+    """Restore data from a snapshot taken with :func:`dumps`.
+
+    :param snapshot: The snapshot.
+    :type snapshot: ``bytes``
+    :return: The data.
+    :rtype: :class:`pyffi.object_models.FileFormat.Data`
+    """
+    state = pickle.loads(snapshot)
+    if state[0] != SNAPSHOT_VERSION:
+        raise ValueError("unsupported snapshot version %i" % state[0])
+    (module_name, qualname, values, nodes, block_types, block_payloads,
+     lists) = state[1:]
+    format_class = _get_format_class(module_name, qualname)
+    data = getattr(format_class, qualname.split(".")[-1])()
+    for name, value in values:
+        setattr(data, name, value)
+    # restore the nodes of the data first, as they hold the version;
+    # basic nodes go before structures, whose layout depends on them
+    nodes.sort(key=lambda node: not isinstance(
+        getattr(data, node[0], None), BasicBase))
+    for name, class_name, payload in nodes:
+        node = getattr(data, name, None)
+        if node is None or node.__class__.__name__ != class_name:
+            node = getattr(format_class, class_name)()
+            setattr(data, name, node)
+        _load_node(node, payload, data, None)
+    # create all blocks, so links can be resolved while restoring them
+    blocks = [getattr(format_class, block_type)()
+              for block_type in block_types]
+    for block, payload in zip(blocks, block_payloads):
+        _load_node(block, payload, data, blocks)
+    for name, indices in lists:
+        setattr(data, name, [blocks[index] for index in indices])
+    return data
+
+
+from pyffi.types.basic import BasicBase
+from pyffi.engines.xml.array import Array, _ListWrap
+from pyffi.engines.xml.struct_ import StructBase, _is_binary
@@ -40,19 +40,265 @@
 # ------------------------------------------------------------------------
 
 # note: some imports are defined at the end to avoid problems with circularity
+import hashlib
+import io
 import logging
-from functools import partial
+import weakref
 
 import pyffi.types.common
 from pyffi.utils.graph import GlobalNode, EdgeFilter
 
 
+def _get_slot_name(name):
+    """Name of the instance variable which stores the value of the
+    attribute called C{name}.
+    """
+    return "_%s_value_" % name
+
+
+class _AttributeDescriptor(object):
+    """Gives read-only access to the value of a struct attribute. Used for
+    arrays and for forward declared types. The name of the instance
+    variable that holds the value is resolved once, when the descriptor is
+    generated, see :func:`_make_attribute_descriptor`.
+    """
+
+    def __init__(self, name, doc=None):
+        self.name = name
+        self.slot = _get_slot_name(name)
+        self.__doc__ = doc
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return getattr(instance, self.slot)
+
+    def __set__(self, instance, value):
+        raise AttributeError("can't set attribute '%s'" % self.name)
+
+
+class _StructAttributeDescriptor(_AttributeDescriptor):
+    """Gets and sets a struct attribute. The new value must be of the same
+    class as the old one.
+    """
+
+    def __set__(self, instance, value):
+        old_value = getattr(instance, self.slot)
+        if old_value.__class__ is not value.__class__:
+            raise TypeError("expected %s but got %s"
+                            % (old_value.__class__.__name__,
+                               value.__class__.__name__))
+        _set_owner(value, instance._owner)
+        setattr(instance, self.slot, value)
+        _invalidate_digest(instance)
+
+
+class _BasicAttributeDescriptor(_AttributeDescriptor):
+    """Gets and sets the value of a basic attribute."""
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return getattr(instance, self.slot).get_value()
+
+    def __set__(self, instance, value):
+        getattr(instance, self.slot).set_value(value)
+        _invalidate_digest(instance)
+
+
+class _TemplateAttributeDescriptor(_AttributeDescriptor):
+    """Gets and sets a template attribute, which is basic or not depending
+    on the template type of the instance.
+    """
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = getattr(instance, self.slot)
+        try:
+            return value.get_value()
+        except AttributeError:
+            return value
+
+    def __set__(self, instance, value):
+        try:
+            getattr(instance, self.slot).set_value(value)
+        except AttributeError:
+            _StructAttributeDescriptor.__set__(self, instance, value)
+        else:
+            _invalidate_digest(instance)
+
+
+def _invalidate_digest(node):
+    """Clear the cached digest of the block which contains the structure,
+    array, or bitstruct C{node}, after C{node} was changed.
+    """
+    owner = node._owner
+    if owner is not None:
+        block = owner()
+        if block is not None:
+            block._digest = None
+
+
+def _set_owner(node, owner):
+    """Move the structure, array, or bitstruct C{node}, and everything in
+    it, to the block with weak reference C{owner}, so changes to it
+    invalidate the digest of that block.
+    """
+    if isinstance(node, StructBase):
+        node._owner = owner
+        for slot in node._slot_names.values():
+            _set_owner(getattr(node, slot, None), owner)
+    elif isinstance(node, ColumnArray):
+        node._owner = owner
+        for row in node._columns():
+            row._owner = owner
+    elif isinstance(node, _ListWrap):
+        node._owner = owner
+        for elem in list.__iter__(node):
+            _set_owner(elem, owner)
+    elif isinstance(node, BitStructBase):
+        node._owner = owner
+
+
+def _get_digest_key(data):
+    """The values of the data on which digests depend: digests of
+    structures are cached for a single key.
+    """
+    if data is None:
+        return None
+    return (data.version, getattr(data, "user_version", None),
+            getattr(data, "user_version_2", None),
+            getattr(data, "_byte_order", None))
+
+
+# size in bytes of the digests returned by StructBase.get_digest
+DIGEST_SIZE = 16
+
+
+def _is_binary(node):
+    """Whether the node has neither links nor strings, so its binary form
+    does not depend on other blocks or on the string table."""
+    if isinstance(node, Array):
+        node_type = node._elementType
+    else:
+        node_type = node.__class__
+    return not (getattr(node_type, "_has_links", True)
+                or getattr(node_type, "_has_strings", True))
+
+
+def _update_digest(hasher, node, data, links):
+    """Feed the canonical serialisation of a basic type, structure, or
+    array to C{hasher}. Structures which are linked to are represented by
+    their own digest, and are appended to C{links} with that digest.
+    """
+    if isinstance(node, BasicBase):
+        if not node._has_links:
+            value = node.get_value()
+            if isinstance(value, (bytes, bytearray, memoryview)):
+                # binary payloads are hashed as is, the length prefix
+                # keeps consecutive payloads apart
+                value = bytes(value)
+                hasher.update(b"%i:" % len(value))
+                hasher.update(value)
+            else:
+                hasher.update(repr(value).encode("utf-8"))
+                hasher.update(b"\x00")
+        elif node._has_refs:
+            block = node.get_value()
+            if block is None:
+                hasher.update(b"\x00" * DIGEST_SIZE)
+            else:
+                digest = block.get_digest(data)
+                links.append((block, digest))
+                hasher.update(digest)
+        else:
+            # pointers point up the tree, so following them would recurse
+            # forever; file digests take the pointer targets into account
+            hasher.update(b"\x00" if node.get_value() is None else b"\x01")
+    elif data is not None and _is_binary(node):
+        stream = io.BytesIO()
+        node.write(stream, data)
+        hasher.update(stream.getbuffer())
+    elif isinstance(node, StructBase):
+        for attr, slot, arg_name in node._get_filtered_plan(data):
+            if attr.is_abstract:
+                continue
+            attr_value = getattr(node, slot)
+            attr_value.arg = attr.arg if arg_name is None \
+                else getattr(node, arg_name)
+            _update_digest(hasher, attr_value, data, links)
+    elif isinstance(node, Array) and not isinstance(node, ColumnArray):
+        node._elementTypeArgument = node.arg
+        hasher.update(b"[%i]" % list.__len__(node))
+        for elem in list.__iter__(node):
+            if node._count2 is None:
+                _update_digest(hasher, elem, data, links)
+            else:
+                hasher.update(b"[%i]" % list.__len__(elem))
+                for sub_elem in list.__iter__(elem):
+                    _update_digest(hasher, sub_elem, data, links)
+    else:
+        hasher.update(repr(node.get_hash(data)).encode("utf-8"))
+
+
+def _make_attribute_descriptor(attr):
+    """Generate the descriptor which gives access to the value of
+    C{attr} on struct instances.
+    """
+    # str is a forward compound type declaration
+    # and issubclass must take a type as first argument
+    if attr.arr1 is None and not isinstance(attr.type_, str):
+        if attr.type_ == type(None):
+            return _TemplateAttributeDescriptor(attr.name, attr.doc)
+        elif issubclass(attr.type_, BasicBase):
+            return _BasicAttributeDescriptor(attr.name, attr.doc)
+        elif issubclass(attr.type_, StructBase):
+            return _StructAttributeDescriptor(attr.name, attr.doc)
+    # other types of attributes: get only
+    return _AttributeDescriptor(attr.name, attr.doc)
+
+
 class _MetaStructBase(type):
     """This metaclass checks for the presence of _attrs and _is_template
-    attributes. For each attribute in _attrs, an
-    <attrname> property is generated which gets and sets basic types,
-    and gets other types (struct and array). Used as metaclass of
-    StructBase."""
+    attributes. For each attribute in _attrs, an <attrname> descriptor
+    is generated which gets and sets basic types, and gets other types
+    (struct and array). Used as metaclass of StructBase.
+
+    Unless the class declares its own __slots__, the metaclass also
+    generates a slot for the value of each attribute which is not yet
+    stored in a slot of a base class, so instances do not need a
+    __dict__ for these. StructBase keeps __dict__ in its slots, so
+    customized classes can still store anything else on their instances.
+    """
+
+    def __new__(metacls, name, bases, dct):
+        dct = dict(dct)
+        # if a name occurs more than once, the last attribute wins
+        descriptors = dict(
+            (attr.name, _make_attribute_descriptor(attr))
+            for attr in dct.get("_attrs", ()))
+        if "__slots__" not in dct:
+            # customized classes are recreated from the class dict of the
+            # customizer, which includes its __dict__ and __weakref__
+            # descriptors: these only apply to the customizer instances
+            dct.pop("__dict__", None)
+            dct.pop("__weakref__", None)
+            base_names = set()
+            for base in bases:
+                base_names.update(getattr(base, "_names", ()))
+            slots = []
+            for descriptor in descriptors.values():
+                if descriptor.name in base_names:
+                    continue
+                slot = descriptor.slot
+                # private names would be mangled
+                if slot.isidentifier() and not slot.startswith("__"):
+                    slots.append(slot)
+            dct["__slots__"] = tuple(slots)
+        dct.update(descriptors)
+        return super(_MetaStructBase, metacls).__new__(
+            metacls, name, bases, dct)
 
     def __init__(cls, name, bases, dct):
         super(_MetaStructBase, cls).__init__(name, bases, dct)
@@ -62,35 +308,12 @@ class _MetaStructBase(type):
         cls._has_refs = getattr(cls, '_has_refs', False)
         # does the type contain a string?
         cls._has_strings = getattr(cls, '_has_strings', False)
+        # instance variable names of all attributes, by attribute name
+        cls._slot_names = {}
+        for base in reversed(bases):
+            cls._slot_names.update(getattr(base, "_slot_names", ()))
         for attr in dct.get('_attrs', []):
-            # basestring is a forward compound type declaration
-            # and issubclass must take a type as first argument
-            # hence this hack
-            if not isinstance(attr.type_, str) and \
-                    issubclass(attr.type_, BasicBase) and attr.arr1 is None:
-                # get and set basic attributes
-                setattr(cls, attr.name, property(
-                    partial(StructBase.get_basic_attribute, name=attr.name),
-                    partial(StructBase.set_basic_attribute, name=attr.name),
-                    doc=attr.doc))
-            elif not isinstance(attr.type_, str) and \
-                    issubclass(attr.type_, StructBase) and attr.arr1 is None:
-                # get and set struct attributes
-                setattr(cls, attr.name, property(
-                    partial(StructBase.get_attribute, name=attr.name),
-                    partial(StructBase.set_attribute, name=attr.name),
-                    doc=attr.doc))
-            elif attr.type_ == type(None) and attr.arr1 is None:
-                # get and set template attributes
-                setattr(cls, attr.name, property(
-                    partial(StructBase.get_template_attribute, name=attr.name),
-                    partial(StructBase.set_template_attribute, name=attr.name),
-                    doc=attr.doc))
-            else:
-                # other types of attributes: get only
-                setattr(cls, attr.name, property(
-                    partial(StructBase.get_attribute, name=attr.name),
-                    doc=attr.doc))
+            cls._slot_names[attr.name] = cls.__dict__[attr.name].slot
 
             # check for links and refs and strings
             if not cls._has_links:
@@ -135,6 +358,10 @@ class _MetaStructBase(type):
         # precalculate the attribute name list
         cls._names = cls._get_names()
 
+        # compiled attribute plans, one per (version, user_version),
+        # filled on demand by StructBase._get_plan
+        cls._plans = {}
+
     def __repr__(cls):
         return "<struct '%s'>" % (cls.__name__)
 
@@ -154,8 +381,8 @@ class StructBase(GlobalNode, metaclass=_MetaStructBase):
     instance.
 
     Direct access to the attributes is implemented using a <name>
-    property which invokes the get_attribute and set_attribute
-    functions, as demonstrated below.
+    descriptor, which is generated for each attribute by the metaclass,
+    as demonstrated below.
 
     See the pyffi.XmlHandler class for a more advanced example.
 
@@ -223,10 +450,18 @@ class StructBase(GlobalNode, metaclass=_MetaStructBase):
     <BLANKLINE>
     """
 
+    # attribute values are stored in slots generated by the metaclass
+    __slots__ = ("__dict__", "__weakref__", "arg", "_items", "_owner",
+                 "_digest")
+
     _is_template = False
     _attrs = []
     _games = {}
-    arg = None
+    _skip_duplicates = True
+    # names of array attributes that are stored in a ColumnArray
+    # if use_columnar_arrays is set
+    _columnar_attrs = ()
+    use_columnar_arrays = False
     logger = logging.getLogger("pyffi.nif.data.struct")
 
     # initialize all attributes
@@ -245,10 +480,16 @@ class StructBase(GlobalNode, metaclass=_MetaStructBase):
         # used to track names of attributes that have already been added
         # is faster than self.__dict__.has_key(...)
         names = set()
+        slot_names = self._slot_names
         # initialize argument
         self.arg = argument
         # save parent (note: disabled for performance)
         # self._parent = weakref.ref(parent) if parent else None
+        # but keep a weak reference to the block, that is, the structure
+        # without parent, which contains this instance: changes
+        # invalidate the digest of that block, see get_digest
+        self._owner = weakref.ref(self) if parent is None \
+            else getattr(parent, "_owner", None)
         # initialize item list
         # this list is used for instance by qskope to display the structure
         # in a tree view
@@ -277,6 +518,15 @@ class StructBase(GlobalNode, metaclass=_MetaStructBase):
                     parent=self)
                 if attr.default != None:
                     attr_instance.set_value(attr.default)
+            elif (self.use_columnar_arrays
+                  and attr.name in self._columnar_attrs
+                  and ColumnArray.is_supported(rt_type)):
+                attr_instance = ColumnArray(
+                    element_type=rt_type,
+                    element_type_template=rt_template,
+                    element_type_argument=rt_arg,
+                    count1=attr.arr1, count2=attr.arr2,
+                    parent=self)
             elif attr.arr2 == None:
                 attr_instance = Array(
                     element_type=rt_type,
@@ -293,7 +543,7 @@ class StructBase(GlobalNode, metaclass=_MetaStructBase):
                     parent=self)
 
             # assign attribute value
-            setattr(self, "_%s_value_" % attr.name, attr_instance)
+            setattr(self, slot_names[attr.name], attr_instance)
 
             # add instance to item list
             self._items.append(attr_instance)
@@ -327,10 +577,9 @@ class StructBase(GlobalNode, metaclass=_MetaStructBase):
         text = '%s instance at 0x%08X\n' % (self.__class__, id(self))
         # used to track names of attributes that have already been added
         # is faster than self.__dict__.has_key(...)
-        for attr in self._get_filtered_attribute_list():
+        for attr, slot, arg_name in self._get_filtered_plan():
             # append string
-            attr_str_lines = str(
-                getattr(self, "_%s_value_" % attr.name)).splitlines()
+            attr_str_lines = str(getattr(self, slot)).splitlines()
             if len(attr_str_lines) > 1:
                 text += '* %s :\n' % attr.name
                 for attr_str in attr_str_lines:
@@ -338,12 +587,11 @@ class StructBase(GlobalNode, metaclass=_MetaStructBase):
             elif attr_str_lines:
                 text += '* %s : %s\n' % (attr.name, attr_str_lines[0])
             else:
-                # print(getattr(self, "_%s_value_" % attr.name))
                 text += '* %s : <None>\n' % attr.name
         return text
 
     def _log_struct(self, stream, attr):
-        val = getattr(self, "_%s_value_" % attr.name)  # debug
+        val = getattr(self, self._slot_names[attr.name])  # debug
         if not isinstance(val, BasicBase):  # debug
             self.logger.debug(val.__class__.__name__ + ":" + attr.name)
         else:
@@ -361,61 +609,57 @@ class StructBase(GlobalNode, metaclass=_MetaStructBase):
 
     def read(self, stream, data):
         """Read structure from stream."""
+        self._digest = None
         # read all attributes
-        for attr in self._get_filtered_attribute_list(data):
+        for attr, slot, arg_name in self._get_filtered_plan(data):
             # skip abstract attributes
             if attr.is_abstract:
                 continue
-            # get attribute argument (can only be done at runtime)
-            rt_arg = attr.arg if isinstance(attr.arg, (int, type(None))) \
-                else getattr(self, attr.arg)
             # read the attribute
-            attr_value = getattr(self, "_%s_value_" % attr.name)
-            attr_value.arg = rt_arg
-            # if hasattr(attr, "type_"):
-            #     attr_value._elementType = attr.type_
+            attr_value = getattr(self, slot)
+            # get attribute argument (can only be done at runtime)
+            attr_value.arg = attr.arg if arg_name is None \
+                else getattr(self, arg_name)
             self._log_struct(stream, attr)
             attr_value.read(stream, data)
 
     def write(self, stream, data):
         """Write structure to stream."""
         # write all attributes
-        for attr in self._get_filtered_attribute_list(data):
+        for attr, slot, arg_name in self._get_filtered_plan(data):
             # skip abstract attributes
             if attr.is_abstract:
                 continue
-            # get attribute argument (can only be done at runtime)
-            rt_arg = attr.arg if isinstance(attr.arg, (int, type(None))) \
-                else getattr(self, attr.arg)
             # write the attribute
-            attr_value = getattr(self, "_%s_value_" % attr.name)
-            attr_value.arg = rt_arg
-            getattr(self, "_%s_value_" % attr.name).write(stream, data)
+            attr_value = getattr(self, slot)
+            # get attribute argument (can only be done at runtime)
+            attr_value.arg = attr.arg if arg_name is None \
+                else getattr(self, arg_name)
+            attr_value.write(stream, data)
             self._log_struct(stream, attr)
 
     def fix_links(self, data):
         """Fix links in the structure."""
         # parse arguments
         # fix links in all attributes
-        for attr in self._get_filtered_attribute_list(data):
+        for attr, slot, arg_name in self._get_filtered_plan(data):
             # check if there are any links at all, commonly this speeds things up considerably
             if not attr.type_._has_links:
                 continue
             self.logger.debug("fixlinks %s" % attr.name)
             # fix the links in the attribute
-            getattr(self, "_%s_value_" % attr.name).fix_links(data)
+            getattr(self, slot).fix_links(data)
 
     def get_links(self, data=None):
         """Get list of all links in the structure."""
         # get all links
         links = []
-        for attr in self._get_filtered_attribute_list(data):
+        for attr, slot, arg_name in self._get_filtered_plan(data):
             # check if there are any links at all, this speeds things up considerably
             if not attr.type_._has_links:
                 continue
             # extend list of links
-            links.extend(
-                getattr(self, "_" + attr.name + "_value_").get_links(data))
+            links.extend(getattr(self, slot).get_links(data))
         # return the list of all links in all attributes
         return links
 
@@ -423,13 +667,12 @@ class StructBase(GlobalNode, metaclass=_MetaStructBase):
         """Get list of all strings in the structure."""
         # get all strings
         strings = []
-        for attr in self._get_filtered_attribute_list(data):
+        for attr, slot, arg_name in self._get_filtered_plan(data):
             # check if there are any strings at all, this speeds things up considerably
             if (not attr.type_ is type(None)) and (not attr.type_._has_strings):
                 continue
             # extend list of strings
-            strings.extend(
-                getattr(self, "_%s_value_" % attr.name).get_strings(data))
+            strings.extend(getattr(self, slot).get_strings(data))
         # return the list of all strings in all attributes
         return strings
 
@@ -440,14 +683,13 @@ class StructBase(GlobalNode, metaclass=_MetaStructBase):
         get_links, as get_links could result in infinite recursion."""
         # get all refs
         refs = []
-        for attr in self._get_filtered_attribute_list(data):
+        for attr, slot, arg_name in self._get_filtered_plan(data):
             # check if there are any links at all
             # (this speeds things up considerably)
             if (not attr.type_ is type(None)) and (not attr.type_._has_links):
                 continue
             # extend list of refs
-            refs.extend(
-                getattr(self, "_%s_value_" % attr.name).get_refs(data))
+            refs.extend(getattr(self, slot).get_refs(data))
         # return the list of all refs in all attributes
         return refs
 
@@ -455,30 +697,67 @@ class StructBase(GlobalNode, metaclass=_MetaStructBase):
         """Calculate the structure size in bytes."""
         # calculate size
         size = 0
-        for attr in self._get_filtered_attribute_list(data):
+        for attr, slot, arg_name in self._get_filtered_plan(data):
             # skip abstract attributes
             if attr.is_abstract:
                 continue
-            size += getattr(self, "_%s_value_" % attr.name).get_size(data)
+            size += getattr(self, slot).get_size(data)
         return size
 
     def get_hash(self, data=None):
         """Calculate a hash for the structure, as a tuple."""
         # calculate hash
         hsh = []
-        for attr in self._get_filtered_attribute_list(data):
-            hsh.append(
-                getattr(self, "_%s_value_" % attr.name).get_hash(data))
+        for attr, slot, arg_name in self._get_filtered_plan(data):
+            hsh.append(getattr(self, slot).get_hash(data))
         return tuple(hsh)
 
+    def get_digest(self, data=None):
+        """Calculate a digest of the structure, that is, a blake2 hash
+        of its canonical serialisation, where every linked structure is
+        represented by its own digest. Unlike :meth:`get_hash`, digests
+        of blocks are cached. A change through attribute assignment, or
+        by updating the size of an array, invalidates the digest of the
+        block which contains the change, and a changed digest of a
+        linked block invalidates the digest of the blocks which link to
+        it. Changes made by calling ``set_value`` on a node obtained
+        through :meth:`get_attribute` are not noticed, so assign the
+        attribute instead.
+
+        :param data: The data, which determines the version of the
+            structure. Digests calculated with and without data differ.
+        :return: The digest.
+        :rtype: ``bytes``
+        """
+        key = _get_digest_key(data)
+        cached = getattr(self, "_digest", None)
+        if cached is not None and cached[0] == key and all(
+                block.get_digest(data) == digest
+                for block, digest in cached[2]):
+            return cached[1]
+        hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+        hasher.update(self.__class__.__name__.encode("ascii"))
+        links = []
+        _update_digest(hasher, self, data, links)
+        digest = hasher.digest()
+        # only blocks are notified of changes to their attributes
+        owner = getattr(self, "_owner", None)
+        if owner is not None and owner() is self:
+            self._digest = (key, digest, tuple(links))
+        return digest
+
     def replace_global_node(self, oldbranch, newbranch, **kwargs):
-        for attr in self._get_filtered_attribute_list():
+        for attr, slot, arg_name in self._get_filtered_plan():
             # check if there are any links at all
             # (this speeds things up considerably)
             if not attr.type_._has_links:
                 continue
-            getattr(self, "_%s_value_" % attr.name).replace_global_node(
-                oldbranch, newbranch, **kwargs)
+            value = getattr(self, slot)
+            if (isinstance(value, BasicBase)
+                    and value.get_value() is oldbranch):
+                # the link is replaced
+                _invalidate_digest(self)
+            value.replace_global_node(oldbranch, newbranch, **kwargs)
 
     @classmethod
     def get_games(cls):
@@ -521,89 +800,134 @@ class StructBase(GlobalNode, metaclass=_MetaStructBase):
                 names.append(attr.name)
         return names
 
-    def _get_filtered_attribute_list(self, data=None):
-        """Generator for listing all 'active' attributes, that is,
-        attributes whose condition evaluates ``True``, whose version
-        interval contains C{version}, and whose user version is
-        C{user_version}. ``None`` for C{version} or C{user_version} means
-        that these checks are ignored. Duplicate names are skipped as
-        well.
+    @staticmethod
+    def _is_version_active(attr, version, user_version):
+        """Check whether the attribute is present for the given version
+        and user version. ``None`` for C{version} or C{user_version} means
+        that the corresponding check is ignored.
+        """
+        if version is not None:
+            if attr.ver1 is not None and version < attr.ver1:
+                return False
+            if attr.ver2 is not None and version > attr.ver2:
+                return False
+        if (attr.userver is not None and user_version is not None
+                and user_version != attr.userver):
+            return False
+        return True
 
-        Note: version and user_version arguments are deprecated, use
-        the data argument instead.
+    @classmethod
+    def _get_plan(cls, version, user_version):
+        """Get the compiled attribute plan of this structure for the given
+        version and user version. The plan is compiled on first use and
+        cached on the class.
+
+        The plan is a tuple ``(steps, has_duplicates)``. Only attributes
+        which exist in the given version are kept, and each step is a
+        tuple ``((attr, slot, arg_name), cond, vercond)``, where C{slot} is
+        the name of the instance variable holding the attribute value,
+        C{arg_name} is the name of the attribute holding the runtime
+        argument (or ``None`` if the argument is static), and C{cond} and
+        C{vercond} are the conditions that remain to be checked at
+        runtime. C{has_duplicates} tells whether any names occur more than
+        once, in which case duplicates must be skipped at runtime.
+        """
+        try:
+            return cls._plans[(version, user_version)]
+        except KeyError:
+            pass
+        check_vercond = version is not None and user_version is not None
+        steps = []
+        names = set()
+        has_duplicates = False
+        for attr in cls._attribute_list:
+            if not cls._is_version_active(attr, version, user_version):
+                continue
+            if attr.name in names:
+                has_duplicates = cls._skip_duplicates
+            names.add(attr.name)
+            arg_name = None if isinstance(attr.arg, (int, type(None))) \
+                else attr.arg
+            steps.append(
+                ((attr, cls._slot_names[attr.name], arg_name),
+                 attr.cond,
+                 attr.vercond if check_vercond else None))
+        plan = cls._plans[(version, user_version)] = (
+            tuple(steps), has_duplicates)
+        return plan
+
+    def _get_filtered_plan(self, data=None):
+        """Generator for listing the plan entries ``(attr, slot,
+        arg_name)`` of all 'active' attributes, see
+        :meth:`_get_filtered_attribute_list` and :meth:`_get_plan`.
         """
         if data is not None:
-            version = data.version
-            user_version = data.user_version
+            steps, has_duplicates = self._get_plan(
+                data.version, data.user_version)
         else:
-            version = None
-            user_version = None
+            steps, has_duplicates = self._get_plan(None, None)
         names = set()
-        for attr in self._attribute_list:
-            # print(attr.name, version, attr.ver1, attr.ver2) # debug
-
-            # check version
-            if version is not None:
-                if attr.ver1 is not None and version < attr.ver1:
-                    continue
-                if attr.ver2 is not None and version > attr.ver2:
-                    continue
-            # print("version check passed") # debug
-
-            # check user version
-            if (attr.userver is not None and user_version is not None
-                    and user_version != attr.userver):
-                continue
-            # print("user version check passed") # debug
-
+        for entry, cond, vercond in steps:
             # check conditions
-            if attr.cond is not None and not attr.cond.eval(self):
+            if cond is not None and not cond.eval(self):
                 continue
-
-            if (version is not None and user_version is not None
-                    and attr.vercond is not None):
-                if not attr.vercond.eval(data):
+            if vercond is not None and not vercond.eval(data):
+                continue
+            # skip duplicate names
+            if has_duplicates:
+                if entry[0].name in names:
                     continue
+                names.add(entry[0].name)
+            # passed all tests
+            yield entry
 
-            # print("condition passed") # debug
-
-            # skip dupiclate names
+    def _get_filtered_attribute_list(self, data=None):
+        """Generator for listing all 'active' attributes, that is,
+        attributes whose condition evaluates ``True``, whose version
+        interval contains C{version}, and whose user version is
+        C{user_version}. ``None`` for C{version} or C{user_version} means
+        that these checks are ignored. Duplicate names are skipped as
+        well.
 
-            if attr.name in names:
-                continue
-            # print("duplicate check passed") # debug
+        Version checks are done only once per class and version, see
+        :meth:`_get_plan`.
 
-            names.add(attr.name)
-            # passed all tests
-            # so yield the attribute
-            yield attr
+        Note: version and user_version arguments are deprecated, use
+        the data argument instead.
+        """
+        for entry in self._get_filtered_plan(data):
+            yield entry[0]
 
     def get_attribute(self, name):
         """Get a (non-basic) attribute."""
-        return getattr(self, "_" + name + "_value_")
+        return getattr(self, self._slot_names[name])
 
     # important note: to apply partial(set_attribute, name = 'xyz') the
     # name argument must be last
     def set_attribute(self, value, name):
         """Set a (non-basic) attribute."""
+        slot = self._slot_names[name]
         # check class
-        attr = getattr(self, "_" + name + "_value_")
+        attr = getattr(self, slot)
         if attr.__class__ is not value.__class__:
             raise TypeError("expected %s but got %s"
                             % (attr.__class__.__name__,
                                value.__class__.__name__))
         # set it
-        setattr(self, "_" + name + "_value_", value)
+        _set_owner(value, self._owner)
+        setattr(self, slot, value)
+        _invalidate_digest(self)
 
     def get_basic_attribute(self, name):
         """Get a basic attribute."""
-        return getattr(self, "_" + name + "_value_").get_value()
+        return getattr(self, self._slot_names[name]).get_value()
 
     # important note: to apply partial(set_attribute, name = 'xyz') the
     # name argument must be last
     def set_basic_attribute(self, value, name):
         """Set the value of a basic attribute."""
-        getattr(self, "_" + name + "_value_").set_value(value)
+        getattr(self, self._slot_names[name]).set_value(value)
+        _invalidate_digest(self)
 
     def get_template_attribute(self, name):
         """Get a template attribute."""
@@ -652,4 +976,5 @@ class StructBase(GlobalNode, metaclass=_MetaStructBase):
 
 
 from pyffi.types.basic import BasicBase
-from pyffi.engines.xml.array import Array
+from pyffi.engines.xml.array import Array, ColumnArray, _ListWrap
+from pyffi.engines.xml.bit_struct import BitStructBase
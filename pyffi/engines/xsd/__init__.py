@@ -545,7 +545,7 @@ class MetaFileFormat(pyffi.object_models.MetaFileFormat):
 
             # parse the XSD file
             cls.logger.debug("Parsing %s and generating classes." % xsdfilename)
-            start = time.clock()
+            start = time.perf_counter()
             try:
                 # create nodes for every element in the XSD tree
                 schema = Tree.node_factory(
@@ -560,7 +560,7 @@ class MetaFileFormat(pyffi.object_models.MetaFileFormat):
             # generate attributes
             schema.attribute_walker(cls)
             cls.logger.debug("Parsing finished in %.3f seconds."
-                             % (time.clock() - start))
+                             % (time.perf_counter() - start))
 
 
 class Type(object):
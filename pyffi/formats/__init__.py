@@ -11,6 +11,17 @@ set the :envvar:`CGFXMLPATH` environment variable to the directory where
 :envvar:`KFMXMLPATH`, :envvar:`DDSXMLPATH`, and :envvar:`TGAXMLPATH`
 work similarly.
 
+Parsed format descriptions are cached, so that later imports need not
+parse the xml again; see :mod:`pyffi.engines.xml.cache`. The cache lives
+in the directory set by the :envvar:`PYFFI_CACHE_DIR` environment
+variable, by default :file:`~/.cache/pyffi`. Set it to an empty string
+to disable the cache.
+
+Set the :envvar:`PYFFI_LAZY_CLASSES` environment variable to ``1`` to
+create the classes of a format only when they are first used, which makes
+importing a format faster and lighter for tools that need only a few of
+its classes; see :attr:`pyffi.engines.xml.FileFormat.lazy_classes`.
+
 Supported formats
 -----------------
 
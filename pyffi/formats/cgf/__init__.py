@@ -358,6 +358,8 @@ class CgfFormat(pyffi.engines.xml.FileFormat, metaclass=_MetaCgfFormat):
 
     class Ref(BasicBase):
         """Reference to a chunk, up the hierarchy."""
+        __slots__ = ("_template",)
+
         _is_template = True
         _has_links = True
         _has_refs = True
@@ -491,6 +493,8 @@ but got instance of %s""" % (self._template, block.__class__))
 
     class Ptr(Ref):
         """Reference to a chunk, down the hierarchy."""
+        __slots__ = ()
+
         _is_template = True
         _has_links = True
         _has_refs = False
@@ -706,6 +710,10 @@ but got instance of %s""" % (self._template, block.__class__))
             finally:
                 stream.seek(pos)
 
+        def get_header_block_types(self):
+            return set(chunk_type.__name__ for chunk_type
+                       in self.chunk_table.get_chunk_types())
+
         def read(self, stream):
             """Read a cgf file. Does not reset stream position.
 
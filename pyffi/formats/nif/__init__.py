@@ -366,6 +366,8 @@ end
 #
 # ***** END LICENSE BLOCK *****
 
+import hashlib
+import io
 import os
 import re
 import struct
@@ -380,7 +382,9 @@ import pyffi.formats.dds
 import pyffi.engines
 import pyffi.object_models
 import pyffi.types.common
+import pyffi.utils.geometry
 import pyffi.utils.inertia
+import pyffi.utils.memoryreader
 import pyffi.utils.mopp
 import pyffi.utils.quickhull
 import pyffi.utils.tristrip
@@ -389,11 +393,183 @@ import pyffi.utils.vertex_cache
 from pyffi.types.editable import EditableBoolComboBox
 from pyffi.types.basic import BasicBase
 from pyffi.engines.xml.niftools import FileFormat
-from pyffi.engines.xml.struct_ import StructBase
+from pyffi.engines.xml.struct_ import StructBase, DIGEST_SIZE
 from pyffi.utils.graph import EdgeFilter
 from pyffi.utils.mathutils import *  # XXX todo get rid of from XXX import *
 
 
+class _LazyBlockList(object):
+    """Sequence of the blocks of a nif file, where each block is read from
+    the stream only when it is first accessed. Used by
+    :meth:`NifFormat.Data.read` in lazy mode, for nif versions which
+    store the size of every block in the header.
+
+    The stream must remain open as long as blocks are accessed.
+    """
+
+    def __init__(self, data, stream, offsets, block_types):
+        """Initialize the list.
+
+        :param data: The nif data.
+        :type data: :class:`NifFormat.Data`
+        :param stream: The stream from which to read the blocks.
+        :type stream: ``file``
+        :param offsets: Stream position of every block.
+        :type offsets: ``list`` of ``int``
+        :param block_types: Block type string of every block, as stored
+            in the header.
+        :type block_types: ``list`` of ``bytes``
+        """
+        self._data = data
+        self._stream = stream
+        self._offsets = offsets
+        self._block_types = block_types
+        self._blocks = [None] * len(offsets)
+
+    def __len__(self):
+        return len(self._blocks)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        block = self._blocks[index]
+        if block is None:
+            block = self._read_block(index % len(self._blocks))
+        return block
+
+    def __iter__(self):
+        for index in range(len(self._blocks)):
+            yield self[index]
+
+    def is_read(self, index):
+        """Check whether the block at the given index has been read."""
+        return self._blocks[index] is not None
+
+    def get_block_type(self, index):
+        """Get the block type name at the given index, without reading the
+        block."""
+        return self._block_types[index].decode("ascii").split("\x01")[0]
+
+    def _read_block(self, index):
+        """Read the block at the given index, and fix its links."""
+        data = self._data
+        stream = self._stream
+        block_type = self._block_types[index].decode("ascii")
+        # handle data stream classes
+        if block_type.startswith("NiDataStream\x01"):
+            block_type, data_stream_usage, data_stream_access = \
+                block_type.split("\x01")
+        try:
+            block = getattr(NifFormat, block_type)()
+        except AttributeError:
+            raise ValueError("Unknown block type '%s'." % block_type)
+        pos = stream.tell()
+        try:
+            stream.seek(self._offsets[index])
+            block.read(stream, data)
+            if block_type == "NiDataStream":
+                block.usage = int(data_stream_usage)
+                block.access.populate_attribute_values(
+                    int(data_stream_access), data)
+            # store the block before fixing links, for links pointing back
+            self._blocks[index] = block
+            block.fix_links(data)
+        except:
+            self._blocks[index] = None
+            raise
+        finally:
+            stream.seek(pos)
+        return block
+
+
+class _LazyLink(object):
+    """Link to a block of a :class:`_LazyBlockList` which has not been read
+    yet. Stored in :class:`NifFormat.Ref` instances in place of the block,
+    until the link is first followed."""
+
+    __slots__ = ('_blocks', '_index')
+
+    def __init__(self, blocks, index):
+        self._blocks = blocks
+        self._index = index
+
+    def resolve(self):
+        """Read and return the block."""
+        return self._blocks[self._index]
+
+
+class _StringTable(object):
+    """The string table of a nif file (version 20.1.0.3 and up): a
+    sequence of unique strings in order of first addition, with a
+    dictionary for looking up the index of a string.
+
+    >>> table = _StringTable()
+    >>> table.update([b"b", b"a", b"b"])
+    >>> list(table), len(table), table[1]
+    ([b'b', b'a'], 2, b'a')
+    >>> table.add(b"a"), table.add(b"c"), table.index(b"c")
+    (1, 2, 2)
+    >>> table.index(b"d")
+    Traceback (most recent call last):
+        ...
+    ValueError: b'd' is not in the string table
+
+    Tables which are read from a file may list a string more than once,
+    in which case its first index is used:
+
+    >>> _StringTable([b"a", b"b", b"a"]).index(b"a")
+    0
+    """
+
+    __slots__ = ('_strings', '_index')
+
+    def __init__(self, strings=()):
+        """Initialize the table.
+
+        :param strings: The strings, in order, for instance as read from
+            the header. Duplicates are kept, so indices into the original
+            sequence remain valid.
+        """
+        self._strings = list(strings)
+        self._index = {}
+        for i, s in enumerate(self._strings):
+            self._index.setdefault(s, i)
+
+    def __len__(self):
+        return len(self._strings)
+
+    def __getitem__(self, index):
+        return self._strings[index]
+
+    def __iter__(self):
+        return iter(self._strings)
+
+    def add(self, s):
+        """Add a string if it is not in the table yet, and return its
+        index."""
+        try:
+            return self._index[s]
+        except KeyError:
+            index = self._index[s] = len(self._strings)
+            self._strings.append(s)
+            return index
+
+    def update(self, strings):
+        """Add all given strings which are not in the table yet."""
+        for s in strings:
+            if s not in self._index:
+                self._index[s] = len(self._strings)
+                self._strings.append(s)
+
+    def index(self, s):
+        """Return the index of a string, raising ``ValueError`` if it is
+        not in the table."""
+        try:
+            return self._index[s]
+        except KeyError:
+            raise ValueError("%r is not in the string table" % (s,))
+
+
 class NifFormat(FileFormat):
     """This class contains the generated classes from the xml."""
     xml_file_name = 'nif.xml'
@@ -413,6 +589,8 @@ class NifFormat(FileFormat):
     RE_FILENAME = re.compile(r'^.*\.(nif|kf|kfa|nifcache|jmi|texcache|pcpatch|nft|item|nif_wii)$', re.IGNORECASE)
     # archives
     ARCHIVE_CLASSES = [pyffi.formats.bsa.BsaFormat]
+    # Data.read can read blocks on demand
+    LAZY_READ = True
     # used for comparing floats
     EPSILON = 0.0001
 
@@ -437,6 +615,8 @@ class NifFormat(FileFormat):
     class StringOffset(pyffi.types.common.Int):
         """This is just an integer with -1 as default value."""
 
+        __slots__ = ()
+
         def __init__(self, **kwargs):
             pyffi.types.common.Int.__init__(self, **kwargs)
             self.set_value(-1)
@@ -454,6 +634,8 @@ class NifFormat(FileFormat):
         True
         """
 
+        __slots__ = ()
+
         def __init__(self, **kwargs):
             BasicBase.__init__(self, **kwargs)
             self.set_value(False)
@@ -502,11 +684,17 @@ class NifFormat(FileFormat):
                                          int(self._value)))
 
     class Flags(pyffi.types.common.UShort):
+        __slots__ = ()
+
         def __str__(self):
             return hex(self.get_value())
 
     class Ref(BasicBase):
         """Reference to another block."""
+        # _block_index is the block index as read from the file, until
+        # fix_links resolves it
+        __slots__ = ("_template", "_block_index")
+
         _is_template = True
         _has_links = True
         _has_refs = True
@@ -517,6 +705,8 @@ class NifFormat(FileFormat):
             self.set_value(None)
 
         def get_value(self):
+            if self._value.__class__ is _LazyLink:
+                self.set_value(self._value.resolve())
             return self._value
 
         def set_value(self, value):
@@ -541,10 +731,8 @@ class NifFormat(FileFormat):
 
         def read(self, stream, data):
             self.set_value(None)  # fix_links will set this field
-            print("Position:", stream.tell())
-            block_index, = struct.unpack(data._byte_order + 'i',
-                                         stream.read(4))
-            data._link_stack.append(block_index)
+            self._block_index, = struct.unpack(data._byte_order + 'i',
+                                               stream.read(4))
 
         def write(self, stream, data):
             """Write block reference."""
@@ -566,7 +754,11 @@ class NifFormat(FileFormat):
 
         def fix_links(self, data):
             """Fix block links."""
-            block_index = data._link_stack.pop(0)
+            block_index = getattr(self, "_block_index", None)
+            if block_index is None:
+                raise NifFormat.NifError(
+                    'fixing links of a reference that was not read (bug?)')
+            del self._block_index
             # case when there's no link
             if data.version >= 0x0303000D:
                 if block_index == -1:  # link by block number
@@ -576,6 +768,11 @@ class NifFormat(FileFormat):
                 if block_index == 0:  # link by pointer
                     self.set_value(None)
                     return
+            # lazy read: do not read the block until the link is followed
+            if (data._block_dct.__class__ is _LazyBlockList
+                    and not data._block_dct.is_read(block_index)):
+                self._value = _LazyLink(data._block_dct, block_index)
+                return
             # other case: look up the link and check the link type
             block = data._block_dct[block_index]
             self.set_value(block)
@@ -637,6 +834,8 @@ class NifFormat(FileFormat):
 
     class Ptr(Ref):
         """A weak reference to another block, used to point up the hierarchy tree. The reference is not returned by the L{get_refs} function to avoid infinite recursion."""
+        __slots__ = ()
+
         _is_template = True
         _has_links = True
         _has_refs = False
@@ -644,6 +843,8 @@ class NifFormat(FileFormat):
         # use weak reference to aid garbage collection
 
         def get_value(self):
+            if self._value.__class__ is _LazyLink:
+                self.set_value(self._value.resolve())
             return self._value() if self._value is not None else None
 
         def set_value(self, value):
@@ -699,6 +900,8 @@ class NifFormat(FileFormat):
         'Hi There'
         """
 
+        __slots__ = ()
+
         def __init__(self, **kwargs):
             BasicBase.__init__(self, **kwargs)
             self.set_value('')
@@ -726,6 +929,8 @@ class NifFormat(FileFormat):
             stream.write("\x0a".encode("ascii"))
 
     class HeaderString(BasicBase):
+        __slots__ = ()
+
         def __str__(self):
             return 'NetImmerse/Gamebryo File Format, Version x.x.x.x'
 
@@ -807,6 +1012,8 @@ class NifFormat(FileFormat):
                 return "%s File Format, Version %s" % (s, v)
 
     class FileVersion(pyffi.types.common.UInt):
+        __slots__ = ()
+
         def set_value(self):
             raise NotImplementedError("file version is specified via data")
 
@@ -867,6 +1074,8 @@ class NifFormat(FileFormat):
     class ShortString(BasicBase):
         """Another type for strings."""
 
+        __slots__ = ()
+
         def __init__(self, **kwargs):
             BasicBase.__init__(self, **kwargs)
             self._value = ''.encode("ascii")
@@ -902,6 +1111,8 @@ class NifFormat(FileFormat):
             stream.write('\x00'.encode("ascii"))
 
     class string(SizedString):
+        __slots__ = ()
+
         _has_strings = True
 
         def get_size(self, data=None):
@@ -959,6 +1170,8 @@ class NifFormat(FileFormat):
     class FilePath(string):
         """A file path."""
 
+        __slots__ = ()
+
         def get_hash(self, data=None):
             """Returns a case insensitive hash value."""
             return self.get_value().lower()
@@ -967,11 +1180,17 @@ class NifFormat(FileFormat):
         """Array (list) of bytes. Implemented as basic type to speed up reading
         and also to prevent data to be dumped by __str__."""
 
+        __slots__ = ()
+
         def __init__(self, **kwargs):
             BasicBase.__init__(self, **kwargs)
             self.set_value("".encode())  # b'' for > py25
 
         def get_value(self):
+            if isinstance(self._value, memoryview):
+                # the view as read from a MemoryReader is copied only
+                # when the value is needed
+                self._value = self._value.tobytes()
             return self._value
 
         def set_value(self, value):
@@ -981,12 +1200,12 @@ class NifFormat(FileFormat):
             return len(self._value) + 4
 
         def get_hash(self, data=None):
-            return self._value.__hash__()
+            return self.get_value().__hash__()
 
         def read(self, stream, data):
             size, = struct.unpack(data._byte_order + 'I',
                                   stream.read(4))
-            self._value = stream.read(size)
+            self._value = pyffi.utils.memoryreader.read_view(stream, size)
 
         def write(self, stream, data):
             stream.write(struct.pack(data._byte_order + 'I',
@@ -1000,11 +1219,18 @@ class NifFormat(FileFormat):
         """Matrix of bytes. Implemented as basic type to speed up reading
         and to prevent data being dumped by __str__."""
 
+        # _views is set when the rows are views as read from a MemoryReader
+        __slots__ = ("_views",)
+
         def __init__(self, **kwargs):
             BasicBase.__init__(self, **kwargs)
             self.set_value([])
 
         def get_value(self):
+            if self._views:
+                # the views are copied only when the value is needed
+                self._value = [bytes(x) for x in self._value]
+                self._views = False
             return self._value
 
         def set_value(self, value):
@@ -1016,6 +1242,7 @@ class NifFormat(FileFormat):
                 # assert(isinstance(x, basestring))
                 assert (len(x) == size1)
             self._value = value  # should be a list of strings of bytes
+            self._views = False
 
         def get_size(self, data=None):
             if len(self._value) == 0:
@@ -1024,7 +1251,7 @@ class NifFormat(FileFormat):
                 return len(self._value) * len(self._value[0]) + 8
 
         def get_hash(self, data=None):
-            return tuple(x.__hash__() for x in self._value)
+            return tuple(x.__hash__() for x in self.get_value())
 
         def read(self, stream, data):
             size1, = struct.unpack(data._byte_order + 'I',
@@ -1033,7 +1260,10 @@ class NifFormat(FileFormat):
                                    stream.read(4))
             self._value = []
             for i in range(size2):
-                self._value.append(stream.read(size1))
+                self._value.append(
+                    pyffi.utils.memoryreader.read_view(stream, size1))
+            self._views = bool(self._value) and isinstance(
+                self._value[0], memoryview)
 
         def write(self, stream, data):
             if self._value:
@@ -1117,7 +1347,6 @@ class NifFormat(FileFormat):
         :type modification: ``str``
         """
 
-        _link_stack = None
         _block_dct = None
         _string_list = None
         _block_index_dct = None
@@ -1320,11 +1549,31 @@ class NifFormat(FileFormat):
             finally:
                 stream.seek(pos)
 
-        def read(self, stream):
+        def get_header_block_types(self):
+            # nifs older than 5.0.0.1 do not list their block types
+            if self.version < 0x05000001:
+                return None
+            block_types = set()
+            for block_type in self.header.block_types:
+                block_type = block_type.decode("ascii")
+                # handle NiDataStream
+                if block_type.startswith("NiDataStream\x01"):
+                    block_type = "NiDataStream"
+                block_types.add(block_type)
+            return block_types
+
+        def read(self, stream, lazy=False):
             """Read a NIF file. Does not reset stream position.
 
             :param stream: The stream from which to read.
             :type stream: ``file``
+            :param lazy: If ``True``, and the nif stores the size of every
+                block (version 20.2.0.7 and up), then blocks are only read
+                when they are first accessed, either through :attr:`blocks`
+                or by following a link. The stream must then remain open
+                until all blocks of interest have been accessed. Older nifs
+                are always read in full.
+            :type lazy: ``bool``
             """
             logger = logging.getLogger("pyffi.nif.data")
             # read header
@@ -1333,6 +1582,10 @@ class NifFormat(FileFormat):
             logger.debug("Version 0x%08X" % self.version)
             self.header.read(stream, data=self)
 
+            if lazy and self.version >= 0x14020007:
+                self._read_lazy(stream)
+                return
+
             # list of root blocks
             # for versions < 3.3.0.13 this list is updated through the
             # "Top Level Object" string while reading the blocks
@@ -1341,11 +1594,119 @@ class NifFormat(FileFormat):
             self.roots = []
 
             # read the blocks
-            self._link_stack = []  # list of indices, as they are added to the stack
-            self._string_list = [s for s in self.header.strings]
+            self._string_list = _StringTable(self.header.strings)
             self._block_dct = {}  # maps block index to actual block
             self.blocks = []  # records all blocks as read from file in order
+            for block_num, block_index, block_type, block, is_root \
+                    in self._read_blocks(stream):
+                # store block index
+                self._block_dct[block_index] = block
+                self.blocks.append(block)
+                # add block to roots if flagged as such
+                if is_root:
+                    self.roots.append(block)
+
+            # read footer
+            ftr = NifFormat.Footer()
+            ftr.read(stream, self)
+
+            # check if we are at the end of the file
+            if stream.read(1):
+                logger.error(
+                    'End of file not reached: corrupt NIF file?')
+
+            # fix links in blocks and footer (header has no links)
+            for block in self.blocks:
+                block.fix_links(self)
+            ftr.fix_links(self)
+            # add root objects in footer to roots list
+            if self.version >= 0x0303000D:
+                for root in ftr.roots:
+                    self.roots.append(root)
+
+        def iter_blocks(self, stream, types=None):
+            """Read a NIF file block by block, and yield ``(block_index,
+            block_type, block)`` for each block, in file order. Only the
+            header is kept: the blocks are not stored in :attr:`blocks`,
+            and their links are not fixed, so every block can be
+            garbage collected as soon as the caller drops it. This keeps
+            memory use flat when scanning many or large files, for
+            instance to collect statistics. Does not reset stream
+            position.
+
+            >>> import io
+            >>> data = NifFormat.Data(version=0x14020007, user_version=11)
+            >>> root = NifFormat.NiNode()
+            >>> root.add_child(NifFormat.NiTriShape())
+            >>> data.roots = [root]
+            >>> stream = io.BytesIO()
+            >>> data.write(stream)
+            >>> if stream.seek(0): pass
+            >>> for index, block_type, block in NifFormat.Data().iter_blocks(
+            ...         stream, types=[NifFormat.NiGeometry]):
+            ...     print(index, block_type)
+            1 NiTriShape
+
+            :param stream: The stream from which to read.
+            :type stream: ``file``
+            :param types: If given, only blocks which are an instance of
+                one of these classes, or of the classes with these names,
+                are yielded. For nifs which store the size of every block
+                (version 20.2.0.7 and up) the other blocks are skipped
+                without being read.
+            :type types: ``list`` of ``type`` or ``str``
+            """
+            # read header
+            self.inspect_version_only(stream)
+            self.header.read(stream, data=self)
+            self._string_list = _StringTable(self.header.strings)
+            self.roots = []
+            self.blocks = []
+            self._block_dct = {}
+
+            if types is None:
+                block_filter = None
+            else:
+                types = tuple(
+                    getattr(NifFormat, block_type)
+                    if isinstance(block_type, str) else block_type
+                    for block_type in types)
+                filtered = {}
+
+                def block_filter(block_type):
+                    try:
+                        return filtered[block_type]
+                    except KeyError:
+                        block_class = getattr(NifFormat, block_type, None)
+                        result = filtered[block_type] = (
+                            isinstance(block_class, type)
+                            and issubclass(block_class, types))
+                        return result
+
+            for block_num, block_index, block_type, block, is_root \
+                    in self._read_blocks(stream, block_filter):
+                yield block_index, block_type, block
+
+        def _read_blocks(self, stream, block_filter=None):
+            """Generator which reads the blocks that follow the header,
+            and yields ``(block_num, block_index, block_type, block,
+            is_root)`` for each block, in file order. Links are not fixed,
+            and the blocks are not stored.
+            Used as helper function.
+
+            :param stream: The stream from which to read, positioned after
+                the header.
+            :type stream: ``file``
+            :param block_filter: If given, only blocks whose type name
+                passes this function are yielded. Other blocks are skipped
+                using the block size from the header, or, for nifs that do
+                not store block sizes, read and discarded.
+            :type block_filter: ``function``
+            """
+            logger = logging.getLogger("pyffi.nif.data")
             block_num = 0  # the current block numner
+            # block indices read so far, for old nifs
+            block_indices = set()
 
             while True:
                 if self.version < 0x0303000D:
@@ -1404,10 +1765,21 @@ class NifFormat(FileFormat):
                     else:
                         block_index, = struct.unpack(
                             self._byte_order + 'I', stream.read(4))
-                        if block_index in self._block_dct:
+                        if block_index in block_indices:
                             raise NifFormat.NifError(
                                 'duplicate block index (0x%08X at 0x%08X)'
                                 % (block_index, stream.tell()))
+                if block_filter is not None and not block_filter(block_type):
+                    if self.version >= 0x14020007:
+                        stream.seek(self.header.block_size[block_num], 1)
+                        block_num += 1
+                        if block_num >= self.header.num_blocks:
+                            break
+                        continue
+                    # no block sizes, so the block must be read to skip it
+                    skip = True
+                else:
+                    skip = False
                 # create the block
                 try:
                     block = getattr(NifFormat, block_type)()
@@ -1421,7 +1793,6 @@ class NifFormat(FileFormat):
                     block.read(stream, self)
                 except:
                     logger.exception("Reading %s failed" % block.__class__)
-                    # logger.error("link stack: %s" % self._link_stack)
                     # logger.error("block that failed:")
                     # logger.error("%s" % block)
                     raise
@@ -1429,9 +1800,6 @@ class NifFormat(FileFormat):
                 if block_type == "NiDataStream":
                     block.usage = data_stream_usage
                     block.access.populate_attribute_values(data_stream_access, self)
-                # store block index
-                self._block_dct[block_index] = block
-                self.blocks.append(block)
                 # check block size
                 if self.version >= 0x14020007:
                     logger.debug("Checking block size")
@@ -1445,16 +1813,35 @@ class NifFormat(FileFormat):
                                      % (extra_size, block.__class__.__name__))
                         # skip bytes that were missed
                         stream.seek(extra_size, 1)
-                # add block to roots if flagged as such
-                if is_root:
-                    self.roots.append(block)
+                if self.version < 0x0303000D:
+                    block_indices.add(block_index)
+                if not skip:
+                    yield block_num, block_index, block_type, block, is_root
                 # check if we are done
                 block_num += 1
                 if self.version >= 0x0303000D:
                     if block_num >= self.header.num_blocks:
                         break
 
+        def _read_lazy(self, stream):
+            """Set up lazy reading of the blocks, and read the footer. The
+            header must have been read already."""
+            logger = logging.getLogger("pyffi.nif.data")
+            self._string_list = _StringTable(self.header.strings)
+            offsets = []
+            offset = stream.tell()
+            for block_num in range(self.header.num_blocks):
+                offsets.append(offset)
+                offset += self.header.block_size[block_num]
+            block_types = [
+                self.header.block_types[
+                    self.header.block_type_index[block_num] & 0xfff]
+                for block_num in range(self.header.num_blocks)]
+            self.blocks = _LazyBlockList(self, stream, offsets, block_types)
+            self._block_dct = self.blocks
+
             # read footer
+            stream.seek(offset)
             ftr = NifFormat.Footer()
             ftr.read(stream, self)
 
@@ -1463,17 +1850,47 @@ class NifFormat(FileFormat):
                 logger.error(
                     'End of file not reached: corrupt NIF file?')
 
-            # fix links in blocks and footer (header has no links)
-            for block in self.blocks:
-                block.fix_links(self)
+            # fix links in footer, the roots are read when accessed
             ftr.fix_links(self)
-            # the link stack should be empty now
-            if self._link_stack:
-                raise NifFormat.NifError('not all links have been popped from the stack (bug?)')
-            # add root objects in footer to roots list
-            if self.version >= 0x0303000D:
-                for root in ftr.roots:
-                    self.roots.append(root)
+            self.roots = list(ftr.roots)
+
+        def get_digest(self):
+            """Digest of the nif, combined from the version, the header,
+            and the cached digests of all blocks in the tree at
+            :attr:`roots` (see
+            :meth:`pyffi.engines.xml.struct_.StructBase.get_digest`),
+            along with the links between the blocks.
+
+            :return: The digest.
+            :rtype: ``bytes``
+            """
+            hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+            hasher.update(repr((self.version, self.user_version,
+                                self.user_version_2, self.modification,
+                                self._byte_order)).encode("ascii"))
+            hasher.update(self.header.get_digest(self))
+            # number the blocks in order of first use, so links, and in
+            # particular pointers, can be compared by index
+            block_index_dct = {}
+            block_links = []
+            stack = list(reversed(self.roots))
+            while stack:
+                block = stack.pop()
+                if block is None or id(block) in block_index_dct:
+                    continue
+                block_index_dct[id(block)] = len(block_links)
+                links = block.get_links(self)
+                block_links.append((block, links))
+                stack.extend(reversed(links))
+            hasher.update(repr([block_index_dct[id(root)]
+                                for root in self.roots
+                                if root is not None]).encode("ascii"))
+            for block, links in block_links:
+                hasher.update(block.get_digest(self))
+                hasher.update(repr([block_index_dct[id(link)]
+                                    for link in links
+                                    if link is not None]).encode("ascii"))
+            return hasher.digest()
 
         def write(self, stream):
             """Write a NIF file. The L{header} and the L{blocks} are recalculated
@@ -1489,16 +1906,15 @@ class NifFormat(FileFormat):
             self._block_index_dct = {}  # maps block to block index
             block_type_list = []  # list of all block type strings
             block_type_dct = {}  # maps block to block type string index
-            self._string_list = []
             for root in self.roots:
                 self._makeBlockList(root,
                                     self._block_index_dct,
                                     block_type_list, block_type_dct)
-                for block in root.tree():
-                    self._string_list.extend(
-                        block.get_strings(self))
-            self._string_list = list(set(self._string_list))  # ensure unique elements
-            # print(self._string_list) # debug
+            # strings are stored in order of first use, so the output does
+            # not depend on hash randomization
+            self._string_list = _StringTable()
+            for block in self.blocks:
+                self._string_list.update(block.get_strings(self))
 
             self.header.user_version = self.user_version  # TODO dedicated type for user_version similar to FileVersion
             # for oblivion CS; apparently this is the version of the bhk blocks
@@ -1513,17 +1929,13 @@ class NifFormat(FileFormat):
                 self.header.block_type_index[i] = block_type_dct[block]
             self.header.num_strings = len(self._string_list)
             if self._string_list:
-                self.header.max_string_length = max([len(s) for s in self._string_list])
+                self.header.max_string_length = max(
+                    len(s) for s in self._string_list)
             else:
                 self.header.max_string_length = 0
             self.header.strings.update_size()
             for i, s in enumerate(self._string_list):
                 self.header.strings[i] = s
-            self.header.block_size.update_size()
-            for i, block in enumerate(self.blocks):
-                self.header.block_size[i] = block.get_size(data=self)
-            # if verbose >= 2:
-            #    print(hdr)
 
             # set up footer
             ftr = NifFormat.Footer()
@@ -1532,39 +1944,54 @@ class NifFormat(FileFormat):
             for i, root in enumerate(self.roots):
                 ftr.roots[i] = root
 
-            # write the file
-            logger.debug("Writing header")
-            # logger.debug("%s" % self.header)
-            self.header.write(stream, self)
+            # serialise all blocks, exactly once, into a single buffer;
+            # the block sizes for the header are taken from this buffer
+            body = io.BytesIO()
+            block_sizes = []
             for block in self.blocks:
                 # signal top level object if block is a root object
                 if self.version < 0x0303000D and block in self.roots:
                     s = NifFormat.SizedString()
                     s.set_value("Top Level Object")
-                    s.write(stream, self)
+                    s.write(body, self)
                 if self.version >= 0x05000001:
                     if self.version <= 0x0A01006A:
                         # write zero dummy separator
-                        stream.write('\x00\x00\x00\x00'.encode("ascii"))
+                        body.write('\x00\x00\x00\x00'.encode("ascii"))
                 else:
                     # write block type string
                     s = NifFormat.SizedString()
                     assert (block_type_list[block_type_dct[block]]
                             == block.__class__.__name__)  # debug
                     s.set_value(block.__class__.__name__)
-                    s.write(stream, self)
+                    s.write(body, self)
                 # write block index
                 logger.debug("Writing %s block" % block.__class__.__name__)
                 if self.version < 0x0303000D:
-                    stream.write(struct.pack(self._byte_order + 'i',
-                                             self._block_index_dct[block]))
+                    body.write(struct.pack(self._byte_order + 'i',
+                                           self._block_index_dct[block]))
                 # write block
-                block.write(stream, self)
+                start = body.tell()
+                block.write(body, self)
+                block_sizes.append(body.tell() - start)
             if self.version < 0x0303000D:
                 s = NifFormat.SizedString()
                 s.set_value("End Of File")
-                s.write(stream, self)
-            ftr.write(stream, self)
+                s.write(body, self)
+            ftr.write(body, self)
+            self.header.block_size.update_size()
+            for i, block_size in enumerate(block_sizes):
+                self.header.block_size[i] = block_size
+            # if verbose >= 2:
+            #    print(hdr)
+
+            # write the file
+            logger.debug("Writing header")
+            # logger.debug("%s" % self.header)
+            hdr = io.BytesIO()
+            self.header.write(hdr, self)
+            with hdr.getbuffer() as hdr_view, body.getbuffer() as body_view:
+                pyffi.utils.write_buffers(stream, [hdr_view, body_view])
 
         def _makeBlockList(
                 self, root, block_index_dct, block_type_list, block_type_dct):
@@ -1598,50 +2025,69 @@ class NifFormat(FileFormat):
                 return (isinstance(block, NifFormat.bhkRefObject)
                         and not isinstance(block, NifFormat.bhkConstraint))
 
-            # block already listed? if so, return
-            if root in self.blocks:
-                return
-            # add block type to block type dictionary
-            block_type = root.__class__.__name__
-            # special case: NiDataStream stores part of data in block type list
-            if block_type == "NiDataStream":
-                block_type = ("NiDataStream\x01%i\x01%i"
-                              % (root.usage, root.access.get_attributes_values(self)))
-            try:
-                block_type_dct[root] = block_type_list.index(block_type)
-            except ValueError:
-                block_type_dct[root] = len(block_type_list)
-                block_type_list.append(block_type)
-
-            # special case: add bhkConstraint entities before bhkConstraint
-            # (these are actually links, not refs)
-            if isinstance(root, NifFormat.bhkConstraint):
-                for entity in root.entities:
-                    if entity is not None:
-                        self._makeBlockList(
-                            entity, block_index_dct, block_type_list, block_type_dct)
-
-            children_left = []
-            # add children that come before the block
-            # store any remaining children in children_left (processed later)
-            for child in root.get_refs(data=self):
-                if _blockChildBeforeParent(child):
-                    self._makeBlockList(
-                        child, block_index_dct, block_type_list, block_type_dct)
+            def _addBlock(block):
+                """Generator which adds the block to the block list, and
+                yields, in order, all blocks that must be added before and
+                after it. The caller adds each yielded block before
+                resuming the generator.
+                """
+                # add block type to block type dictionary
+                block_type = block.__class__.__name__
+                # special case: NiDataStream stores part of data in block type list
+                if block_type == "NiDataStream":
+                    block_type = ("NiDataStream\x01%i\x01%i"
+                                  % (block.usage, block.access.get_attributes_values(self)))
+                try:
+                    block_type_dct[block] = block_type_index[block_type]
+                except KeyError:
+                    block_type_dct[block] = len(block_type_list)
+                    block_type_index[block_type] = len(block_type_list)
+                    block_type_list.append(block_type)
+
+                # special case: add bhkConstraint entities before bhkConstraint
+                # (these are actually links, not refs)
+                if isinstance(block, NifFormat.bhkConstraint):
+                    for entity in block.entities:
+                        if entity is not None:
+                            yield entity
+
+                children_left = []
+                # add children that come before the block
+                # store any remaining children in children_left (processed later)
+                for child in block.get_refs(data=self):
+                    if _blockChildBeforeParent(child):
+                        yield child
+                    else:
+                        children_left.append(child)
+
+                # add the block
+                if self.version >= 0x0303000D:
+                    block_index_dct[block] = len(self.blocks)
                 else:
-                    children_left.append(child)
+                    block_index_dct[block] = id(block)
+                self.blocks.append(block)
 
-            # add the block
-            if self.version >= 0x0303000D:
-                block_index_dct[root] = len(self.blocks)
-            else:
-                block_index_dct[root] = id(root)
-            self.blocks.append(root)
+                # add children that come after the block
+                for child in children_left:
+                    yield child
 
-            # add children that come after the block
-            for child in children_left:
-                self._makeBlockList(
-                    child, block_index_dct, block_type_list, block_type_dct)
+            # maps block type string to its index in block_type_list
+            block_type_index = dict(
+                (block_type, i) for i, block_type in enumerate(block_type_list))
+            # block already listed? if so, return
+            # (block_index_dct has exactly the blocks of self.blocks as keys)
+            if root in block_index_dct:
+                return
+            # walk the tree without recursion, so deep trees cannot hit
+            # the recursion limit
+            stack = [_addBlock(root)]
+            while stack:
+                for block in stack[-1]:
+                    if block not in block_index_dct:
+                        stack.append(_addBlock(block))
+                        break
+                else:
+                    stack.pop()
 
     # extensions of generated structures
 
@@ -4438,50 +4884,34 @@ class NifFormat(FileFormat):
         (1000, 2000, 3000, 0, 0, 1000, 99000, 98000, 0, 92000, 0, 0, 0, 0)
         (4000, 5000, 6000, 0, 1000, 0, 0, 0, 0, 0, 310, 320, 330, 340)
         (1200, 3400, 5600, 1000, 0, 0, 97000, 96000, 0, 94000, 0, 0, 0, 0)
+
+        Set ``NifFormat.NiGeometryData.use_columnar_arrays = True`` to store
+        vertices, normals, vertex colors and uv sets of geometry data created
+        from then on in flat buffers rather than one instance per element,
+        see :class:`pyffi.engines.xml.array.ColumnArray`.
         """
 
+        _columnar_attrs = ("vertices", "normals", "vertex_colors", "uv_sets")
+
         def update_center_radius(self):
             """Recalculate center and radius of the data."""
-            # in case there are no vertices, set center and radius to zero
-            if len(self.vertices) == 0:
-                self.center.x = 0.0
-                self.center.y = 0.0
-                self.center.z = 0.0
-                self.radius = 0.0
-                return
-
-            # find extreme values in x, y, and z direction
-            lowx = min([v.x for v in self.vertices])
-            lowy = min([v.y for v in self.vertices])
-            lowz = min([v.z for v in self.vertices])
-            highx = max([v.x for v in self.vertices])
-            highy = max([v.y for v in self.vertices])
-            highz = max([v.z for v in self.vertices])
-
-            # center is in the center of the bounding box
-            cx = (lowx + highx) * 0.5
-            cy = (lowy + highy) * 0.5
-            cz = (lowz + highz) * 0.5
-            self.center.x = cx
-            self.center.y = cy
-            self.center.z = cz
-
-            # radius is the largest distance from the center
-            r2 = 0.0
-            for v in self.vertices:
-                dx = cx - v.x
-                dy = cy - v.y
-                dz = cz - v.z
-                r2 = max(r2, dx * dx + dy * dy + dz * dz)
-            self.radius = r2 ** 0.5
+            # center is in the center of the bounding box, radius is the
+            # largest distance from the center (in case there are no
+            # vertices, center and radius are zero)
+            geometry = pyffi.utils.geometry
+            (self.center.x, self.center.y, self.center.z), self.radius = (
+                geometry.get_center_radius(
+                    geometry.get_buffer(self.vertices, geometry.VECTOR3), 3))
 
         def apply_scale(self, scale):
             """Apply scale factor on data."""
             if abs(scale - 1.0) < NifFormat.EPSILON: return
-            for v in self.vertices:
-                v.x *= scale
-                v.y *= scale
-                v.z *= scale
+            geometry = pyffi.utils.geometry
+            geometry.set_buffer(
+                self.vertices, geometry.VECTOR3,
+                geometry.scale(
+                    geometry.get_buffer(self.vertices, geometry.VECTOR3),
+                    scale))
             self.center.x *= scale
             self.center.y *= scale
             self.center.z *= scale
@@ -4514,33 +4944,27 @@ class NifFormat(FileFormat):
             :return: A generator yielding a hash value for each vertex.
             """
 
-            verts = self.vertices if self.has_vertices else None
-            norms = self.normals if self.has_normals else None
-            uvsets = self.uv_sets if len(self.uv_sets) else None
-            vcols = self.vertex_colors if self.has_vertex_colors else None
-            vertexfactor = 10 ** vertexprecision
-            normalfactor = 10 ** normalprecision
-            uvfactor = 10 ** uvprecision
-            vcolfactor = 10 ** vcolprecision
-            for i in range(self.num_vertices):
-                h = []
-                if verts:
-                    h.extend([float_to_int(x * vertexfactor)
-                              for x in [verts[i].x, verts[i].y, verts[i].z]])
-                if norms:
-                    h.extend([float_to_int(x * normalfactor)
-                              for x in [norms[i].x, norms[i].y, norms[i].z]])
-                if uvsets:
-                    for uvset in uvsets:
-                        # uvs sometimes have NaN, for example:
-                        # oblivion/meshes/architecture/anvil/anvildooruc01.nif
-                        h.extend([float_to_int(x * uvfactor)
-                                  for x in [uvset[i].u, uvset[i].v]])
-                if vcols:
-                    h.extend([float_to_int(x * vcolfactor)
-                              for x in [vcols[i].r, vcols[i].g,
-                                        vcols[i].b, vcols[i].a]])
-                yield tuple(h)
+            geometry = pyffi.utils.geometry
+            buffers = []
+            if self.has_vertices and len(self.vertices):
+                buffers.append((
+                    geometry.get_buffer(self.vertices, geometry.VECTOR3),
+                    3, 10 ** vertexprecision))
+            if self.has_normals and len(self.normals):
+                buffers.append((
+                    geometry.get_buffer(self.normals, geometry.VECTOR3),
+                    3, 10 ** normalprecision))
+            for uvset in self.uv_sets:
+                # uvs sometimes have NaN, for example:
+                # oblivion/meshes/architecture/anvil/anvildooruc01.nif
+                buffers.append((
+                    geometry.get_buffer(uvset, geometry.TEXCOORD),
+                    2, 10 ** uvprecision))
+            if self.has_vertex_colors and len(self.vertex_colors):
+                buffers.append((
+                    geometry.get_buffer(self.vertex_colors, geometry.COLOR4),
+                    4, 10 ** vcolprecision))
+            return geometry.get_vertex_hashes(self.num_vertices, buffers)
 
     class NiGeometry:
         """
@@ -5758,13 +6182,21 @@ class NifFormat(FileFormat):
             :param follow_all: If C{block_type} is not ``None``, then if this is ``True`` the function will parse the whole tree. Otherwise, the function will not follow branches that start by a non-C{block_type} block.
 
             :param unique: Whether the generator can return the same block twice or not."""
-            # unique blocks: reduce this to the case of non-unique blocks
+            # unique blocks: depth first walk which skips the subtree of
+            # every block that has been visited already
             if unique:
-                block_list = []
-                for block in self.tree(block_type=block_type, follow_all=follow_all, unique=False):
-                    if not block in block_list:
+                visited = set()
+                stack = [self]
+                while stack:
+                    block = stack.pop()
+                    if id(block) in visited:
+                        continue
+                    visited.add(id(block))
+                    if not block_type or isinstance(block, block_type):
                         yield block
-                        block_list.append(block)
+                    elif not follow_all:
+                        continue  # don't recurse further
+                    stack.extend(reversed(list(block.get_refs())))
                 return
 
             # yield self
@@ -5787,11 +6219,11 @@ class NifFormat(FileFormat):
             # will visit some child more than once (and as a consequence, infinitely
             # many times). So, walk the reference tree and check that every block is
             # only visited once.
-            children = []
+            children = set()
             for child in self.tree():
-                if child in children:
+                if id(child) in children:
                     raise ValueError('cyclic references detected')
-                children.append(child)
+                children.add(id(child))
 
         def is_interchangeable(self, other):
             """Are the two blocks interchangeable?
@@ -5807,6 +6239,20 @@ class NifFormat(FileFormat):
                 # for blocks with references: quick check only
                 return self is other
 
+        def get_interchangeable_key(self):
+            """Hashable key such that interchangeable blocks have equal
+            keys, to look up candidates for :meth:`is_interchangeable`
+            without comparing every pair of blocks. Blocks with different
+            keys are never interchangeable.
+
+            :return: The key, or ``None`` if the block is only
+                interchangeable with itself.
+            """
+            if isinstance(self, (NifFormat.NiProperty, NifFormat.NiSourceTexture)):
+                return (self.__class__, self.get_hash())
+            else:
+                return None
+
     class NiMaterialProperty:
         def is_interchangeable(self, other):
             """Are the two material blocks interchangeable?"""
@@ -5822,6 +6268,10 @@ class NifFormat(FileFormat):
                 # ignore name
                 return self.get_hash()[1:] == other.get_hash()[1:]
 
+        def get_interchangeable_key(self):
+            # the name is not always compared, so leave it out
+            return (self.__class__, self.get_hash()[1:])
+
     class ATextureRenderData:
         def save_as_dds(self, stream):
             """Save image as DDS file."""
@@ -6100,6 +6550,16 @@ class NifFormat(FileFormat):
             # looks pretty identical!
             return True
 
+        def get_interchangeable_key(self):
+            # center and radius are compared up to rounding, and
+            # vertices and triangles in any order, so leave these out
+            return (self.__class__,
+                    self.num_vertices, self.keep_flags, self.compress_flags,
+                    self.has_vertices, self.num_uv_sets, self.has_normals,
+                    self.has_vertex_colors, self.has_uv,
+                    self.consistency_flags,
+                    frozenset(self.get_vertex_hash_generator()))
+
         def get_triangle_indices(self, triangles):
             """Yield list of triangle indices (relative to
             self.get_triangles()) of given triangles. Degenerate triangles in
@@ -6987,6 +7447,9 @@ class NifFormat(FileFormat):
         [(0, 2, 1), (1, 2, 3), (2, 4, 3)]
         """
 
+        _columnar_attrs = ("vertices", "normals", "vertex_colors", "uv_sets",
+                           "triangles")
+
         def get_triangles(self):
             return [(t.v_1, t.v_2, t.v_3) for t in self.triangles]
 
@@ -1,4 +1,5 @@
 import codecs
+import concurrent.futures
 import os.path
 import re
 import pyffi
@@ -68,6 +69,11 @@ class FileFormat(object):
     files of the format.
     """
 
+    LAZY_READ = False
+    """Set this to ``True`` if :meth:`Data.read` accepts a *lazy* keyword
+    argument, to read blocks only when they are accessed.
+    """
+
     # precompiled regular expressions, used in name_parts
 
     _RE_NAME_SEP = re.compile('[_\W]+')
@@ -115,6 +121,33 @@ class FileFormat(object):
             """
             raise NotImplementedError
 
+        def get_header_block_types(self):
+            """Names of all block types stored in the data, as far as can be
+            determined from the header alone, that is, after :meth:`inspect`.
+            This allows spells to skip files without reading them.
+
+            Override this method.
+
+            :return: A set of block type names, or ``None`` if the format
+                (or the version of the data) does not list its block types
+                in the header.
+            """
+            return None
+
+        def get_digest(self):
+            """Digest of the content of the data, such that data which
+            would be written identically has equal digests. This allows
+            the toaster to skip writing files that spells did not really
+            change.
+
+            Override this method.
+
+            :return: The digest, or ``None`` if the format does not
+                support digests.
+            :rtype: ``bytes``
+            """
+            return None
+
         def read(self, stream):
             """Read data of particular format from stream.
             Override this method.
@@ -297,4 +330,122 @@ class FileFormat(object):
             try:
                 yield stream
             finally:
-                stream.close()
\ No newline at end of file
+                stream.close()
+
+    @classmethod
+    def read_many(cls, paths, workers=None, mode='read', summary=None,
+                  max_pending=None):
+        """A generator which reads many files in parallel, in a pool of
+        worker processes, and yields ``(path, result)`` for each file, in
+        the order in which the files are finished. The result is the
+        :class:`FileFormat.Data` of the file, or the exception raised
+        while reading it.
+
+        Sending large data back from the workers is expensive, so where
+        only a few values of every file are needed, pass a *summary*
+        function, which is called in the worker with the data as
+        argument: its return value is yielded instead of the data.
+        Without summary, the workers send the data back as a snapshot,
+        see :mod:`pyffi.engines.xml.snapshot`, so this is only possible
+        for xml based formats.
+
+        :param paths: The files to read.
+        :type paths: iterable of ``str``
+        :param workers: Number of worker processes. Defaults to the number
+            of processors. With ``1``, the files are read one by one in
+            the current process.
+        :type workers: ``int``
+        :param mode: ``'read'`` to read the full file, or ``'inspect'``
+            to read the header only.
+        :type mode: ``str``
+        :param summary: Function which computes the result from the data,
+            in the worker process. It must be picklable, that is, defined
+            at module level.
+        :type summary: ``function``
+        :param max_pending: Maximum number of files which are sent to the
+            pool but not yet yielded, to bound memory use. Defaults to
+            twice the number of workers.
+        :type max_pending: ``int``
+        :raise ``ValueError``: If *mode* is invalid, or if the data of
+            this format cannot be sent back from the workers.
+        """
+        if mode not in ('read', 'inspect'):
+            raise ValueError(
+                "mode must be 'read' or 'inspect', not '%s'" % mode)
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 1:
+            for path in paths:
+                yield path, _read_file(cls, path, mode, summary)
+            return
+        # data itself cannot be pickled, so it is sent as a snapshot
+        use_snapshot = summary is None
+        if use_snapshot:
+            import pyffi.engines.xml
+            if not isinstance(cls, pyffi.engines.xml.MetaFileFormat):
+                raise ValueError(
+                    "%s data cannot be sent back from worker processes,"
+                    " pass a summary function or use a single worker"
+                    % cls.__name__)
+            import pyffi.engines.xml.snapshot
+        if max_pending is None:
+            max_pending = 2 * workers
+        paths = iter(paths)
+        pending = {}  # maps future to path
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        try:
+            while True:
+                # keep the pool busy, but do not read ahead too far
+                if len(pending) < max_pending:
+                    for path in paths:
+                        future = executor.submit(
+                            _read_file, cls, path, mode, summary,
+                            use_snapshot)
+                        pending[future] = path
+                        if len(pending) >= max_pending:
+                            break
+                if not pending:
+                    break
+                done, not_done = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    path = pending.pop(future)
+                    try:
+                        result = future.result()
+                        if use_snapshot and isinstance(result, bytes):
+                            result = pyffi.engines.xml.snapshot.loads(result)
+                    except Exception as exc:
+                        # for instance, the result could not be pickled,
+                        # or the snapshot could not be restored
+                        result = exc
+                    yield path, result
+        finally:
+            # the caller may stop early
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+
+def _read_file(format_class, path, mode, summary, use_snapshot=False):
+    """Read a single file for :meth:`FileFormat.read_many`, and return
+    the data, its summary, its snapshot if *use_snapshot* is true, or
+    the exception that was raised.
+    """
+    # workers which are not forked have not imported this yet
+    # (imported here, as importing it at module level is circular)
+    if use_snapshot:
+        import pyffi.engines.xml.snapshot
+    data = format_class.Data()
+    try:
+        with open(path, 'rb') as stream:
+            if mode == 'inspect':
+                data.inspect(stream)
+            else:
+                data.read(stream)
+        if summary is not None:
+            return summary(data)
+        if use_snapshot:
+            return pyffi.engines.xml.snapshot.dumps(data)
+        return data
+    except Exception as exc:
+        return exc
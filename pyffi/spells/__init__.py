@@ -144,14 +144,20 @@ import os  # remove
 import os.path  # getsize, split, join
 import re  # for regex parsing (--skip, --only)
 import shlex  # shlex.split for parsing option lists in ini files
+import shutil  # copymode
+import sqlite3  # Error
 import subprocess
+import sys
 import tempfile
 from configparser import ConfigParser
 from copy import deepcopy
 
 import pyffi  # for pyffi.__version__
 import pyffi.engines  # pyffi.engines.FileFormat
+import pyffi.engines.xml.patch
 import pyffi.object_models
+from pyffi.spells.index import HeaderIndex
+from pyffi.utils.memoryreader import MemoryReader
 
 
 class Spell(object):
@@ -194,6 +200,14 @@ class Spell(object):
     Override this class attribute when subclassing.
     """
 
+    BLOCKTYPES = ()
+    """A ``tuple`` of block types. If not empty, the spell is only cast on
+    files which have a block of one of these types, as far as can be
+    determined from the header, or from the header index. Formats which
+    support this check it in :meth:`datainspect` and :meth:`indexinspect`.
+    Override this class attribute when subclassing.
+    """
+
     def __init__(self, toaster=None, data=None, stream=None):
         """Initialize the spell data.
 
@@ -378,6 +392,54 @@ class Spell(object):
         """
         return True
 
+    @classmethod
+    def indexinspect(cls, toaster, summary):
+        """Called before a file is opened, if the toaster has a header
+        index (see :mod:`pyffi.spells.index`) with an up to date entry for
+        it. If it returns ``False``, then the file is skipped without being
+        opened. The default implementation simply returns ``True``.
+
+        Override this function if :meth:`datainspect` only looks at the
+        header: the same check can then be done here on the index entry.
+
+        :param toaster: The toaster this spell is called from.
+        :type toaster: :class:`Toaster`
+        :param summary: The header information of the file.
+        :type summary: :class:`pyffi.spells.index.HeaderSummary`
+        :return: ``True`` if the file must be processed, ``False`` otherwise.
+        :rtype: ``bool``
+        """
+        return True
+
+    @classmethod
+    def toastcollect(cls, toaster):
+        """Called in a worker process after every file, if the toaster
+        runs more than one job. The worker toasters never call
+        :meth:`toastexit`, so spells which aggregate statistics on the
+        toaster for :meth:`toastexit` must override this function: it
+        returns the statistics gathered since the previous call, and
+        resets them. The result is sent to the main process, so it must
+        be picklable. The default implementation returns ``None``.
+
+        :param toaster: The toaster of the worker process.
+        :type toaster: :class:`Toaster`
+        :return: The statistics, for :meth:`toastmerge`.
+        """
+        return None
+
+    @classmethod
+    def toastmerge(cls, toaster, state):
+        """Called in the main process with the result of
+        :meth:`toastcollect` of a worker process, to add the statistics to
+        those of the toaster before :meth:`toastexit` is called. The
+        default implementation does nothing.
+
+        :param toaster: The toaster this spell is called from.
+        :type toaster: :class:`Toaster`
+        :param state: The result of :meth:`toastcollect`.
+        """
+        pass
+
     @classmethod
     def toastexit(cls, toaster):
         """Called when the toaster has finished processing
@@ -450,6 +512,21 @@ class SpellGroupBase(Spell):
             if spellclass.toastentry(toaster)]
         return bool(cls.ACTIVESPELLCLASSES)
 
+    @classmethod
+    def indexinspect(cls, toaster, summary):
+        return any(spellclass.indexinspect(toaster, summary)
+                   for spellclass in cls.ACTIVESPELLCLASSES)
+
+    @classmethod
+    def toastcollect(cls, toaster):
+        return [spellclass.toastcollect(toaster)
+                for spellclass in cls.ACTIVESPELLCLASSES]
+
+    @classmethod
+    def toastmerge(cls, toaster, state):
+        for spellclass, spellstate in zip(cls.ACTIVESPELLCLASSES, state):
+            spellclass.toastmerge(toaster, spellstate)
+
     @classmethod
     def toastexit(cls, toaster):
         for spellclass in cls.ACTIVESPELLCLASSES:
@@ -551,26 +628,39 @@ class SpellApplyPatch(Spell):
     SPELLNAME = "applypatch"
 
     def datainspect(self):
-        """There is no need to read the whole file, so we apply the patch
-        already at inspection stage, and stop the spell process by returning
-        ``False``.
+        """The patch is applied already at inspection stage, and the spell
+        process is stopped by returning ``False``. Unless an external patch
+        command is given, the file is read, patched block by block (see
+        :mod:`pyffi.engines.xml.patch`), and written to a new file.
     
         :return: ``False``
         :rtype: ``bool``
         """
-        # get the patch command (if there is one)
-        patchcmd = self.toaster.options["patchcmd"]
-        if not patchcmd:
-            raise ValueError("must specify a patch command")
         # first argument is always the stream, by convention
         oldfile = self.stream
         oldfilename = oldfile.name
         newfilename = oldfilename + ".patched"
         patchfilename = oldfilename + ".patch"
+        if not os.path.exists(patchfilename):
+            self.toaster.msg("no patch found")
+            return False
+        # use the external patch command (if there is one)
+        patchcmd = self.toaster.options["patchcmd"]
+        if patchcmd:
+            self.toaster.msg("writing %s..." % newfilename)
+            # close all files before calling external command
+            oldfile.close()
+            subprocess.call(
+                [patchcmd, oldfilename, newfilename, patchfilename])
+            return False
+        # otherwise, apply the patch to the blocks of the file
+        with open(patchfilename, "rb") as patchfile:
+            patch = patchfile.read()
+        self.data.read(oldfile)
+        pyffi.engines.xml.patch.apply(self.data, patch)
         self.toaster.msg("writing %s..." % newfilename)
-        # close all files before calling external command
-        oldfile.close()
-        subprocess.call([patchcmd, oldfilename, newfilename, patchfilename])
+        with open(newfilename, "wb") as newfile:
+            self.data.write(newfile)
 
         # do not go further, spell is done
         return False
@@ -607,37 +697,66 @@ class fake_logger:
         cls.level = level
 
 
-def _toaster_job(args):
-    """For multiprocessing. This function creates a new toaster, with the
-    given options and spells, and calls the toaster on filename.
-    """
+class _multiprocessing_fake_logger(fake_logger):
+    """Simple logger which works well along with multiprocessing on all platforms."""
+
+    @classmethod
+    def _log(cls, level, level_str, msg):
+        # do not actually log, just print
+        if level >= cls.level:
+            print("pyffi.toaster:%i:%s:%s"
+                  % (multiprocessing.current_process().pid,
+                     level_str, msg))
+
 
-    class multiprocessing_fake_logger(fake_logger):
-        """Simple logger which works well along with multiprocessing on all platforms."""
+_worker_toaster = None
+"""The toaster of a worker process, or ``None`` if the spell does not
+apply. Set up by :func:`_toaster_init`."""
 
-        @classmethod
-        def _log(cls, level, level_str, msg):
-            # do not actually log, just print
-            if level >= cls.level:
-                print("pyffi.toaster:%i:%s:%s"
-                      % (multiprocessing.current_process().pid,
-                         level_str, msg))
 
-    toasterclass, filename, options, spellnames = args
+def _toaster_init(toasterclass, options, spellnames):
+    """For multiprocessing. This function creates a new toaster, with the
+    given options and spells, once for every worker process.
+    """
+    global _worker_toaster
     toaster = toasterclass(options=options, spellnames=spellnames,
-                           logger=multiprocessing_fake_logger)
+                           logger=_multiprocessing_fake_logger)
 
     # toast entry code
     if not toaster.spellclass.toastentry(toaster):
         print("pyffi.toaster:%s" % "Spell does not apply! quiting early...")
         return
 
-    # toast single file
-    stream = open(filename, mode='rb' if toaster.spellclass.READONLY else 'r+b')
-    toaster._toast(stream)
+    if options["index"]:
+        toaster.index = HeaderIndex(options["index"])
+    _worker_toaster = toaster
+
 
-    # toast exit code
-    toaster.spellclass.toastexit(toaster)
+def _toaster_job(filename):
+    """For multiprocessing. This function calls the toaster of the worker
+    process on filename, and returns the files done, skipped, and failed,
+    and the statistics of the spell (see :meth:`Spell.toastcollect`), for
+    the parent process to aggregate.
+    """
+    toaster = _worker_toaster
+    if toaster is None:
+        return None
+    toaster.files_done = {}
+    toaster.files_skipped = set()
+    toaster.files_failed = set()
+
+    # toast single file
+    with open(filename, mode='rb' if toaster.spellclass.READONLY else 'r+b') as stream:
+        toaster._toast(stream)
+    if toaster.index is not None:
+        try:
+            toaster.index.commit()
+        except sqlite3.Error as exc:
+            toaster.logger.warn("could not update index: %s" % exc)
+    if toaster.options["gccollect"]:
+        gc.collect()
+    return (toaster.files_done, toaster.files_skipped, toaster.files_failed,
+            toaster.spellclass.toastcollect(toaster))
 
 
 # CPU_COUNT is used for default number of jobs
@@ -678,9 +797,10 @@ class Toaster(object):
         series=False,
         skip=[], only=[],
         jobs=CPU_COUNT, refresh=32,
+        lazy=False, index="",
         sourcedir="", destdir="",
         archives=False,
-        resume=False,
+        resume=False, skipunchanged=False,
         gccollect=False,
         inifile="")
     """List of spell classes of the particular :class:`Toaster` instance."""
@@ -712,6 +832,10 @@ class Toaster(object):
     skip_regexs = []
     """Tuple of regular expressions corresponding to the skip key of :attr:`options`."""
 
+    index = None
+    """The :class:`pyffi.spells.index.HeaderIndex` corresponding to the index
+    key of :attr:`options`, while toasting, or ``None``."""
+
     def __init__(self, spellclass=None, options=None, spellnames=None,
                  logger=None):
         """Initialize the toaster.
@@ -940,13 +1064,14 @@ class Toaster(object):
             "--diff", dest="createpatch",
             action="store_true",
             help=
-            "write a binary patch"
+            "write a patch, which records the changed blocks,"
             " instead of overwriting the original")
         parser.add_option(
             "--diff-cmd", dest="diffcmd",
             type="string",
             metavar="CMD",
-            help="use CMD as diff command; this command must accept precisely"
+            help="use CMD as diff command, instead of recording the changed"
+                 " blocks; this command must accept precisely"
                  " 3 arguments: 'CMD oldfile newfile patchfile'.")
         parser.add_option(
             "--dry-run", dest="dryrun",
@@ -972,6 +1097,14 @@ class Toaster(object):
                  " not specified, then all block types are included except"
                  " those specified under --exclude; include multiple block"
                  " types by specifying this option more than once")
+        parser.add_option(
+            "--index", dest="index",
+            type="string",
+            metavar="FILE",
+            help="keep the header of every toasted file in the index FILE,"
+                 " and skip files which the spell does not apply to without"
+                 " opening them, if they have not changed since they were"
+                 " indexed")
         parser.add_option(
             "--ini-file", dest="inifile",
             type="string",
@@ -987,6 +1120,11 @@ class Toaster(object):
             type="int",
             metavar="JOBS",
             help="allow JOBS jobs at once [default: %default]")
+        parser.add_option(
+            "--lazy", dest="lazy",
+            action="store_true",
+            help="read blocks only when the spell accesses them,"
+                 " if the file format supports it (nif 20.2.0.7 and up)")
         parser.add_option(
             "--noninteractive", dest="interactive",
             action="store_false",
@@ -1007,12 +1145,13 @@ class Toaster(object):
         parser.add_option(
             "--patch", dest="applypatch",
             action="store_true",
-            help="apply all binary patches")
+            help="apply all patches")
         parser.add_option(
             "--patch-cmd", dest="patchcmd",
             type="string",
             metavar="CMD",
-            help="use CMD as patch command; this command must accept precisely "
+            help="use CMD as patch command, for patches made with --diff-cmd;"
+                 " this command must accept precisely "
                  "3 arguments: 'CMD oldfile newfile patchfile'.""")
         parser.add_option(
             "-p", "--pause", dest="pause",
@@ -1032,8 +1171,8 @@ class Toaster(object):
             "--refresh", dest="refresh",
             type="int",
             metavar="REFRESH",
-            help="start new process pool every JOBS * REFRESH files"
-                 " if JOBS is 2 or more"
+            help="start a new worker process every REFRESH files"
+                 " if JOBS is 2 or more, on Python 3.11 and up"
                  " (when processing a large number of files, this prevents"
                  " leaking memory on some operating systems) [default: %default]")
         parser.add_option(
@@ -1052,6 +1191,12 @@ class Toaster(object):
             help="skip all files whose names contain the regular expression REGEX"
                  " (takes precedence over --only);"
                  " if specified multiple times, the expressions are 'ored'")
+        parser.add_option(
+            "--skip-unchanged", dest="skipunchanged",
+            action="store_true",
+            help="do not write files whose content the spells did not change,"
+                 " even if they report a change, if the file format supports"
+                 " digests")
         parser.add_option(
             "--source-dir", dest="sourcedir",
             type="string",
@@ -1177,25 +1322,6 @@ class Toaster(object):
         :type top: str
         """
 
-        def file_pools(chunksize):
-            """Helper function which generates list of files, sorted by size,
-            in chunks of given size.
-            """
-            all_files = pyffi.utils.walk(
-                top, onerror=None,
-                re_filename=self.FILEFORMAT.RE_FILENAME)
-            while True:
-                # fetch chunksize files from all files
-                file_pool = [
-                    filename for i, filename in zip(
-                        range(chunksize), all_files)]
-                if not file_pool:
-                    # done!
-                    break
-                # sort files by size
-                file_pool.sort(key=os.path.getsize, reverse=True)
-                yield file_pool
-
         # toast entry code
         if not self.spellclass.toastentry(self):
             self.msg("spell does not apply! quiting early...")
@@ -1252,27 +1378,48 @@ class Toaster(object):
                     input("Press enter...")
                 return
 
+        if self.options.get("index"):
+            self.index = HeaderIndex(self.options["index"])
+
         # walk over all streams, and create a data instance for each of them
         # inspect the file but do not yet read in full
         if jobs == 1:
-            for stream in self.FILEFORMAT.walk(top, mode='rb' if self.spellclass.READONLY else 'r+b'):
-                self._toast(stream)
+            for filename in pyffi.utils.walk(
+                    top, onerror=None,
+                    re_filename=self.FILEFORMAT.RE_FILENAME):
+                if not self._indexinspect(filename):
+                    continue
+                with open(filename, mode='rb' if self.spellclass.READONLY else 'r+b') as stream:
+                    self._toast(stream)
                 if self.options["gccollect"]:
                     # force free memory (helps when parsing many files)
                     gc.collect()
         else:
-            chunksize = self.options["refresh"] * self.options["jobs"]
-            self.msg("toasting with %i threads in chunks of %i files"
-                     % (jobs, chunksize))
-            for file_pool in file_pools(chunksize):
-                self.logger.debug("process file pool:")
-                for filename in file_pool:
-                    self.logger.debug("  " + filename)
-                with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
-                    list(executor.map(
-                        _toaster_job,
-                        ((self.__class__, filename, self.options, self.spellnames)
-                         for filename in file_pool)))
+            # largest files first, so no worker is left with a single
+            # huge file at the end while all others are idle
+            all_files = [
+                filename for filename in pyffi.utils.walk(
+                    top, onerror=None,
+                    re_filename=self.FILEFORMAT.RE_FILENAME)
+                if self._indexinspect(filename)]
+            all_files.sort(key=os.path.getsize, reverse=True)
+            self.msg("toasting %i files with %i processes"
+                     % (len(all_files), jobs))
+            # workers take the next file as soon as they are done, and
+            # results are sent back for toastexit
+            with self._get_executor(jobs) as executor:
+                for result in executor.map(_toaster_job, all_files):
+                    if result is not None:
+                        files_done, files_skipped, files_failed, state = \
+                            result
+                        self.files_done.update(files_done)
+                        self.files_skipped |= files_skipped
+                        self.files_failed |= files_failed
+                        self.spellclass.toastmerge(self, state)
+
+        if self.index is not None:
+            self.index.close()
+            self.index = None
 
         # toast exit code
         self.spellclass.toastexit(self)
@@ -1307,6 +1454,55 @@ class Toaster(object):
                     archive_out.close()
                 archive_in.close()
 
+    def _get_executor(self, jobs):
+        """Create the process pool for toasting with multiple jobs.
+        Every worker sets up its toaster once, and where supported,
+        is replaced after ``refresh`` files to avoid leaking memory.
+        Used as helper function.
+        """
+        kwargs = {}
+        if (sys.version_info < (3, 11) and self.options["refresh"]
+                != self.DEFAULT_OPTIONS["refresh"]):
+            self.logger.warn(
+                "--refresh is ignored on Python versions before 3.11")
+        if sys.version_info >= (3, 11) and self.options["refresh"] > 0:
+            # max_tasks_per_child cannot be used with fork
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                method = "forkserver"
+            else:
+                method = "spawn"
+            kwargs.update(
+                max_tasks_per_child=self.options["refresh"],
+                mp_context=multiprocessing.get_context(method))
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs, initializer=_toaster_init,
+            initargs=(self.__class__, self.options, self.spellnames),
+            **kwargs)
+
+    def _indexinspect(self, filename):
+        """Check the index entry of a file, if there is one, to see
+        whether the file must be toasted at all.
+        Used as helper function.
+        """
+        if self.index is None:
+            return True
+        summary = self.index.get(filename)
+        if summary is None or self.spellclass.indexinspect(self, summary):
+            return True
+        self.msg("=== %s (skipped by index) ===" % filename)
+        self.files_skipped.add(filename)
+        return False
+
+    def _indexupdate(self, filename, data):
+        """Store the header of an inspected file in the index. Errors of
+        the index are logged, but do not make the file fail.
+        Used as helper function.
+        """
+        try:
+            self.index.update(filename, data)
+        except sqlite3.Error as exc:
+            self.logger.warn("could not update index: %s" % exc)
+
     def _toast(self, stream):
         """Run toaster on particular stream and data.
         Used as helper function.
@@ -1329,6 +1525,8 @@ class Toaster(object):
         try:
             # inspect the file (reads only the header)
             data.inspect(stream)
+            if self.index is not None:
+                self._indexupdate(stream.name, data)
 
             # create spell instance
             spell = self.spellclass(toaster=self, data=data, stream=stream)
@@ -1336,7 +1534,28 @@ class Toaster(object):
             # inspect the spell instance
             if spell._datainspect() and spell.datainspect():
                 # read the full file
-                data.read(stream)
+                if self.options["lazy"] and self.FILEFORMAT.LAZY_READ:
+                    data.read(stream, lazy=True)
+                else:
+                    # parse from memory, the stream is still used for
+                    # writing the result
+                    data.read(MemoryReader.from_stream(stream))
+
+                # digest of the data as read, to check whether the spell
+                # really changed it
+                if (self.options["skipunchanged"]
+                        and not self.spellclass.READONLY):
+                    digest = data.get_digest()
+                else:
+                    digest = None
+
+                # state of the data as read, to create a patch against
+                if (self.options["createpatch"]
+                        and not self.options["diffcmd"]
+                        and not self.spellclass.READONLY):
+                    patch_base = pyffi.engines.xml.patch.PatchBase(data)
+                else:
+                    patch_base = None
 
                 # cast the spell on the data tree
                 spell.recurse()
@@ -1344,8 +1563,10 @@ class Toaster(object):
                 # save file back to disk if not readonly and the spell
                 # changed the file
                 if (not self.spellclass.READONLY) and spell.changed:
-                    if self.options["createpatch"]:
-                        self.writepatch(stream, data)
+                    if digest is not None and data.get_digest() == digest:
+                        self.msg("content unchanged, not writing")
+                    elif self.options["createpatch"]:
+                        self.writepatch(stream, data, patch_base)
                     else:
                         self.write(stream, data)
             self.files_done[stream.name] = spell.reports
@@ -1433,43 +1654,87 @@ class Toaster(object):
 
     def write(self, stream, data):
         """Writes the data to data and raises an exception if the
-        write fails, but restores file if fails on overwrite.
+        write fails. When the original file is overwritten, the data is
+        first written to a temporary file in the same folder, which then
+        replaces the original file, so the original file is left intact
+        if the write fails.
         """
+        if not self.options["dryrun"]:
+            head, root, ext = self.get_toast_head_root_ext(stream.name)
+            filename = os.path.join(head, root + ext)
+            if (os.path.exists(filename) and os.path.exists(stream.name)
+                    and os.path.samefile(filename, stream.name)):
+                self._write_replace(stream, data)
+                return
         outstream = self.spellclass.get_toast_stream(self, stream.name)
-        if stream is outstream:
-            # make backup
-            stream.seek(0)
-            backup = stream.read(-1)
-            stream.seek(0)
         try:
             try:
                 data.write(outstream)
             except:  # not just Exception, also CTRL-C
                 self.msg("write failed!!!")
-                if stream is outstream:
-                    self.msg("attempting to restore original file...")
-                    stream.seek(0)
-                    stream.write(backup)
-                    stream.truncate()
-                else:
-                    outstream_name = outstream.name
-                    self.msg("removing incompletely written file...")
-                    outstream.close()
-                    # temporary streams are removed on close
-                    # so check if it exists before removing
-                    if os.path.exists(outstream_name):
-                        os.remove(outstream_name)
+                outstream_name = outstream.name
+                self.msg("removing incompletely written file...")
+                outstream.close()
+                # temporary streams are removed on close
+                # so check if it exists before removing
+                if os.path.exists(outstream_name):
+                    os.remove(outstream_name)
                 raise
-            if stream is outstream:
-                stream.truncate()
         finally:
             outstream.close()
 
-    def writepatch(self, stream, data):
-        """Creates a binary patch for the updated file."""
+    def _write_replace(self, stream, data):
+        """Overwrite the file of the stream by writing the data to a
+        temporary file, and atomically renaming it to the file.
+        Used as helper function.
+        """
+        filename = stream.name
+        self.msg("overwriting %s" % filename)
+        head, tail = os.path.split(filename)
+        fd, tmpfilename = tempfile.mkstemp(
+            prefix=tail + ".", suffix=".tmp", dir=head or None)
+        try:
+            with os.fdopen(fd, "wb") as outstream:
+                data.write(outstream)
+            shutil.copymode(filename, tmpfilename)
+            # the original file cannot be replaced while it is open on
+            # windows; lazily read data has been written at this point
+            stream.close()
+            os.replace(tmpfilename, filename)
+        except:  # not just Exception, also CTRL-C
+            self.msg("write failed!!!")
+            self.msg("original file left untouched")
+            if os.path.exists(tmpfilename):
+                os.remove(tmpfilename)
+            raise
+
+    def writepatch(self, stream, data, patch_base=None):
+        """Creates a patch for the updated file, next to where the file
+        would be written. Without a diff command, the patch is made from
+        *patch_base*, the state of the data as read (see
+        :mod:`pyffi.engines.xml.patch`), and only records the blocks that
+        changed. Otherwise, the updated file is written to a temporary
+        file, and the diff command creates a binary patch from it.
+        """
         diffcmd = self.options.get('diffcmd')
         if not diffcmd:
-            raise ValueError("must specify a diff command")
+            if patch_base is None:
+                raise ValueError("must specify a diff command")
+            patch = pyffi.engines.xml.patch.dumps(data, patch_base)
+            if self.options["dryrun"]:
+                self.msg("writing to temporary file")
+                patchfile = tempfile.TemporaryFile()
+            else:
+                head, root, ext = self.get_toast_head_root_ext(stream.name)
+                if head and not os.path.exists(head):
+                    self.logger.info("creating destination path %s" % head)
+                    os.makedirs(head)
+                patchfilename = os.path.join(head, root + ext + ".patch")
+                self.msg("writing %s" % patchfilename)
+                patchfile = open(patchfilename, "wb")
+            with patchfile:
+                patchfile.write(patch)
+            return
 
         # create a temporary file that won't get deleted when closed
         self.options["suffix"] = ".tmp"
@@ -1482,7 +1747,8 @@ class Toaster(object):
         # use external diff command
         oldfile = stream
         oldfilename = oldfile.name
-        patchfilename = newfile.name[:-4] + ".patch"
+        newfilename = newfile.name
+        patchfilename = newfilename[:-4] + ".patch"
         # close all files before calling external command
         oldfile.close()
         newfile.close()
@@ -64,6 +64,20 @@ class CgfSpell(pyffi.spells.Spell):
         return any(self.toaster.is_admissible_branch_class(header_type)
                    for header_type in self.data.chunk_table.get_chunk_types())
 
+    def datainspect(self):
+        # only run the spell if there are chunks of the right type
+        return (not self.BLOCKTYPES
+                or any(self.inspectblocktype(block_type)
+                       for block_type in self.BLOCKTYPES))
+
+    @classmethod
+    def indexinspect(cls, toaster, summary):
+        # same check as datainspect, but on the index entry
+        if not cls.BLOCKTYPES or summary.block_types is None:
+            return True
+        return any(block_type.__name__ in summary.block_types
+                   for block_type in cls.BLOCKTYPES)
+
     def inspectblocktype(self, block_type):
         """This function heuristically checks whether the given block type
         is used in the cgf file, using header information only. When in doubt,
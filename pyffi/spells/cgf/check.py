@@ -90,9 +90,7 @@ class SpellCheckTangentSpace(CgfSpell):
 
     SPELLNAME = "check_tangentspace"
     SENSITIVITY = 0.1  # admissible float error (relative to one)
-
-    def datainspect(self):
-        return self.inspectblocktype(CgfFormat.MeshChunk)
+    BLOCKTYPES = (CgfFormat.MeshChunk,)
 
     def branchinspect(self, branch):
         return isinstance(branch, (CgfFormat.MeshChunk, CgfFormat.NodeChunk))
@@ -189,9 +187,7 @@ class SpellCheckHasVertexColors(CgfSpell):
     # example: farcry/FCData/Objects/Buildings/M03/compound_area/coa_instantshelter_door_cloth.cgf
 
     SPELLNAME = "check_vcols"
-
-    def datainspect(self):
-        return self.inspectblocktype(CgfFormat.MeshChunk)
+    BLOCKTYPES = (CgfFormat.MeshChunk,)
 
     def branchinspect(self, branch):
         return isinstance(branch, (CgfFormat.MeshChunk, CgfFormat.NodeChunk))
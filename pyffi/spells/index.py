@@ -0,0 +1,165 @@
+"""A persistent index of file headers, so toasters can skip files
+without opening them.
+
+For every file that has been inspected, the index stores its path,
+modification time and size, along with the version, user version, and
+block types found in its header. On later runs, :class:`HeaderIndex.get`
+returns this summary as long as the file is unchanged on disk, and
+:meth:`pyffi.spells.Spell.indexinspect` decides from it whether the file
+must be processed at all.
+
+>>> import os, tempfile
+>>> from pyffi.object_models import FileFormat
+>>> class Data(FileFormat.Data):
+...     version = 0x14020007
+...     user_version = 11
+...     def get_header_block_types(self):
+...         return set(["NiNode", "NiTriShape"])
+>>> fd, filename = tempfile.mkstemp()
+>>> os.close(fd)
+>>> index = HeaderIndex(":memory:")
+>>> index.get(filename) is None
+True
+>>> index.update(filename, Data())
+>>> summary = index.get(filename)
+>>> hex(summary.version), summary.user_version, sorted(summary.block_types)
+('0x14020007', 11, ['NiNode', 'NiTriShape'])
+>>> with open(filename, "wb") as stream:
+...     stream.write(b"changed") # doctest: +ELLIPSIS
+7
+>>> index.get(filename) is None
+True
+>>> index.close()
+>>> os.remove(filename)
+"""
+
+# ------------------------------------------------------------------------
+#  ***** BEGIN LICENSE BLOCK *****
+#
+#  Copyright © 2007-2019, Python File Format Interface.
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#
+#     * Redistributions in binary form must reproduce the above
+#       copyright notice, this list of conditions and the following
+#       disclaimer in the documentation and/or other materials provided
+#       with the distribution.
+#
+#     * Neither the name of the Python File Format Interface
+#       project nor the names of its contributors may be used to endorse
+#       or promote products derived from this software without specific
+#       prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+#  LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+#
+#  ***** END LICENSE BLOCK *****
+# ------------------------------------------------------------------------
+
+import collections
+import os
+import sqlite3
+
+HeaderSummary = collections.namedtuple(
+    "HeaderSummary", "version user_version block_types")
+"""Header information of a file, as stored in the index. The
+*block_types* field is a ``frozenset`` of block type names, or ``None``
+if the header does not list them.
+"""
+
+
+class HeaderIndex(object):
+    """An sqlite database mapping file paths to :class:`HeaderSummary`
+    instances. Entries are only returned if the modification time and size
+    of the file still match those recorded when the entry was stored.
+    """
+
+    def __init__(self, filename):
+        """Open the index, creating it if it does not exist yet.
+
+        :param filename: The database file, or ``":memory:"``.
+        :type filename: ``str``
+        """
+        self.connection = sqlite3.connect(filename)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS header ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, "
+            "version INTEGER, user_version INTEGER, block_types TEXT)")
+
+    @staticmethod
+    def _stat(filename):
+        """Return normalized path, modification time, and size of the
+        file, or ``None`` if it cannot be found on disk (for instance,
+        for files inside archives).
+        """
+        try:
+            stat = os.stat(filename)
+        except (OSError, TypeError):
+            return None
+        return os.path.abspath(filename), stat.st_mtime_ns, stat.st_size
+
+    def get(self, filename):
+        """Look up the header summary of a file.
+
+        :param filename: The file to look up.
+        :type filename: ``str``
+        :return: The summary, or ``None`` if the file is not indexed or has
+            changed since it was indexed.
+        :rtype: :class:`HeaderSummary`
+        """
+        key = self._stat(filename)
+        if key is None:
+            return None
+        row = self.connection.execute(
+            "SELECT version, user_version, block_types FROM header "
+            "WHERE path = ? AND mtime_ns = ? AND size = ?", key).fetchone()
+        if row is None:
+            return None
+        version, user_version, block_types = row
+        if block_types is not None:
+            block_types = frozenset(block_types.split())
+        return HeaderSummary(version, user_version, block_types)
+
+    def update(self, filename, data):
+        """Store the header summary of a file. The data must have been
+        inspected.
+
+        :param filename: The file from which the data was inspected.
+        :type filename: ``str``
+        :param data: The inspected data.
+        :type data: :class:`pyffi.object_models.FileFormat.Data`
+        """
+        key = self._stat(filename)
+        if key is None:
+            return
+        block_types = data.get_header_block_types()
+        if block_types is not None:
+            block_types = " ".join(sorted(block_types))
+        self.connection.execute(
+            "INSERT OR REPLACE INTO header VALUES (?, ?, ?, ?, ?, ?)",
+            key + (data.version, data.user_version, block_types))
+
+    def commit(self):
+        """Commit all updates, so they become visible to other processes."""
+        self.connection.commit()
+
+    def close(self):
+        """Commit all updates and close the index."""
+        self.connection.commit()
+        self.connection.close()
@@ -83,6 +83,53 @@ class NifSpell(pyffi.spells.Spell):
         return any(self.toaster.is_admissible_branch_class(header_type)
                    for header_type in self.header_types)
 
+    def datainspect(self):
+        # only run the spell if there are blocks of the right type
+        return (not self.BLOCKTYPES
+                or any(self.inspectblocktype(block_type)
+                       for block_type in self.BLOCKTYPES))
+
+    @classmethod
+    def indexinspect(cls, toaster, summary):
+        # same checks as _datainspect and datainspect, but on the index
+        # entry
+        if cls.BLOCKTYPES and not any(
+                cls.indexblocktype(summary, block_type)
+                for block_type in cls.BLOCKTYPES):
+            return False
+        if not toaster.include_types and not toaster.exclude_types:
+            return True
+        if not summary.block_types:
+            return True
+        # when in doubt about unknown block types, toast the file
+        return any(
+            block_class is None
+            or toaster.is_admissible_branch_class(block_class)
+            for block_class in (getattr(NifFormat, block_type, None)
+                                for block_type in summary.block_types))
+
+    @staticmethod
+    def indexblocktype(summary, block_type):
+        """Like :meth:`inspectblocktype`, but using an index entry instead
+        of the header of the nif.
+
+        :param summary: The header information of the file.
+        :type summary: :class:`pyffi.spells.index.HeaderSummary`
+        :param block_type: The block type.
+        :type block_type: :class:`NifFormat.NiObject`
+        :return: ``False`` if the nif has no block of the given type,
+            with certainty. ``True`` otherwise.
+        :rtype: ``bool``
+        """
+        if not summary.block_types:
+            return True
+        # when in doubt about unknown block types, return True
+        return any(header_class is None
+                   or issubclass(header_class, block_type)
+                   for header_class in (
+                       getattr(NifFormat, header_type, None)
+                       for header_type in summary.block_types))
+
     def inspectblocktype(self, block_type):
         """This function heuristically checks whether the given block type
         is used in the NIF file, using header information only. When in doubt,
@@ -109,9 +156,8 @@ class SpellVisitSkeletonRoots(NifSpell):
     Override the skelrootentry method with your implementation.
     """
 
-    def datainspect(self):
-        # only run the spell if there are skinned geometries
-        return self.inspectblocktype(NifFormat.NiSkinInstance)
+    # only run the spell if there are skinned geometries
+    BLOCKTYPES = (NifFormat.NiSkinInstance,)
 
     def dataentry(self):
         # make list of skeleton roots
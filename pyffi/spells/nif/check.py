@@ -45,6 +45,7 @@ from contextlib import closing
 from itertools import repeat
 
 import pyffi.spells.nif
+import pyffi.utils.geometry  # for check_centerradius
 import pyffi.utils.tristrip  # for check_tristrip
 from pyffi.formats.nif import NifFormat
 
@@ -105,20 +106,31 @@ class SpellNodeNamesByFlag(pyffi.spells.nif.NifSpell):
     of which node names where used with particular flags."""
 
     SPELLNAME = "check_nodenamesbyflag"
+    BLOCKTYPES = (NifFormat.NiNode,)
 
     @classmethod
     def toastentry(cls, toaster):
         toaster.flagdict = {}
         return True
 
+    @classmethod
+    def toastcollect(cls, toaster):
+        flagdict = toaster.flagdict
+        toaster.flagdict = {}
+        return flagdict
+
+    @classmethod
+    def toastmerge(cls, toaster, state):
+        for flag, names in state.items():
+            flagnames = toaster.flagdict.setdefault(flag, [])
+            flagnames.extend(name for name in names
+                             if name not in flagnames)
+
     @classmethod
     def toastexit(cls, toaster):
         for flag, names in toaster.flagdict.items():
             toaster.msg("%s %s" % (flag, names))
 
-    def datainspect(self):
-        return self.inspectblocktype(NifFormat.NiNode)
-
     def branchinspect(self, branch):
         # stick to main tree
         return isinstance(branch, NifFormat.NiAVObject)
@@ -138,6 +150,7 @@ class SpellCompareSkinData(pyffi.spells.nif.NifSpell):
     """This spell compares skinning data with a reference nif."""
 
     SPELLNAME = "check_compareskindata"
+    BLOCKTYPES = (NifFormat.NiSkinData,)
 
     # helper functions (to compare with custom tolerance)
 
@@ -182,9 +195,6 @@ class SpellCompareSkinData(pyffi.spells.nif.NifSpell):
         # only apply spell if the reference nif has bone data
         return bool(toaster.refbonedata)
 
-    def datainspect(self):
-        return self.inspectblocktype(NifFormat.NiSkinData)
-
     def branchinspect(self, branch):
         # stick to main tree
         return isinstance(branch, NifFormat.NiAVObject)
@@ -289,9 +299,7 @@ class SpellCheckBhkBodyCenter(pyffi.spells.nif.NifSpell):
     """
 
     SPELLNAME = "check_bhkbodycenter"
-
-    def datainspect(self):
-        return self.inspectblocktype(NifFormat.bhkRigidBody)
+    BLOCKTYPES = (NifFormat.bhkRigidBody,)
 
     def branchinspect(self, branch):
         return isinstance(branch, (NifFormat.NiAVObject,
@@ -369,9 +377,7 @@ class SpellCheckCenterRadius(pyffi.spells.nif.NifSpell):
     # zoo tycoon 2: mostly ok (except *_Adult_*.nif files)
 
     SPELLNAME = "check_centerradius"
-
-    def datainspect(self):
-        return self.inspectblocktype(NifFormat.NiGeometry)
+    BLOCKTYPES = (NifFormat.NiGeometry,)
 
     def branchinspect(self, branch):
         return isinstance(branch, (NifFormat.NiAVObject,
@@ -392,13 +398,11 @@ class SpellCheckCenterRadius(pyffi.spells.nif.NifSpell):
             radius = branch.radius
 
             self.toaster.msg("checking that all vertices are inside")
-            maxr = 0.0
-            maxv = None
-            for vert in branch.vertices:
-                dist = vert - center
-                if dist * dist > maxr:
-                    maxr = dist * dist
-                    maxv = vert
+            maxi, maxr = pyffi.utils.geometry.get_farthest_point(
+                pyffi.utils.geometry.get_buffer(
+                    branch.vertices, pyffi.utils.geometry.VECTOR3),
+                3, center.as_tuple())
+            maxv = branch.vertices[maxi] if maxi is not None else None
             maxr = maxr ** 0.5
 
             if maxr > 1.01 * radius + 0.01:
@@ -440,9 +444,7 @@ class SpellCheckSkinCenterRadius(pyffi.spells.nif.NifSpell):
     """
 
     SPELLNAME = "check_skincenterradius"
-
-    def datainspect(self):
-        return self.inspectblocktype(NifFormat.NiSkinData)
+    BLOCKTYPES = (NifFormat.NiSkinData,)
 
     def branchinspect(self, branch):
         return isinstance(branch, (NifFormat.NiAVObject,
@@ -485,9 +487,7 @@ class SpellCheckConvexVerticesShape(pyffi.spells.nif.NifSpell):
     three planes.
     """
     SPELLNAME = "check_convexverticesshape"
-
-    def datainspect(self):
-        return self.inspectblocktype(NifFormat.bhkConvexVerticesShape)
+    BLOCKTYPES = (NifFormat.bhkConvexVerticesShape,)
 
     def branchinspect(self, branch):
         return isinstance(branch, (NifFormat.NiAVObject,
@@ -537,9 +537,7 @@ class SpellCheckMopp(pyffi.spells.nif.NifSpell):
     Mainly useful to check the heuristic parser and for debugging mopp codes.
     """
     SPELLNAME = "check_mopp"
-
-    def datainspect(self):
-        return self.inspectblocktype(NifFormat.bhkMoppBvTreeShape)
+    BLOCKTYPES = (NifFormat.bhkMoppBvTreeShape,)
 
     def branchinspect(self, branch):
         return isinstance(branch, (NifFormat.NiAVObject,
@@ -621,9 +619,7 @@ class SpellCheckTangentSpace(pyffi.spells.nif.NifSpell):
     """
     SPELLNAME = 'check_tangentspace'
     PRECISION = 0.3  #: Difference between values worth warning about.
-
-    def datainspect(self):
-        return self.inspectblocktype(NifFormat.NiTriBasedGeom)
+    BLOCKTYPES = (NifFormat.NiTriBasedGeom,)
 
     def branchinspect(self, branch):
         return isinstance(branch, NifFormat.NiAVObject)
@@ -701,21 +697,29 @@ class SpellCheckTriStrip(pyffi.spells.nif.NifSpell):
     various stripification algorithms over a large collection of geometries).
     """
     SPELLNAME = 'check_tristrip'
+    BLOCKTYPES = (NifFormat.NiTriBasedGeomData,)
 
     @classmethod
     def toastentry(cls, toaster):
         toaster.striplengths = []
         return True
 
+    @classmethod
+    def toastcollect(cls, toaster):
+        striplengths = toaster.striplengths
+        toaster.striplengths = []
+        return striplengths
+
+    @classmethod
+    def toastmerge(cls, toaster, state):
+        toaster.striplengths.extend(state)
+
     @classmethod
     def toastexit(cls, toaster):
         toaster.msg("average strip length = %.6f"
                     % (sum(toaster.striplengths)
                        / float(len(toaster.striplengths))))
 
-    def datainspect(self):
-        return self.inspectblocktype(NifFormat.NiTriBasedGeomData)
-
     def branchinspect(self, branch):
         return isinstance(branch, (NifFormat.NiAVObject,
                                    NifFormat.NiTriBasedGeomData))
@@ -817,6 +821,29 @@ class SpellCheckVersion(pyffi.spells.nif.NifSpell):
         toaster.user_version_2s = {}  # tracks used user version2's per version
         return True
 
+    @classmethod
+    def toastcollect(cls, toaster):
+        state = (toaster.versions, toaster.user_versions,
+                 toaster.user_version_2s)
+        cls.toastentry(toaster)
+        return state
+
+    @classmethod
+    def toastmerge(cls, toaster, state):
+        versions, user_versions, user_version_2s = state
+        for version, num_nifs in versions.items():
+            if version not in toaster.versions:
+                toaster.versions[version] = 0
+                toaster.user_versions[version] = []
+                toaster.user_version_2s[version] = []
+            toaster.versions[version] += num_nifs
+            for user_version in user_versions[version]:
+                if user_version not in toaster.user_versions[version]:
+                    toaster.user_versions[version].append(user_version)
+            for user_version_2 in user_version_2s[version]:
+                if user_version_2 not in toaster.user_version_2s[version]:
+                    toaster.user_version_2s[version].append(user_version_2)
+
     @classmethod
     def toastexit(cls, toaster):
         for version in toaster.versions:
@@ -852,10 +879,7 @@ class SpellCheckMaterialEmissiveValue(pyffi.spells.nif.NifSpell):
     """Check (and warn) about potentially bad material emissive values."""
 
     SPELLNAME = "check_materialemissivevalue"
-
-    def datainspect(self):
-        # only run the spell if there are material property blocks
-        return self.inspectblocktype(NifFormat.NiMaterialProperty)
+    BLOCKTYPES = (NifFormat.NiMaterialProperty,)
 
     def dataentry(self):
         self.check_emissive_done = False
@@ -894,10 +918,7 @@ class SpellCheckTriangles(pyffi.spells.nif.NifSpell):
     """Base class for spells which need to check all triangles."""
 
     SPELLNAME = "check_triangles"
-
-    def datainspect(self):
-        # only run the spell if there are geometries
-        return self.inspectblocktype(NifFormat.NiTriBasedGeom)
+    BLOCKTYPES = (NifFormat.NiTriBasedGeom,)
 
     @classmethod
     def toastentry(cls, toaster):
@@ -918,6 +939,16 @@ class SpellCheckTriangles(pyffi.spells.nif.NifSpell):
             # keep recursing into children
             return True
 
+    @classmethod
+    def toastcollect(cls, toaster):
+        geometries = toaster.geometries
+        toaster.geometries = []
+        return geometries
+
+    @classmethod
+    def toastmerge(cls, toaster, state):
+        toaster.geometries.extend(state)
+
     @classmethod
     def toastexit(cls, toaster):
         toaster.msg("found {0} geometries".format(len(toaster.geometries)))
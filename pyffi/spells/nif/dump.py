@@ -258,6 +258,21 @@ class SpellHtmlReport(NifSpell):
         # keep looking for blocks of interest
         return True
 
+    @classmethod
+    def toastcollect(cls, toaster):
+        reports_per_blocktype = toaster.reports_per_blocktype
+        toaster.reports_per_blocktype = {}
+        return reports_per_blocktype
+
+    @classmethod
+    def toastmerge(cls, toaster, state):
+        for blocktype, reports in state.items():
+            if blocktype in toaster.reports_per_blocktype:
+                # skip the header row
+                toaster.reports_per_blocktype[blocktype].extend(reports[1:])
+            else:
+                toaster.reports_per_blocktype[blocktype] = reports
+
     @classmethod
     def toastexit(cls, toaster):
         if toaster.reports_per_blocktype:
@@ -324,15 +339,13 @@ class SpellExportPixelData(NifSpell):
     """
 
     SPELLNAME = "dump_pixeldata"
+    BLOCKTYPES = (NifFormat.ATextureRenderData,)
 
     def __init__(self, *args, **kwargs):
         NifSpell.__init__(self, *args, **kwargs)
         self.pixeldata_counter = 0
         """Increments on each pixel data block."""
 
-    def datainspect(self):
-        return self.inspectblocktype(NifFormat.ATextureRenderData)
-
     def branchinspect(self, branch):
         # stick to main tree nodes, and material and texture properties
         return isinstance(branch, (NifFormat.NiAVObject,
@@ -132,9 +132,7 @@ class SpellDelTangentSpace(NifSpell):
 
     SPELLNAME = "fix_deltangentspace"
     READONLY = False
-
-    def datainspect(self):
-        return self.inspectblocktype(NifFormat.NiBinaryExtraData)
+    BLOCKTYPES = (NifFormat.NiBinaryExtraData,)
 
     def branchinspect(self, branch):
         # only inspect the NiAVObject branch
@@ -161,9 +159,7 @@ class SpellAddTangentSpace(NifSpell):
 
     SPELLNAME = "fix_addtangentspace"
     READONLY = False
-
-    def datainspect(self):
-        return self.inspectblocktype(NifFormat.NiTriBasedGeom)
+    BLOCKTYPES = (NifFormat.NiTriBasedGeom,)
 
     def branchinspect(self, branch):
         # only inspect the NiAVObject branch
@@ -195,9 +191,7 @@ class SpellFFVT3RSkinPartition(NifSpell):
 
     SPELLNAME = "fix_ffvt3rskinpartition"
     READONLY = False
-
-    def datainspect(self):
-        return self.inspectblocktype(NifFormat.NiSkinInstance)
+    BLOCKTYPES = (NifFormat.NiSkinInstance,)
 
     def branchinspect(self, branch):
         # only inspect the NiAVObject branch
@@ -227,6 +221,7 @@ class SpellParseTexturePath(NifSpell):
 
     # abstract spell, so no spell name
     READONLY = False
+    BLOCKTYPES = (NifFormat.BSShaderTextureSet, NifFormat.NiSourceTexture)
 
     def substitute(self, old_path):
         """Helper function to allow subclasses of this spell to
@@ -235,16 +230,6 @@ class SpellParseTexturePath(NifSpell):
         """
         return old_path
 
-    def datainspect(self):
-        # only run the spell if contains 
-        # NiSourceTexture or BSShaderTextureSet blocks
-        if self.inspectblocktype(NifFormat.BSShaderTextureSet):
-            return True
-        elif self.inspectblocktype(NifFormat.NiSourceTexture):
-            return True
-        else:
-            return False
-
     def branchinspect(self, branch):
         # only inspect the NiAVObject branch, texturing properties and source
         # textures
@@ -309,16 +294,13 @@ class SpellDetachHavokTriStripsData(NifSpell):
 
     SPELLNAME = "fix_detachhavoktristripsdata"
     READONLY = False
+    BLOCKTYPES = (NifFormat.bhkNiTriStripsShape,)
 
     def __init__(self, *args, **kwargs):
         NifSpell.__init__(self, *args, **kwargs)
         # provides the bhknitristripsshapes within the current NiTriStrips
         self.bhknitristripsshapes = None
 
-    def datainspect(self):
-        # only run the spell if there are bhkNiTriStripsShape blocks
-        return self.inspectblocktype(NifFormat.bhkNiTriStripsShape)
-
     def dataentry(self):
         # build list of all NiTriStrips blocks
         self.nitristrips = [branch for branch in self.data.get_global_iterator()
@@ -353,10 +335,7 @@ class SpellClampMaterialAlpha(NifSpell):
 
     SPELLNAME = "fix_clampmaterialalpha"
     READONLY = False
-
-    def datainspect(self):
-        # only run the spell if there are material property blocks
-        return self.inspectblocktype(NifFormat.NiMaterialProperty)
+    BLOCKTYPES = (NifFormat.NiMaterialProperty,)
 
     def branchinspect(self, branch):
         # only inspect the NiAVObject branch, and material properties
@@ -431,10 +410,7 @@ class SpellMergeSkeletonRoots(NifSpell):
     """
     SPELLNAME = "fix_mergeskeletonroots"
     READONLY = False
-
-    def datainspect(self):
-        # only run the spell if there are skinned geometries
-        return self.inspectblocktype(NifFormat.NiSkinInstance)
+    BLOCKTYPES = (NifFormat.NiSkinInstance,)
 
     def dataentry(self):
         # make list of skeleton roots
@@ -559,6 +535,7 @@ class SpellCleanStringPalette(NifSpell):
 
     SPELLNAME = "fix_cleanstringpalette"
     READONLY = False
+    BLOCKTYPES = (NifFormat.NiStringPalette,)
 
     def substitute(self, old_string):
         """Helper function to substitute strings in the string palette,
@@ -567,10 +544,6 @@ class SpellCleanStringPalette(NifSpell):
         """
         return old_string
 
-    def datainspect(self):
-        # only run the spell if there is a string palette block
-        return self.inspectblocktype(NifFormat.NiStringPalette)
-
     def branchinspect(self, branch):
         # only inspect branches where NiControllerSequence can occur
         return isinstance(branch, (NifFormat.NiAVObject,
@@ -664,12 +637,13 @@ class SpellFixFallout3StringOffsets(NifSpell):
 
     SPELLNAME = "fix_fallout3stringoffsets"
     READONLY = False
+    BLOCKTYPES = (NifFormat.NiStringPalette,)
 
     def datainspect(self):
         # only run the spell if it looks like an Oblivion kf
         return (
                 self.data.version == 0x14000005
-                and self.inspectblocktype(NifFormat.NiStringPalette)
+                and NifSpell.datainspect(self)
                 and self.inspectblocktype(NifFormat.NiControllerSequence)
         )
 
@@ -779,9 +753,10 @@ class SpellDelUnusedRoots(pyffi.spells.nif.NifSpell):
 
     SPELLNAME = "fix_delunusedroots"
     READONLY = False
+    BLOCKTYPES = (NifFormat.NiAVObject,)
 
     def datainspect(self):
-        if self.inspectblocktype(NifFormat.NiAVObject):
+        if pyffi.spells.nif.NifSpell.datainspect(self):
             # check last 8 bytes
             pos = self.stream.tell()
             try:
@@ -821,9 +796,7 @@ class SpellFixBhkSubShapes(NifSpell):
 
     SPELLNAME = "fix_bhksubshapes"
     READONLY = False
-
-    def datainspect(self):
-        return self.inspectblocktype(NifFormat.bhkPackedNiTriStripsShape)
+    BLOCKTYPES = (NifFormat.bhkPackedNiTriStripsShape,)
 
     def branchinspect(self, branch):
         # only inspect the NiAVObject branch and collision branch
@@ -876,10 +849,7 @@ class SpellFixEmptySkeletonRoots(NifSpell):
 
     SPELLNAME = "fix_emptyskeletonroots"
     READONLY = False
-
-    def datainspect(self):
-        # only run the spell if there is a skin instance block
-        return self.inspectblocktype(NifFormat.NiSkinInstance)
+    BLOCKTYPES = (NifFormat.NiSkinInstance,)
 
     def dataentry(self):
         # set skeleton root: first block of data
@@ -227,6 +227,7 @@ class SpellCollisionType(NifSpell):
 
     SPELLNAME = "modify_collisiontype"
     READONLY = False
+    BLOCKTYPES = (NifFormat.bhkRigidBody,)
 
     class CollisionTypeStatic:
         layer = 1
@@ -287,9 +288,6 @@ class SpellCollisionType(NifSpell):
         else:
             return True
 
-    def datainspect(self):
-        return self.inspectblocktype(NifFormat.bhkRigidBody)
-
     def branchinspect(self, branch):
         # only inspect the NiAVObject branch
         return isinstance(branch, (NifFormat.NiAVObject,
@@ -471,6 +469,7 @@ class SpellCollisionMaterial(NifSpell):
 
     SPELLNAME = "modify_collisionmaterial"
     READONLY = False
+    BLOCKTYPES = (NifFormat.bhkShape,)
 
     class CollisionMaterialStone:
         material = 0
@@ -502,9 +501,6 @@ class SpellCollisionMaterial(NifSpell):
         else:
             return True
 
-    def datainspect(self):
-        return self.inspectblocktype(NifFormat.bhkShape)
-
     def branchinspect(self, branch):
         # only inspect the NiAVObject branch
         return isinstance(branch, (NifFormat.NiAVObject,
@@ -575,12 +571,10 @@ class _SpellDelBranchClasses(SpellDelBranches):
     """
 
     BRANCH_CLASSES_TO_BE_DELETED = ()
-    """List of branch classes that have to be deleted."""
-
-    def datainspect(self):
-        return any(
-            self.inspectblocktype(branch_class)
-            for branch_class in self.BRANCH_CLASSES_TO_BE_DELETED)
+    """List of branch classes that have to be deleted. Set
+    :attr:`~pyffi.spells.Spell.BLOCKTYPES` to the same list, so files
+    without these branches are skipped.
+    """
 
     def is_branch_to_be_deleted(self, branch):
         return isinstance(branch, self.BRANCH_CLASSES_TO_BE_DELETED)
@@ -590,13 +584,11 @@ class SpellDelVertexColor(SpellDelBranches):
     """Delete vertex color properties and vertex color data."""
 
     SPELLNAME = "modify_delvertexcolor"
+    BLOCKTYPES = (NifFormat.NiTriBasedGeom,)
 
     def is_branch_to_be_deleted(self, branch):
         return isinstance(branch, NifFormat.NiVertexColorProperty)
 
-    def datainspect(self):
-        return self.inspectblocktype(NifFormat.NiTriBasedGeom)
-
     def branchinspect(self, branch):
         # only inspect the NiAVObject branch
         return isinstance(branch, (NifFormat.NiAVObject,
@@ -625,6 +617,7 @@ class SpellDelVertexColorProperty(_SpellDelBranchClasses):
 
     SPELLNAME = "modify_delvertexcolorprop"
     BRANCH_CLASSES_TO_BE_DELETED = (NifFormat.NiVertexColorProperty,)
+    BLOCKTYPES = BRANCH_CLASSES_TO_BE_DELETED
 
 
 # identical to niftoaster.py modify_delbranches -x NiAlphaProperty
@@ -634,6 +627,7 @@ class SpellDelAlphaProperty(_SpellDelBranchClasses):
 
     SPELLNAME = "modify_delalphaprop"
     BRANCH_CLASSES_TO_BE_DELETED = (NifFormat.NiAlphaProperty,)
+    BLOCKTYPES = BRANCH_CLASSES_TO_BE_DELETED
 
 
 # identical to niftoaster.py modify_delbranches -x NiSpecularProperty
@@ -643,6 +637,7 @@ class SpellDelSpecularProperty(_SpellDelBranchClasses):
 
     SPELLNAME = "modify_delspecularprop"
     BRANCH_CLASSES_TO_BE_DELETED = (NifFormat.NiSpecularProperty,)
+    BLOCKTYPES = BRANCH_CLASSES_TO_BE_DELETED
 
 
 # identical to niftoaster.py modify_delbranches -x BSXFlags
@@ -652,6 +647,7 @@ class SpellDelBSXFlags(_SpellDelBranchClasses):
 
     SPELLNAME = "modify_delbsxflags"
     BRANCH_CLASSES_TO_BE_DELETED = (NifFormat.BSXFlags,)
+    BLOCKTYPES = BRANCH_CLASSES_TO_BE_DELETED
 
 
 # identical to niftoaster.py modify_delbranches -x NiStringExtraData
@@ -661,6 +657,7 @@ class SpellDelStringExtraDatas(_SpellDelBranchClasses):
 
     SPELLNAME = "modify_delstringextradatas"
     BRANCH_CLASSES_TO_BE_DELETED = (NifFormat.NiStringExtraData,)
+    BLOCKTYPES = BRANCH_CLASSES_TO_BE_DELETED
 
 
 class SpellDelSkinShapes(SpellDelBranches):
@@ -690,6 +687,7 @@ class SpellDelCollisionData(_SpellDelBranchClasses):
 
     SPELLNAME = "modify_delcollision"
     BRANCH_CLASSES_TO_BE_DELETED = (NifFormat.NiCollisionObject,)
+    BLOCKTYPES = BRANCH_CLASSES_TO_BE_DELETED
 
 
 # identical to niftoaster.py modify_delbranches -x NiTimeController
@@ -699,6 +697,7 @@ class SpellDelAnimation(_SpellDelBranchClasses):
 
     SPELLNAME = "modify_delanimation"
     BRANCH_CLASSES_TO_BE_DELETED = (NifFormat.NiTimeController,)
+    BLOCKTYPES = BRANCH_CLASSES_TO_BE_DELETED
 
 
 class SpellDisableParallax(NifSpell):
@@ -707,11 +706,7 @@ class SpellDisableParallax(NifSpell):
 
     SPELLNAME = "modify_disableparallax"
     READONLY = False
-
-    def datainspect(self):
-        # XXX should we check that the nif is Oblivion version?
-        # only run the spell if there are textures
-        return self.inspectblocktype(NifFormat.NiTexturingProperty)
+    BLOCKTYPES = (NifFormat.NiTexturingProperty,)
 
     def branchinspect(self, branch):
         return isinstance(branch, (NifFormat.NiAVObject,
@@ -737,9 +732,7 @@ class SpellAddStencilProperty(NifSpell):
 
     SPELLNAME = "modify_addstencilprop"
     READONLY = False
-
-    def datainspect(self):
-        return self.inspectblocktype(NifFormat.NiTriBasedGeom)
+    BLOCKTYPES = (NifFormat.NiTriBasedGeom,)
 
     def branchinspect(self, branch):
         # only inspect the NiAVObject branch
@@ -857,6 +850,7 @@ class SpellChangeBonePriorities(NifSpell):
 
     SPELLNAME = "modify_bonepriorities"
     READONLY = False
+    BLOCKTYPES = (NifFormat.NiSequence,)
 
     @classmethod
     def toastentry(cls, toaster):
@@ -874,10 +868,6 @@ class SpellChangeBonePriorities(NifSpell):
                     for namepriority in toaster.options["arg"].split("|")))
             return True
 
-    def datainspect(self):
-        # returns only if nif/kf contains NiSequence
-        return self.inspectblocktype(NifFormat.NiSequence)
-
     def branchinspect(self, branch):
         # inspect the NiAVObject and NiSequence branches
         return isinstance(branch, (NifFormat.NiAVObject,
@@ -939,10 +929,7 @@ class SpellGetBonePriorities(NifSpell):
     """
 
     SPELLNAME = "modify_getbonepriorities"
-
-    def datainspect(self):
-        # continue only if nif/kf contains NiSequence
-        return self.inspectblocktype(NifFormat.NiSequence)
+    BLOCKTYPES = (NifFormat.NiSequence,)
 
     def dataentry(self):
         # maps squence name and block name to priority
@@ -1004,10 +991,7 @@ class SpellSetBonePriorities(NifSpell):
 
     SPELLNAME = "modify_setbonepriorities"
     READONLY = False
-
-    def datainspect(self):
-        # returns only if nif/kf contains NiSequence
-        return self.inspectblocktype(NifFormat.NiSequence)
+    BLOCKTYPES = (NifFormat.NiSequence,)
 
     def dataentry(self):
         filename, ext = os.path.splitext(self.stream.name)
@@ -1078,6 +1062,7 @@ class SpellSetInterpolatorTransRotScale(NifSpell):
 
     SPELLNAME = "modify_interpolatortransrotscale"
     READONLY = False
+    BLOCKTYPES = (NifFormat.NiSequence,)
 
     @classmethod
     def toastentry(cls, toaster):
@@ -1111,10 +1096,6 @@ class SpellSetInterpolatorTransRotScale(NifSpell):
                     in toaster.options["arg"].split("|"))))
             return True
 
-    def datainspect(self):
-        # returns only if nif/kf contains NiSequence
-        return self.inspectblocktype(NifFormat.NiSequence)
-
     def branchinspect(self, branch):
         # inspect the NiAVObject and NiSequence branches
         return isinstance(branch, (NifFormat.NiAVObject,
@@ -1158,6 +1139,7 @@ class SpellDelInterpolatorTransformData(NifSpell):
 
     SPELLNAME = "modify_delinterpolatortransformdata"
     READONLY = False
+    BLOCKTYPES = (NifFormat.NiSequence,)
 
     @classmethod
     def toastentry(cls, toaster):
@@ -1171,10 +1153,6 @@ class SpellDelInterpolatorTransformData(NifSpell):
             toaster.change_blocks = toaster.options["arg"].split('|')
             return True
 
-    def datainspect(self):
-        # returns only if nif/kf contains NiSequence
-        return self.inspectblocktype(NifFormat.NiSequence)
-
     def branchinspect(self, branch):
         # inspect the NiAVObject and NiSequence branches
         return isinstance(branch, (NifFormat.NiAVObject,
@@ -1196,9 +1174,7 @@ class SpellCollisionToMopp(NifSpell):
 
     SPELLNAME = "modify_collisiontomopp"
     READONLY = False
-
-    def datainspect(self):
-        return self.inspectblocktype(NifFormat.bhkRigidBody)
+    BLOCKTYPES = (NifFormat.bhkRigidBody,)
 
     def branchinspect(self, branch):
         # only inspect the NiAVObject branch
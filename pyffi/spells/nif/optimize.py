@@ -68,6 +68,7 @@ import pyffi.spells
 import pyffi.spells.nif
 import pyffi.spells.nif.fix
 import pyffi.spells.nif.modify
+import pyffi.utils.geometry
 import pyffi.utils.tristrip
 import pyffi.utils.vertex_cache
 from pyffi.formats.nif import NifFormat
@@ -97,6 +98,9 @@ class SpellCleanRefLists(pyffi.spells.nif.NifSpell):
 
     SPELLNAME = "opt_cleanreflists"
     READONLY = False
+    # so far, only reference lists in NiObjectNET blocks, NiAVObject
+    # blocks, and NiNode blocks are checked
+    BLOCKTYPES = (NifFormat.NiObjectNET,)
 
     def datainspect(self):
         # see MadCat221's metstaff.nif:
@@ -110,9 +114,7 @@ class SpellCleanRefLists(pyffi.spells.nif.NifSpell):
         except ValueError:
             # when in doubt, assume it does not have this block
             pass
-        # so far, only reference lists in NiObjectNET blocks, NiAVObject
-        # blocks, and NiNode blocks are checked
-        return self.inspectblocktype(NifFormat.NiObjectNET)
+        return pyffi.spells.nif.NifSpell.datainspect(self)
 
     def dataentry(self):
         self.data.roots = self.cleanreflist(self.data.roots, "root")
@@ -166,8 +168,13 @@ class SpellMergeDuplicates(pyffi.spells.nif.NifSpell):
 
     def __init__(self, *args, **kwargs):
         pyffi.spells.nif.NifSpell.__init__(self, *args, **kwargs)
-        # list of all branches visited so far
-        self.branches = []
+        # all branches visited so far, that can be interchangeable with
+        # other branches, by their interchangeable key
+        self.branches = {}
+        # number of branches visited so far
+        self.num_branches = 0
+        # number of is_interchangeable checks avoided by using the keys
+        self.num_avoided = 0
 
     def datainspect(self):
         # see MadCat221's metstaff.nif:
@@ -188,7 +195,14 @@ class SpellMergeDuplicates(pyffi.spells.nif.NifSpell):
                                    NifFormat.NiGeometryData))
 
     def branchentry(self, branch):
-        for otherbranch in self.branches:
+        key = branch.get_interchangeable_key()
+        if key is None:
+            # only interchangeable with itself
+            candidates = []
+        else:
+            candidates = self.branches.setdefault(key, [])
+        self.num_avoided += self.num_branches - len(candidates)
+        for otherbranch in candidates:
             if (branch is not otherbranch and
                     branch.is_interchangeable(otherbranch)):
                 # skip properties that have controllers (the
@@ -208,10 +222,16 @@ class SpellMergeDuplicates(pyffi.spells.nif.NifSpell):
                 return False
         else:
             # no duplicate found, add to list of visited branches
-            self.branches.append(branch)
+            candidates.append(branch)
+            self.num_branches += 1
             # continue recursion
             return True
 
+    def dataexit(self):
+        self.toaster.logger.debug(
+            "avoided %i duplicate checks" % self.num_avoided)
+        self.append_report({"avoided_checks": self.num_avoided})
+
 
 class SpellOptimizeGeometry(pyffi.spells.nif.NifSpell):
     """Optimize all geometries:
@@ -223,6 +243,7 @@ class SpellOptimizeGeometry(pyffi.spells.nif.NifSpell):
 
     SPELLNAME = "opt_geometry"
     READONLY = False
+    BLOCKTYPES = (NifFormat.NiTriBasedGeom,)
 
     # spell parameters
     VERTEXPRECISION = 3
@@ -242,9 +263,7 @@ class SpellOptimizeGeometry(pyffi.spells.nif.NifSpell):
         if (os.path.exists(filename[:-3] + "egm")
                 or os.path.exists(filename[:-3] + "tri")):
             return False
-        # so far, only reference lists in NiObjectNET blocks, NiAVObject
-        # blocks, and NiNode blocks are checked
-        return self.inspectblocktype(NifFormat.NiTriBasedGeom)
+        return pyffi.spells.nif.NifSpell.datainspect(self)
 
     def branchinspect(self, branch):
         # only inspect the NiAVObject branch
@@ -372,43 +391,37 @@ class SpellOptimizeGeometry(pyffi.spells.nif.NifSpell):
             data.set_triangles(triangles)
 
         # copy old data
-        oldverts = [(v.x, v.y, v.z) for v in data.vertices]
-        oldnorms = [(n.x, n.y, n.z) for n in data.normals]
-        olduvs = [[(uv.u, uv.v) for uv in uvset] for uvset in data.uv_sets]
-        oldvcols = [(c.r, c.g, c.b, c.a) for c in data.vertex_colors]
+        geometry = pyffi.utils.geometry
+        oldverts = geometry.get_buffer(data.vertices, geometry.VECTOR3)
+        oldnorms = geometry.get_buffer(data.normals, geometry.VECTOR3)
+        olduvs = [geometry.get_buffer(uvset, geometry.TEXCOORD)
+                  for uvset in data.uv_sets]
+        oldvcols = geometry.get_buffer(data.vertex_colors, geometry.COLOR4)
         if branch.skin_instance:  # for later
             oldweights = branch.get_vertex_weights()
         # set new data
         data.num_vertices = new_numvertices
         if data.has_vertices:
             data.vertices.update_size()
-            for i, v in enumerate(data.vertices):
-                old_i = v_map_inverse[i]
-                v.x = oldverts[old_i][0]
-                v.y = oldverts[old_i][1]
-                v.z = oldverts[old_i][2]
+            geometry.set_buffer(
+                data.vertices, geometry.VECTOR3,
+                geometry.remap(oldverts, 3, v_map_inverse))
         if data.has_normals:
             data.normals.update_size()
-            for i, n in enumerate(data.normals):
-                old_i = v_map_inverse[i]
-                n.x = oldnorms[old_i][0]
-                n.y = oldnorms[old_i][1]
-                n.z = oldnorms[old_i][2]
+            geometry.set_buffer(
+                data.normals, geometry.VECTOR3,
+                geometry.remap(oldnorms, 3, v_map_inverse))
         # XXX todo: if ...has_uv_sets...:
         data.uv_sets.update_size()
-        for j, uvset in enumerate(data.uv_sets):
-            for i, uv in enumerate(uvset):
-                old_i = v_map_inverse[i]
-                uv.u = olduvs[j][old_i][0]
-                uv.v = olduvs[j][old_i][1]
+        for uvset, olduvset in zip(data.uv_sets, olduvs):
+            geometry.set_buffer(
+                uvset, geometry.TEXCOORD,
+                geometry.remap(olduvset, 2, v_map_inverse))
         if data.has_vertex_colors:
             data.vertex_colors.update_size()
-            for i, c in enumerate(data.vertex_colors):
-                old_i = v_map_inverse[i]
-                c.r = oldvcols[old_i][0]
-                c.g = oldvcols[old_i][1]
-                c.b = oldvcols[old_i][2]
-                c.a = oldvcols[old_i][3]
+            geometry.set_buffer(
+                data.vertex_colors, geometry.COLOR4,
+                geometry.remap(oldvcols, 4, v_map_inverse))
         del oldverts
         del oldnorms
         del olduvs
@@ -527,6 +540,7 @@ class SpellSplitGeometry(pyffi.spells.nif.NifSpell):
     SPELLNAME = "opt_split"
     READONLY = False
     THRESHOLD_RADIUS = 100  #: Threshold where to split geometry.
+    BLOCKTYPES = (NifFormat.NiTriBasedGeom,)
 
     # XXX todo
     @staticmethod
@@ -649,9 +663,6 @@ class SpellSplitGeometry(pyffi.spells.nif.NifSpell):
         # (to avoid optimizing the same geometry twice)
         self.optimized = []
 
-    def datainspect(self):
-        return self.inspectblocktype(NifFormat.NiTriBasedGeom)
-
     def branchinspect(self, branch):
         return isinstance(branch, NifFormat.NiAVObject)
 
@@ -691,10 +702,7 @@ class SpellDelUnusedBones(pyffi.spells.nif.NifSpell):
 
     SPELLNAME = "opt_delunusedbones"
     READONLY = False
-
-    def datainspect(self):
-        # only run the spell if there are skinned geometries
-        return self.inspectblocktype(NifFormat.NiSkinInstance)
+    BLOCKTYPES = (NifFormat.NiSkinInstance,)
 
     def dataentry(self):
         # make list of used bones
@@ -727,10 +735,7 @@ class SpellDelZeroScale(pyffi.spells.nif.NifSpell):
 
     SPELLNAME = "opt_delzeroscale"
     READONLY = False
-
-    def datainspect(self):
-        # only run the spell if there are scaled objects
-        return self.inspectblocktype(NifFormat.NiAVObject)
+    BLOCKTYPES = (NifFormat.NiAVObject,)
 
     def branchinspect(self, branch):
         # only inspect the NiAVObject branch
@@ -779,6 +784,8 @@ class SpellOptimizeCollisionBox(pyffi.spells.nif.NifSpell):
     SPELLNAME = "opt_collisionbox"
     READONLY = False
     VERTEXPRECISION = 3
+    BLOCKTYPES = (NifFormat.bhkPackedNiTriStripsShape,
+                  NifFormat.bhkNiTriStripsShape)
 
     def __init__(self, *args, **kwargs):
         pyffi.spells.nif.NifSpell.__init__(self, *args, **kwargs)
@@ -786,12 +793,6 @@ class SpellOptimizeCollisionBox(pyffi.spells.nif.NifSpell):
         # (to avoid optimizing the same geometry twice)
         self.optimized = []
 
-    def datainspect(self):
-        # only run the spell if there are collisions
-        return (
-                self.inspectblocktype(NifFormat.bhkPackedNiTriStripsShape)
-                or self.inspectblocktype(NifFormat.bhkNiTriStripsShape))
-
     def branchinspect(self, branch):
         # only inspect the collision branches
         return isinstance(branch, (NifFormat.NiAVObject,
@@ -947,6 +948,8 @@ class SpellOptimizeCollisionGeometry(pyffi.spells.nif.NifSpell):
     SPELLNAME = "opt_collisiongeometry"
     READONLY = False
     VERTEXPRECISION = 3
+    BLOCKTYPES = (NifFormat.bhkPackedNiTriStripsShape,
+                  NifFormat.bhkNiTriStripsShape)
 
     def __init__(self, *args, **kwargs):
         pyffi.spells.nif.NifSpell.__init__(self, *args, **kwargs)
@@ -954,12 +957,6 @@ class SpellOptimizeCollisionGeometry(pyffi.spells.nif.NifSpell):
         # (to avoid optimizing the same geometry twice)
         self.optimized = []
 
-    def datainspect(self):
-        # only run the spell if there are collisions
-        return (
-                self.inspectblocktype(NifFormat.bhkPackedNiTriStripsShape)
-                or self.inspectblocktype(NifFormat.bhkNiTriStripsShape))
-
     def branchinspect(self, branch):
         # only inspect the collision branches
         return isinstance(branch, (NifFormat.NiAVObject,
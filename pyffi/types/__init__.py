@@ -10,6 +10,7 @@ Types
    basic
    binary
    bitfield
+   codec
    common
    editable
    enum
@@ -46,11 +46,11 @@ These are abstract classes to be used by all types
 
 
 import abc
-import struct
 
 import pyffi.utils.graph
 from pyffi.abc import Duplex, DerivedMeta
 from pyffi.context import Context
+from pyffi.types.codec import get_codec_table
 from pyffi.types.editable import EditableBase
 from pyffi.types.editable import EditableSpinBox
 
@@ -115,6 +115,8 @@ class AnyType(pyffi.utils.graph.DetailNode, Duplex, metaclass=DerivedMeta):
     which is readable and writable, and can check for exchangeable
     alternatives."""
 
+    __slots__ = ()
+
     def is_interchangeable(self, other):
         """Returns ``True`` if objects are interchangeable, that is,
         "close" enough to each other so they can be considered equal
@@ -213,8 +215,15 @@ class SimpleType(AnyType, EditableBase, metaclass=_MetaSimpleType):
         """
         return None
 
-    _value = None
-    """The data."""
+    # _value is the data; arg is the argument set by the struct that
+    # contains this instance (see pyffi.engines.xml.struct_.StructBase)
+    __slots__ = ("_value", "arg")
+
+    def __init__(self, **kwargs):
+        """Initialize both slots to ``None``. Keyword arguments, such as
+        the template and argument of basic types, are ignored."""
+        self._value = None
+        self.arg = None
 
     def __str__(self):
         """String representation. This implementation is simply a wrapper
@@ -278,6 +287,8 @@ class SimpleType(AnyType, EditableBase, metaclass=_MetaSimpleType):
 class BinaryType(AnyType):
     """Abstract base class for binary data types."""
 
+    __slots__ = ()
+
     @abc.abstractmethod
     def get_size(self, context=Context()):
         """Return number of bytes this type occupies in a file.
@@ -296,8 +307,18 @@ class NumericalType(SimpleType, BinaryType, EditableSpinBox):
     :var int _max: The maximum the numerical number may be
     :var str _struct: The Python struct char
     :var int _size: The byte size the number takes up
+    :var pyffi.types.codec.CodecTable _codecs: The compiled struct of
+        ``_struct`` for each byte order, set when the class is created
     """
 
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super(NumericalType, cls).__init_subclass__(**kwargs)
+        # _struct is still an abstract property on abstract classes
+        if isinstance(cls._struct, str):
+            cls._codecs = get_codec_table(cls._struct)
+
     @property
     @abc.abstractmethod
     def _min(self):
@@ -320,6 +341,7 @@ class NumericalType(SimpleType, BinaryType, EditableSpinBox):
 
     def __init__(self):
         """Initialize the numerical class"""
+        SimpleType.__init__(self)
         self._value = 0
 
     def get_value(self):
@@ -356,10 +378,11 @@ class NumericalType(SimpleType, BinaryType, EditableSpinBox):
     # Duplex
 
     def read(self, stream, context=Context()):
-        self._value = struct.unpack(context.byte_order + self._struct, stream.read(self._size))[0]
+        codec = self._codecs[context.byte_order]
+        self._value = codec.unpack(stream.read(codec.size))[0]
 
     def write(self, stream, context=Context()):
-        stream.write(struct.pack(context.byte_order + self._struct, self._value))
+        stream.write(self._codecs[context.byte_order].pack(self._value))
 
     # EditableSpinBox
 
@@ -372,3 +395,5 @@ class NumericalType(SimpleType, BinaryType, EditableSpinBox):
 
 class BinarySimpleType(BinaryType, SimpleType):
     """Abstract class that implements BinaryType and SimpleType"""
+
+    __slots__ = ()
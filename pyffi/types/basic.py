@@ -85,11 +85,13 @@ class BasicBase(BinarySimpleType, metaclass=DerivedMeta):
     TypeError: ...
     """
 
+    __slots__ = ()
+
     _is_template = False  # is it a template type?
     _has_links = False  # does the type contain a Ref or a Ptr?
     _has_refs = False  # does the type contain a Ref?
     _has_strings = False  # does the type contain a string?
-    arg = None  # default argument
+    # the argument (arg) is a slot of SimpleType, see __init__
 
     def __init__(self, template=None, argument=None, parent=None):
         """Initializes the instance.
@@ -101,7 +103,8 @@ class BasicBase(BinarySimpleType, metaclass=DerivedMeta):
             instance is an attribute of."""
         # parent disabled for performance
         # self._parent = weakref.ref(parent) if parent else None
-        pass
+        self._value = None
+        self.arg = None
 
     def fix_links(self, context):
         """Fix links. Called when all objects have been read, and converts
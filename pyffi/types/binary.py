@@ -46,13 +46,14 @@ Implements common basic types in XML file format descriptions.
 
 
 import abc
-import struct
 
 from pyffi.types.base import SimpleType, BinaryType, BinarySimpleType, NumericalType, _b, _b00, _as_bytes, \
     _as_str
+from pyffi.types.codec import get_struct
 from pyffi.types.editable import EditableBoolComboBox
 from pyffi.types.editable import EditableFloatSpinBox
 from pyffi.types.editable import EditableLineEdit
+from pyffi.utils.memoryreader import read_view
 
 
 # Helper objects and helper functions (private)
@@ -93,6 +94,8 @@ class IntType(NumericalType):
     '0x44332211'
     """
 
+    __slots__ = ()
+
     _min = -0x80000000  #: Minimum value.
     _max = 0x7fffffff  #: Maximum value.
     _struct = 'i'  #: Character used to represent type in struct.
@@ -122,6 +125,8 @@ class IntType(NumericalType):
 
 class UIntType(IntType):
     """Implementation of a 32-bit unsigned integer type."""
+
+    __slots__ = ()
     _min = 0
     _max = 0xffffffff
     _struct = 'I'
@@ -129,6 +134,8 @@ class UIntType(IntType):
 
 class Int64Type(IntType):
     """Implementation of a 64-bit signed integer type."""
+
+    __slots__ = ()
     _min = -0x8000000000000000
     _max = 0x7fffffffffffffff
     _struct = 'q'
@@ -137,6 +144,8 @@ class Int64Type(IntType):
 
 class UInt64Type(Int64Type):
     """Implementation of a 64-bit unsigned integer type."""
+
+    __slots__ = ()
     _min = 0
     _max = 0xffffffffffffffff
     _struct = 'Q'
@@ -144,6 +153,8 @@ class UInt64Type(Int64Type):
 
 class ByteType(IntType):
     """Implementation of a 8-bit signed integer type."""
+
+    __slots__ = ()
     _min = -0x80
     _max = 0x7f
     _struct = 'b'
@@ -152,6 +163,8 @@ class ByteType(IntType):
 
 class UByteType(ByteType):
     """Implementation of a 8-bit unsigned integer type."""
+
+    __slots__ = ()
     _min = 0
     _max = 0xff
     _struct = 'B'
@@ -159,6 +172,8 @@ class UByteType(ByteType):
 
 class ShortType(IntType):
     """Implementation of a 16-bit signed integer type."""
+
+    __slots__ = ()
     _min = -0x8000
     _max = 0x7fff
     _struct = 'h'
@@ -167,6 +182,8 @@ class ShortType(IntType):
 
 class UShortType(ShortType):
     """Implementation of a 16-bit unsigned integer type."""
+
+    __slots__ = ()
     _min = 0
     _max = 0xffff
     _struct = 'H'
@@ -175,6 +192,8 @@ class UShortType(ShortType):
 class BoolType(UByteType, EditableBoolComboBox):
     """Simple bool implementation."""
 
+    __slots__ = ()
+
     def get_value(self):
         """Return stored value.
 
@@ -198,8 +217,11 @@ class BoolType(UByteType, EditableBoolComboBox):
 class CharType(BinarySimpleType, EditableLineEdit):
     """Implementation of an (unencoded) 8-bit character."""
 
+    __slots__ = ()
+
     def __init__(self):
         """Initialize the character."""
+        SimpleType.__init__(self)
         self._value = _b00
 
     def set_value(self, value):
@@ -228,6 +250,8 @@ class CharType(BinarySimpleType, EditableLineEdit):
 class Float(NumericalType, EditableFloatSpinBox):
     """Implementation of a 32-bit float."""
 
+    __slots__ = ()
+
     _min = None
     _max = None
     _size = 4
@@ -237,6 +261,8 @@ class Float(NumericalType, EditableFloatSpinBox):
 class HFloat(Float):
     """Implementation of a 16-bit float."""
 
+    __slots__ = ()
+
     _size = 2
     _struct = 'e'
 
@@ -244,6 +270,8 @@ class HFloat(Float):
 class Double(Float):
     """Implementation of a 64-bit float."""
 
+    __slots__ = ()
+
     _size = 8
     _struct = 'd'
 
@@ -268,10 +296,13 @@ class ZString(BinarySimpleType, EditableLineEdit):
     >>> str(m)
     'Hi There!'
     """
+
+    __slots__ = ()
     _maxlen = 1000  #: The maximum length.
 
     def __init__(self):
         """Initialize the string."""
+        SimpleType.__init__(self)
         self._value = _b
 
     def __str__(self):
@@ -336,10 +367,13 @@ class FixedString(BinarySimpleType, EditableLineEdit):
     >>> str(m)
     'Hi There'
     """
+
+    __slots__ = ()
     _len = 0
 
     def __init__(self):
         """Initialize the string."""
+        SimpleType.__init__(self)
         self._value = _b
 
     def __str__(self):
@@ -399,8 +433,11 @@ class SizedString(BinarySimpleType, EditableLineEdit):
     'Hi There'
     """
 
+    __slots__ = ()
+
     def __init__(self):
         """Initialize the string."""
+        SimpleType.__init__(self)
         self._value = _b
 
     def get_value(self):
@@ -429,7 +466,7 @@ class SizedString(BinarySimpleType, EditableLineEdit):
 
     def read(self, stream, context=None):
         """Read string from stream."""
-        length, = struct.unpack('<I', stream.read(4))
+        length, = get_struct('I').unpack(stream.read(4))
         if length > 10000:
             raise ValueError('string too long (0x%08X at 0x%08X)'
                              % (length, stream.tell()))
@@ -437,14 +474,17 @@ class SizedString(BinarySimpleType, EditableLineEdit):
 
     def write(self, stream, context=None):
         """Write string to stream."""
-        stream.write(struct.pack('<I', len(self._value)))
+        stream.write(get_struct('I').pack(len(self._value)))
         stream.write(self._value)
 
 
 class UndecodedData(SimpleType, BinaryType):
     """Basic type for undecoded data trailing at the end of a file."""
 
+    __slots__ = ()
+
     def __init__(self):
+        SimpleType.__init__(self)
         self._value = _b
 
     def get_value(self):
@@ -452,6 +492,10 @@ class UndecodedData(SimpleType, BinaryType):
 
         :return: The stored value.
         """
+        if isinstance(self._value, memoryview):
+            # the view as read from a MemoryReader is copied only
+            # when the value is needed
+            self._value = self._value.tobytes()
         return self._value
 
     def set_value(self, value):
@@ -471,7 +515,7 @@ class UndecodedData(SimpleType, BinaryType):
         return len(self._value)
 
     def read(self, stream, context=None):
-        self._value = stream.read(-1)
+        self._value = read_view(stream, -1)
 
     def write(self, stream, context=None):
         stream.write(self._value)
@@ -67,7 +67,8 @@ class BitfieldMember(object):
     :var int _pos: The starting positing of this member
     """
 
-    __slots__ = ('_size', '_pos', '_mask', '_default', '_value')
+    __slots__ = ('_size', '_pos', '_mask', '_clear_mask', '_default',
+                 '_value')
 
     def __init__(self, size, pos, mask, default=None):
         """
@@ -81,6 +82,8 @@ class BitfieldMember(object):
         self._size = int(size)
         self._pos = int(pos)
         self._mask = int(mask)
+        # precomputed for add_value
+        self._clear_mask = ~self._mask
         self._default = default
         self._value = default if default is not None else 0
 
@@ -105,7 +108,7 @@ class BitfieldMember(object):
         :return: The value with the bits inserted
         :rtype: ``int``
         """
-        return (value & ~self._mask) | (self._value << self._pos)
+        return (value & self._clear_mask) | (self._value << self._pos)
 
     def get_value(self):
         """Gets the value of the bitfield member
@@ -0,0 +1,177 @@
+"""
+Codecs
+======
+
+A registry of precompiled :class:`struct.Struct` codecs, shared by all
+types which read and write plain binary values, and precomputed bit
+layouts for bitfields.
+
+.. autofunction:: get_struct
+
+.. autofunction:: get_codec_table
+
+.. autoclass:: CodecTable
+   :show-inheritance:
+   :members:
+
+.. autoclass:: BitLayout
+   :show-inheritance:
+   :members:
+"""
+
+# ------------------------------------------------------------------------
+#  ***** BEGIN LICENSE BLOCK *****
+#
+#  Copyright © 2007-2019, Python File Format Interface.
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#
+#     * Redistributions in binary form must reproduce the above
+#       copyright notice, this list of conditions and the following
+#       disclaimer in the documentation and/or other materials provided
+#       with the distribution.
+#
+#     * Neither the name of the Python File Format Interface
+#       project nor the names of its contributors may be used to endorse
+#       or promote products derived from this software without specific
+#       prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+#  LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+#
+#  ***** END LICENSE BLOCK *****
+# ------------------------------------------------------------------------
+
+import struct
+
+# maps byte order + format to its struct.Struct
+_STRUCTS = {}
+# maps format to its CodecTable
+_CODEC_TABLES = {}
+
+
+def get_struct(fmt, byte_order='<'):
+    """Get the compiled struct for a format and a byte order. Every
+    format is compiled only once, and the compiled struct is shared.
+
+    >>> get_struct('I', '>').pack(1)
+    b'\\x00\\x00\\x00\\x01'
+    >>> get_struct('I') is get_struct('I', '<')
+    True
+
+    :param str fmt: The struct format, without byte order.
+    :param str byte_order: The byte order character.
+    :rtype: :class:`struct.Struct`
+    """
+    key = byte_order + fmt
+    try:
+        return _STRUCTS[key]
+    except KeyError:
+        codec = _STRUCTS[key] = struct.Struct(key)
+        return codec
+
+
+class CodecTable(dict):
+    """Maps byte order characters to the compiled struct of a single
+    format. Byte orders which are not yet in the table are compiled on
+    first use.
+
+    >>> table = get_codec_table('H')
+    >>> table['<'].unpack(b'\\x01\\x00')
+    (1,)
+    >>> table['>'].unpack(b'\\x01\\x00')
+    (256,)
+    >>> table['>'] is get_struct('H', '>')
+    True
+    """
+
+    __slots__ = ('format',)
+
+    def __init__(self, fmt):
+        super(CodecTable, self).__init__()
+        self.format = fmt
+        for byte_order in '<>':
+            self[byte_order] = get_struct(fmt, byte_order)
+
+    def __missing__(self, byte_order):
+        codec = self[byte_order] = get_struct(self.format, byte_order)
+        return codec
+
+
+def get_codec_table(fmt):
+    """Get the shared codec table of a struct format.
+
+    :param str fmt: The struct format, without byte order.
+    :rtype: :class:`CodecTable`
+    """
+    try:
+        return _CODEC_TABLES[fmt]
+    except KeyError:
+        table = _CODEC_TABLES[fmt] = CodecTable(fmt)
+        return table
+
+
+class BitLayout(tuple):
+    """The position and mask of consecutive bit fields, packed from the
+    least significant bit upwards, as a tuple of ``(pos, mask)`` pairs.
+
+    >>> layout = BitLayout([3, 1, 4])
+    >>> layout
+    ((0, 7), (3, 1), (4, 15))
+    >>> layout.unpack(0xb5)
+    [5, 0, 11]
+    >>> hex(layout.pack([5, 0, 11]))
+    '0xb5'
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, numbits):
+        """Compute the layout.
+
+        :param numbits: The bit width of each field, in order.
+        :type numbits: typing.Iterable[int]
+        """
+        fields = []
+        pos = 0
+        for size in numbits:
+            fields.append((pos, (1 << size) - 1))
+            pos += size
+        return super(BitLayout, cls).__new__(cls, fields)
+
+    def unpack(self, value):
+        """Split an integer into the values of the fields.
+
+        :param int value: The packed integer.
+        :rtype: typing.List[int]
+        """
+        return [(value >> pos) & mask for pos, mask in self]
+
+    def pack(self, values):
+        """Combine the values of the fields into an integer. Bits of the
+        values which do not fit in their field are discarded.
+
+        :param values: The value of each field, in order.
+        :type values: typing.Iterable[int]
+        :rtype: int
+        """
+        result = 0
+        for (pos, mask), value in zip(self, values):
+            result |= (value & mask) << pos
+        return result
@@ -46,7 +46,6 @@ Implements common basic types in XML file format descriptions.
 
 
 import logging
-import struct
 
 from pyffi.context import Context
 from pyffi.types.base import _as_str
@@ -67,7 +66,9 @@ from pyffi.types.binary import UIntType
 from pyffi.types.binary import UShortType
 from pyffi.types.binary import UndecodedData as UDataType
 from pyffi.types.binary import ZString as ZStringType
+from pyffi.types.codec import get_struct
 from pyffi.types.editable import EditableFloatSpinBox
+from pyffi.utils.memoryreader import read_view
 
 
 class Int(IntType, BasicBase):
@@ -105,6 +106,8 @@ class Int(IntType, BasicBase):
     '0x44332211'
     """
 
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
         """Initialize the integer."""
         super(Int, self).__init__()
@@ -131,57 +134,77 @@ class Int(IntType, BasicBase):
 class UInt(UIntType, Int):
     """Implementation of a 32-bit unsigned integer type."""
 
+    __slots__ = ()
+
 
 class Int64(Int64Type, Int):
     """Implementation of a 64-bit signed integer type."""
 
+    __slots__ = ()
+
 
 class UInt64(UInt64Type, Int):
     """Implementation of a 64-bit unsigned integer type."""
 
+    __slots__ = ()
+
 
 class Byte(ByteType, Int):
     """Implementation of a 8-bit signed integer type."""
 
+    __slots__ = ()
+
 
 class UByte(UByteType, Int):
     """Implementation of a 8-bit unsigned integer type."""
 
+    __slots__ = ()
+
 
 class Short(ShortType, Int):
     """Implementation of a 16-bit signed integer type."""
 
+    __slots__ = ()
+
 
 class UShort(UShortType, UInt):
     """Implementation of a 16-bit unsigned integer type."""
 
+    __slots__ = ()
+
 
 class ULittle32(UInt):
     """Little endian 32 bit unsigned integer (ignores specified context
     byte order).
     """
 
+    __slots__ = ()
+
     def read(self, stream, context=Context()):
         """Read value from stream.
 
         """
-        self._value = struct.unpack('<' + self._struct,
-                                    stream.read(self._size))[0]
+        codec = self._codecs['<']
+        self._value = codec.unpack(stream.read(codec.size))[0]
 
     def write(self, stream, context=None):
         """Write value to stream.
 
         """
-        stream.write(struct.pack('<' + self._struct, self._value))
+        stream.write(self._codecs['<'].pack(self._value))
 
 
 class Bool(BoolType, UByte):
     """Simple bool implementation."""
 
+    __slots__ = ()
+
 
 class Char(CharType, BasicBase):
     """Implementation of an (unencoded) 8-bit character."""
 
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         """Initialize the character."""
         super(Char, self).__init__(**kwargs)
@@ -220,24 +243,26 @@ class Char(CharType, BasicBase):
 class Float(FloatType, BasicBase):
     """Implementation of a 32-bit float."""
 
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         """Initialize the float."""
         super(BasicBase, self).__init__(**kwargs)
         self._value = 0.0
 
     def read(self, stream, context=Context()):
-        self._value = struct.unpack(context._byte_order + 'f',
-                                    stream.read(4))[0]
+        self._value = get_struct('f', context._byte_order).unpack(
+            stream.read(4))[0]
 
     def write(self, stream, context=None):
         try:
-            stream.write(struct.pack(context._byte_order + 'f',
-                                     self._value))
+            stream.write(get_struct('f', context._byte_order).pack(
+                self._value))
         except OverflowError:
             logger = logging.getLogger("pyffi.object_models")
             logger.warn("float value overflow, writing NaN")
-            stream.write(struct.pack(context._byte_order + 'I',
-                                     0x7fc00000))
+            stream.write(get_struct('I', context._byte_order).pack(
+                0x7fc00000))
 
     def get_size(self, context=None):
         return 4
@@ -254,6 +279,8 @@ class Float(FloatType, BasicBase):
 class HFloat(Float, EditableFloatSpinBox):
     """Implementation of a 16-bit float."""
 
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         """Initialize the float."""
         super(HFloat, self).__init__(**kwargs)
@@ -267,14 +294,15 @@ class HFloat(Float, EditableFloatSpinBox):
             return float()
         bits = ((value & 32768) << 16) | \
                ((exponent + 0x0001C000) | mantissa) << 13
-        return struct.unpack(bom + "f", struct.pack(bom + "I", bits))[0]
+        return get_struct("f", bom).unpack(get_struct("I", bom).pack(bits))[0]
 
     @staticmethod
     def fromFloatFast(bom, value):
         if value > 131008.000:
             bits = 0x47FFE000
         else:
-            bits = struct.unpack(bom + "I", struct.pack(bom + "f", value))[0]
+            bits = get_struct("I", bom).unpack(
+                get_struct("f", bom).pack(value))[0]
         if (bits & 0x7FFFFFFF) < 0x38800000: return int()
         result = ((bits + 0x48000000) & ~0x3ff) | (bits & 0x3ff)
         return ((result >> 13) & 0xFFFF) | ((bits & 0x80000000) >> 16)
@@ -363,11 +391,12 @@ class HFloat(Float, EditableFloatSpinBox):
         f_inf_result = HFloat.h_sels(is_inf_msb, f_e_mask, f_denorm_result)
         f_nan_result = HFloat.h_sels(is_nan_msb, f_em_nan, f_inf_result)
         f_result = f_s | f_nan_result
-        return struct.unpack(bom + "f", struct.pack(bom + "I", f_result))[0]
+        return get_struct("f", bom).unpack(
+            get_struct("I", bom).pack(f_result))[0]
 
     @staticmethod
     def fromFloatAccurate(bom, value):
-        f = struct.unpack(bom + "I", struct.pack(bom + "f", value))[0]
+        f = get_struct("I", bom).unpack(get_struct("f", bom).pack(value))[0]
         one = 0x00000001
         f_s_mask = 0x80000000
         f_e_mask = 0x7f800000
@@ -439,8 +468,8 @@ class HFloat(Float, EditableFloatSpinBox):
         :type stream: file
         """
         bom = context._byte_order
-        boi = bom + "H"
-        self._value = HFloat.toFloat(bom, struct.unpack(boi, stream.read(2))[0])
+        codec = get_struct("H", bom)
+        self._value = HFloat.toFloat(bom, codec.unpack(stream.read(2))[0])
 
     def write(self, stream, context=None):
         """Write value to stream.
@@ -449,13 +478,13 @@ class HFloat(Float, EditableFloatSpinBox):
         :type stream: file
         """
         bom = context._byte_order
-        boi = bom + "H"
+        codec = get_struct("H", bom)
         try:
-            stream.write(struct.pack(boi, HFloat.fromFloat(bom, self._value)))
+            stream.write(codec.pack(HFloat.fromFloat(bom, self._value)))
         except OverflowError:
             logger = logging.getLogger("pyffi.object_models")
             logger.warn("float value overflow, writing NaN")
-            stream.write(struct.pack(boi, 0x7fff))
+            stream.write(codec.pack(0x7fff))
 
     def get_size(self, context=None):
         """Return number of bytes this type occupies in a file.
@@ -476,8 +505,12 @@ class HFloat(Float, EditableFloatSpinBox):
 class Double(Float, DoubleType):
     """Implementation of an 64-bit float"""
 
+    __slots__ = ()
+
 
 class ZString(ZStringType, BasicBase):
+
+    __slots__ = ()
     def __init__(self, **kwargs):
         super(BasicBase, self).__init__(**kwargs)
         self._value = b''
@@ -530,6 +563,8 @@ class ZString(ZStringType, BasicBase):
 
 
 class FixedString(FStringType, BasicBase):
+
+    __slots__ = ()
     def __init__(self, **kwargs):
         """Initialize the string."""
         super(BasicBase, self).__init__(**kwargs)
@@ -576,6 +611,8 @@ class SizedString(SStringType, BasicBase):
     'Hi There'
     """
 
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         """Initialize the string."""
         super(BasicBase, self).__init__(**kwargs)
@@ -597,8 +634,8 @@ class SizedString(SStringType, BasicBase):
         :param stream: The stream to read from.
         :type stream: file
         """
-        length, = struct.unpack(context._byte_order + 'I',
-                                stream.read(4))
+        length, = get_struct('I', context._byte_order).unpack(
+            stream.read(4))
         if length > 10000:
             raise ValueError('string too long (0x%08X at 0x%08X)'
                              % (length, stream.tell()))
@@ -610,12 +647,14 @@ class SizedString(SStringType, BasicBase):
         :param stream: The stream to write to.
         :type stream: file
         """
-        stream.write(struct.pack(context._byte_order + 'I',
-                                 len(self._value)))
+        stream.write(get_struct('I', context._byte_order).pack(
+            len(self._value)))
         stream.write(self._value)
 
 
 class UndecodedData(UDataType, BasicBase):
+
+    __slots__ = ()
     def __init__(self, **kwargs):
         super(BasicBase, self).__init__(**kwargs)
         self._value = b''
@@ -631,7 +670,7 @@ class UndecodedData(UDataType, BasicBase):
         return self.get_value()
 
     def read(self, stream, context=Context()):
-        self._value = stream.read(-1)
+        self._value = read_view(stream, -1)
 
     def write(self, stream, context=None):
         stream.write(self._value)
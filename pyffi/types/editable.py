@@ -57,6 +57,8 @@ graphical user interface.
 class EditableBase(object):
     """The base class for all delegates."""
 
+    __slots__ = ()
+
     def get_editor_value(self):
         """Return data as a value to initialize an editor with.
         Override this method.
@@ -86,6 +88,8 @@ class EditableSpinBox(EditableBase):
     must take an ``int``.
     """
 
+    __slots__ = ()
+
     def get_editor_value(self):
         return self.get_value()
 
@@ -108,6 +112,8 @@ class EditableFloatSpinBox(EditableSpinBox):
     must take a ``float``.
     """
 
+    __slots__ = ()
+
     def get_editor_decimals(self):
         return 5
 
@@ -119,7 +125,7 @@ class EditableLineEdit(EditableBase):
     Requirement: get_editor_value must return a ``str``, set_editor_value
     must take a ``str``.
     """
-    pass
+    __slots__ = ()
 
 
 class EditableTextEdit(EditableLineEdit):
@@ -128,7 +134,7 @@ class EditableTextEdit(EditableLineEdit):
     Requirement:  get_editor_value must return a ``str``, set_editor_value
     must take a ``str``.
     """
-    pass
+    __slots__ = ()
 
 
 class EditableComboBox(EditableBase):
@@ -139,6 +145,8 @@ class EditableComboBox(EditableBase):
     must take an ``int`` (this integer is the index in the list of keys).
     """
 
+    __slots__ = ()
+
     def get_editor_keys(self):
         """Tuple of strings, each string describing an item."""
         return ()
@@ -150,6 +158,8 @@ class EditableBoolComboBox(EditableComboBox):
     Requirement: get_value must return a ``bool``, set_value must take a ``bool``.
     """
 
+    __slots__ = ()
+
     def get_editor_keys(self):
         return ("False", "True")
 
@@ -13,6 +13,7 @@ This module bundles various general purpose utilities:
    graph
    inertia
    mathutils
+   memoryreader
    mopp
    quickhull
    tangentspace
@@ -62,6 +63,7 @@ This module bundles various general purpose utilities:
 #  ***** END LICENSE BLOCK *****
 # ------------------------------------------------------------------------
 
+import io
 import os
 from distutils.cmd import Command
 
@@ -191,6 +193,51 @@ def unique_map(hash_generator):
     return hash_map, hash_map_inverse
 
 
+def write_buffers(stream, buffers):
+    """Write a sequence of buffers to a stream. If the stream is backed
+    by a file descriptor, then all buffers are written with a single
+    vectored write (os.writev) without joining them first.
+
+    >>> stream = io.BytesIO()
+    >>> write_buffers(stream, [b"ab", bytearray(b"cd"), memoryview(b"ef")])
+    >>> stream.getvalue()
+    b'abcdef'
+
+    :param stream: The stream to write to.
+    :type stream: file
+    :param buffers: The buffers to write, in order.
+    :type buffers: sequence of bytes-like objects
+    """
+    try:
+        fileno = stream.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        fileno = None
+    if fileno is None or not hasattr(os, "writev"):
+        for buf in buffers:
+            stream.write(buf)
+        return
+    # write pending data, and rewind any read ahead, so the file
+    # position of the descriptor matches the position of the stream
+    stream.flush()
+    views = [memoryview(buf).cast("B") for buf in buffers if len(buf)]
+    try:
+        iov_max = max(os.sysconf("SC_IOV_MAX"), 1)
+    except (AttributeError, ValueError, OSError):
+        iov_max = 16
+    while views:
+        num_bytes = os.writev(fileno, views[:iov_max])
+        # drop the buffers that were written completely
+        index = 0
+        while index < len(views) and num_bytes >= len(views[index]):
+            num_bytes -= len(views[index])
+            index += 1
+        del views[:index]
+        if num_bytes:
+            views[0] = views[0][num_bytes:]
+    # synchronize the position of the stream with the descriptor
+    stream.seek(os.lseek(fileno, 0, os.SEEK_CUR))
+
+
 if __name__ == '__main__':
     import doctest
 
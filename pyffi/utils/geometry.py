@@ -0,0 +1,332 @@
+"""Geometry kernels, which work on all vertices, normals, uvs or colors
+of a geometry at once, rather than element by element.
+
+Values are taken from arrays of struct elements into flat buffers of
+doubles with :func:`get_buffer`, processed, and stored back with
+:func:`set_buffer`. Buffers are two dimensional NumPy arrays (one row per
+element) if NumPy is available, and flat ``array.array('d')`` buffers
+otherwise. Arrays that store their elements in columns (see
+:class:`pyffi.engines.xml.array.ColumnArray`) are converted without
+creating any element instances.
+
+>>> class Vector(object):
+...     def __init__(self, x, y, z):
+...         self.x, self.y, self.z = x, y, z
+>>> verts = [Vector(1, 2, 3), Vector(4, 5, 6), Vector(1.2, 3.4, 5.6)]
+>>> buf = get_buffer(verts, VECTOR3)
+>>> get_bounding_box(buf, 3)
+((1.0, 2.0, 3.0), (4.0, 5.0, 6.0))
+>>> center, radius = get_center_radius(buf, 3)
+>>> center, round(radius, 4)
+((2.5, 3.5, 4.5), 2.5981)
+>>> list(get_vertex_hashes(3, [(buf, 3, 1000)]))
+[(1000, 2000, 3000), (4000, 5000, 6000), (1200, 3400, 5600)]
+>>> get_farthest_point(buf, 3, (0, 0, 0))
+(1, 77.0)
+>>> set_buffer(verts, VECTOR3, scale(buf, 2))
+>>> verts[1].x, verts[1].y, verts[1].z
+(8.0, 10.0, 12.0)
+>>> buf = transform(get_buffer(verts, VECTOR3), 3,
+...                 [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0], [1, 2, 3, 1]])
+>>> get_bounding_box(buf, 3)
+((3.0, 6.0, 9.0), (9.0, 12.0, 15.0))
+>>> list(get_vertex_hashes(2, []))
+[(), ()]
+"""
+
+# ------------------------------------------------------------------------
+#  ***** BEGIN LICENSE BLOCK *****
+#
+#  Copyright © 2007-2019, Python File Format Interface.
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#
+#     * Redistributions in binary form must reproduce the above
+#       copyright notice, this list of conditions and the following
+#       disclaimer in the documentation and/or other materials provided
+#       with the distribution.
+#
+#     * Neither the name of the Python File Format Interface
+#       project nor the names of its contributors may be used to endorse
+#       or promote products derived from this software without specific
+#       prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+#  LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+#
+#  ***** END LICENSE BLOCK *****
+# ------------------------------------------------------------------------
+
+import array
+import operator
+
+from pyffi.utils.mathutils import float_to_int
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+VECTOR3 = ("x", "y", "z")
+"""Fields of vertices and normals."""
+
+TEXCOORD = ("u", "v")
+"""Fields of uv coordinates."""
+
+COLOR4 = ("r", "g", "b", "a")
+"""Fields of vertex colors."""
+
+# largest value that is quantized by numpy; beyond this, integers
+# could overflow, so float_to_int is used instead
+_MAX_QUANTIZE = 2.0 ** 62
+
+
+def get_buffer(elements, fields):
+    """Get the given fields of all elements, as a buffer of doubles.
+
+    :param elements: The elements, for instance ``geomdata.vertices``.
+    :param fields: The names of the fields to get, at least two.
+    :type fields: ``tuple`` of ``str``
+    :return: The buffer.
+    """
+    fields = tuple(fields)
+    get_field_names = getattr(elements, "get_field_names", None)
+    if get_field_names is not None and get_field_names() == fields:
+        # column storage: no need to create elements
+        buf = elements.get_buffer()
+        if numpy is not None:
+            return numpy.array(buf, dtype=numpy.float64).reshape(
+                -1, len(fields))
+        return array.array('d', buf)
+    get_fields = operator.attrgetter(*fields)
+    buf = array.array('d')
+    for elem in elements:
+        buf.extend(get_fields(elem))
+    if numpy is not None:
+        return numpy.frombuffer(buf, dtype=numpy.float64).reshape(
+            -1, len(fields))
+    return buf
+
+
+def set_buffer(elements, fields, buf):
+    """Set the given fields of all elements from a buffer, which must
+    have as many rows as there are elements.
+
+    :param elements: The elements, for instance ``geomdata.vertices``.
+    :param fields: The names of the fields to set, at least two.
+    :type fields: ``tuple`` of ``str``
+    :param buf: The buffer.
+    """
+    fields = tuple(fields)
+    stride = len(fields)
+    get_field_names = getattr(elements, "get_field_names", None)
+    if get_field_names is not None and get_field_names() == fields:
+        # column storage: assign all values at once
+        column = elements.get_buffer()
+        if numpy is not None:
+            column[...] = numpy.asarray(buf).reshape(column.shape)
+        else:
+            column[:] = array.array(column.typecode, buf)
+        return
+    if numpy is not None:
+        buf = numpy.asarray(buf).ravel().tolist()
+    for i, elem in enumerate(elements):
+        for field, value in zip(fields, buf[i * stride:(i + 1) * stride]):
+            setattr(elem, field, value)
+
+
+def _columns(buf, stride):
+    """List of all columns of a buffer (fallback only)."""
+    return [buf[i::stride] for i in range(stride)]
+
+
+def get_bounding_box(buf, stride):
+    """Minimal and maximal value of every column, in a single pass.
+
+    :return: Pair of tuples, or ``None`` if the buffer is empty.
+    """
+    if len(buf) == 0:
+        return None
+    if numpy is not None:
+        return (tuple(buf.min(axis=0).tolist()),
+                tuple(buf.max(axis=0).tolist()))
+    low = list(buf[:stride])
+    high = list(buf[:stride])
+    for i in range(stride, len(buf), stride):
+        for j in range(stride):
+            value = buf[i + j]
+            if value < low[j]:
+                low[j] = value
+            elif value > high[j]:
+                high[j] = value
+    return tuple(low), tuple(high)
+
+
+def _get_distances(buf, stride, point):
+    """Squared distance of every row to point."""
+    if numpy is not None:
+        result = numpy.zeros(len(buf))
+        for j in range(stride):
+            delta = point[j] - buf[:, j]
+            result += delta * delta
+        return result
+    result = array.array('d', bytes(8 * (len(buf) // stride)))
+    for j, column in enumerate(_columns(buf, stride)):
+        coord = point[j]
+        for i, value in enumerate(column):
+            delta = coord - value
+            result[i] += delta * delta
+    return result
+
+
+def get_center_radius(buf, stride):
+    """Center of the bounding box, and radius of the smallest sphere
+    around this center that contains all rows.
+
+    :return: Pair of center tuple and radius; all zero if the buffer is
+        empty.
+    """
+    box = get_bounding_box(buf, stride)
+    if box is None:
+        return (0.0,) * stride, 0.0
+    low, high = box
+    center = tuple((lo + hi) * 0.5 for lo, hi in zip(low, high))
+    return center, float(max(_get_distances(buf, stride, center))) ** 0.5
+
+
+def get_farthest_point(buf, stride, point):
+    """Index of the first row which is farthest away from point, and its
+    squared distance.
+
+    :return: Pair of index and squared distance. The index is ``None``
+        if all rows coincide with point.
+    """
+    if len(buf) == 0:
+        return None, 0.0
+    distances = _get_distances(buf, stride, point)
+    if numpy is not None:
+        index = int(distances.argmax())
+    else:
+        index = max(range(len(distances)), key=distances.__getitem__)
+    if distances[index] > 0.0:
+        return index, float(distances[index])
+    return None, 0.0
+
+
+def scale(buf, factor):
+    """Multiply all values by factor.
+
+    :return: The scaled buffer.
+    """
+    if numpy is not None:
+        return buf * factor
+    return array.array('d', (value * factor for value in buf))
+
+
+def transform(buf, stride, matrix):
+    """Transform all rows of a buffer of vectors, as row vectors
+    multiplied with matrix, that is, ``v * matrix``. The matrix is given
+    as a list of rows, and has either *stride* rows for a linear
+    transform, or *stride* + 1 rows for an affine one (the last row is
+    then the translation). This matches the convention of
+    :class:`pyffi.formats.nif.NifFormat.Matrix44`.
+
+    :return: The transformed buffer.
+    """
+    rows = [list(row)[:stride] for row in matrix]
+    if numpy is not None:
+        result = numpy.dot(buf, numpy.array(rows[:stride], dtype=numpy.float64))
+        if len(rows) > stride:
+            result += numpy.array(rows[stride], dtype=numpy.float64)
+        return result
+    columns = _columns(buf, stride)
+    offset = rows[stride] if len(rows) > stride else [0.0] * stride
+    new_columns = []
+    for k in range(stride):
+        weights = [rows[j][k] for j in range(stride)]
+        new_columns.append([
+            sum(value * weight for value, weight in zip(values, weights))
+            + offset[k]
+            for values in zip(*columns)])
+    result = array.array('d', bytes(8 * len(buf)))
+    for k, column in enumerate(new_columns):
+        result[k::stride] = array.array('d', column)
+    return result
+
+
+def remap(buf, stride, indices):
+    """Reorder the rows of a buffer.
+
+    :param indices: For every new row, the index of the old row.
+    :return: The buffer with the new rows.
+    """
+    if numpy is not None:
+        return buf[list(indices)]
+    result = array.array('d')
+    for index in indices:
+        result.extend(buf[index * stride:(index + 1) * stride])
+    return result
+
+
+def _quantize(buf, factor):
+    """Round all values of buf times factor to integers, the same way as
+    :func:`pyffi.utils.mathutils.float_to_int`.
+
+    :return: A list of values (fallback), or an integer array.
+    """
+    if numpy is not None:
+        values = buf * factor
+        if (numpy.isfinite(values).all()
+                and numpy.abs(values).max(initial=0.0) < _MAX_QUANTIZE):
+            return numpy.trunc(
+                numpy.where(values > 0, values + 0.5, values - 0.5)
+            ).astype(numpy.int64)
+        # rare case: nan or inf; float_to_int handles these
+        return numpy.array(
+            [[float_to_int(value) for value in row]
+             for row in values.tolist()], dtype=object)
+    return [float_to_int(value * factor) for value in buf]
+
+
+def get_vertex_hashes(count, buffers):
+    """Generator which produces a tuple of integers for each row of all
+    given buffers, which is equal for rows with equal values, up to
+    the given precision.
+
+    :param count: Number of rows.
+    :type count: ``int``
+    :param buffers: List of triples of buffer, stride, and factor;
+        values are multiplied by factor before rounding.
+    :return: A generator yielding a hash tuple for each row.
+    """
+    if not buffers:
+        return (() for i in range(count))
+    quantized = [_quantize(buf, factor) for buf, stride, factor in buffers]
+    if numpy is not None:
+        if len(quantized) == 1:
+            rows = quantized[0]
+        else:
+            rows = numpy.hstack(quantized)
+        return (tuple(row) for row in rows[:count].tolist())
+    strides = [stride for buf, stride, factor in buffers]
+    return (
+        tuple(value
+              for values, stride in zip(quantized, strides)
+              for value in values[i * stride:(i + 1) * stride])
+        for i in range(count))
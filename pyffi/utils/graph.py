@@ -121,6 +121,8 @@ class DetailNode(object):
     implemented.
     """
 
+    __slots__ = ()
+
     def get_detail_child_nodes(self, edge_filter=EdgeFilter()):
         """Generator which yields all children of this item in the
         detail view (by default, all acyclic and active ones).
@@ -180,6 +182,8 @@ class DetailNode(object):
 class GlobalNode(DetailNode):
     """A node of the global graph."""
 
+    __slots__ = ()
+
     def get_global_display(self):
         """Very short summary of the data of this global branch for display
         purposes. Override this method.
@@ -0,0 +1,142 @@
+"""
+Memory Reader
+=============
+
+An in-memory stream for fast parsing of whole files.
+
+Every basic type reads its value with its own small ``stream.read`` call.
+:class:`MemoryReader` holds the complete file in memory, so these calls
+never reach the file system, while still supporting ``tell``, ``seek``
+and ``readline`` as used by the ``inspect`` and ``read`` methods of all
+file formats. Large payloads can be taken as zero-copy views of the
+buffer with :func:`read_view`.
+
+>>> reader = MemoryReader(b"\\x03\\x00\\x00\\x00abcdef", name="test.bin")
+>>> reader.read(4)
+b'\\x03\\x00\\x00\\x00'
+>>> view = read_view(reader, 3)
+>>> view.tobytes(), reader.tell()
+(b'abc', 7)
+>>> reader.seek(1, 1)
+8
+>>> reader.read(), reader.name
+(b'ef', 'test.bin')
+>>> import io
+>>> read_view(io.BytesIO(b"abc"), 2)
+b'ab'
+"""
+
+# ------------------------------------------------------------------------
+#  ***** BEGIN LICENSE BLOCK *****
+#
+#  Copyright © 2007-2019, Python File Format Interface.
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#
+#     * Redistributions in binary form must reproduce the above
+#       copyright notice, this list of conditions and the following
+#       disclaimer in the documentation and/or other materials provided
+#       with the distribution.
+#
+#     * Neither the name of the Python File Format Interface
+#       project nor the names of its contributors may be used to endorse
+#       or promote products derived from this software without specific
+#       prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+#  LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+#
+#  ***** END LICENSE BLOCK *****
+# ------------------------------------------------------------------------
+
+import io
+
+
+class MemoryReader(io.BytesIO):
+    """A read only stream on top of a bytes buffer. The buffer is shared,
+    not copied, and views returned by :meth:`read_view` keep it alive,
+    so values read from the stream remain valid after it is closed.
+    """
+
+    def __init__(self, buffer, name=None):
+        """Initialize the reader.
+
+        :param buffer: The contents of the stream.
+        :type buffer: ``bytes``
+        :param name: The name of the stream, usually the file name.
+        :type name: ``str``
+        """
+        io.BytesIO.__init__(self, buffer)
+        self._view = memoryview(buffer)
+        self.name = name
+
+    @classmethod
+    def open(cls, filename):
+        """Read a file into a new reader, with a single read call.
+
+        :param filename: The file to read.
+        :type filename: ``str``
+        :rtype: :class:`MemoryReader`
+        """
+        with open(filename, "rb") as stream:
+            return cls(stream.read(), name=filename)
+
+    @classmethod
+    def from_stream(cls, stream):
+        """Read the full contents of an open stream into a new reader,
+        positioned where the stream is.
+
+        :param stream: The stream to read.
+        :type stream: ``file``
+        :rtype: :class:`MemoryReader`
+        """
+        pos = stream.tell()
+        stream.seek(0)
+        reader = cls(stream.read(), name=getattr(stream, "name", None))
+        reader.seek(pos)
+        return reader
+
+    def read_view(self, size=-1):
+        """Read at most *size* bytes, returned as a read only
+        ``memoryview`` of the buffer rather than as a copy.
+        """
+        pos = self.tell()
+        if size < 0:
+            view = self._view[pos:]
+        else:
+            view = self._view[pos:pos + size]
+        self.seek(pos + len(view))
+        return view
+
+    def writable(self):
+        return False
+
+    def write(self, data):
+        raise io.UnsupportedOperation("write")
+
+
+def read_view(stream, size):
+    """Read *size* bytes from *stream*. For a :class:`MemoryReader`, this
+    is a zero-copy ``memoryview``, for other streams it is ``bytes``.
+    """
+    try:
+        read = stream.read_view
+    except AttributeError:
+        return stream.read(size)
+    return read(size)
@@ -50,6 +50,7 @@ http://home.comcast.net/~tom_forsyth/papers/fast_vert_cache_opt.html
 # ------------------------------------------------------------------------
 
 import collections
+import heapq
 from functools import reduce
 
 from pyffi.utils.tristrip import OrientedStrip
@@ -87,6 +88,16 @@ class VertexScore:
             if valence > 0 else None
             for valence in range(self.MAX_TRIANGLES_PER_VERTEX + 1)]
 
+        # full score, as calculated by update_score, indexed by
+        # cache position + 1 and by number of triangles
+        self.SCORE_TABLE = [
+            [-1] + [
+                (self.CACHE_SCORE[cache_position]
+                 if cache_position >= 0 else 0)
+                + self.VALENCE_SCORE[valence]
+                for valence in range(1, self.MAX_TRIANGLES_PER_VERTEX + 1)]
+            for cache_position in range(-1, self.CACHE_SIZE)]
+
     def update_score(self, vertex_info):
         """Update score:
 
@@ -344,15 +355,143 @@ class Mesh:
         return triangles
 
 
-def get_cache_optimized_triangles(triangles):
+def get_cache_optimized_triangles(triangles, vertex_score=None):
     """Calculate cache optimized triangles, and return the result as
     a reordered set of triangles or strip of stitched triangles.
 
+    This gives the same result as
+    :meth:`Mesh.get_cache_optimized_triangles`, but keeps all vertex
+    and triangle data in flat lists, looks up vertex scores in
+    :attr:`VertexScore.SCORE_TABLE`, and keeps a priority queue of
+    triangles for finding the best triangle whenever the cache holds no
+    more triangles.
+
+    >>> get_cache_optimized_triangles([(0,1,2), (7,8,9),(2,3,4)])
+    [(7, 8, 9), (0, 1, 2), (2, 3, 4)]
+    >>> get_cache_optimized_triangles([])
+    []
+
     :param triangles: The triangles (triples of vertex indices).
+    :param vertex_score: The scoring algorithm.
+    :type vertex_score: :class:`VertexScore`
     :return: A list of reordered triangles.
     """
-    mesh = Mesh(triangles)
-    return mesh.get_cache_optimized_triangles()
+    if vertex_score is None:
+        vertex_score = VertexScore()
+    cache_size = vertex_score.CACHE_SIZE
+    triangles = list(triangles)
+    if triangles:
+        num_vertices = max(max(verts) for verts in triangles) + 1
+    else:
+        num_vertices = 0
+    unique_triangles = list(get_unique_triangles(triangles))
+    num_triangles = len(unique_triangles)
+    # vertices of every triangle, 3 per triangle
+    triangle_vertices = [
+        vertex for verts in unique_triangles for vertex in verts]
+    # triangles not yet drawn, for each vertex: these are stored in
+    # vertex_triangles[vertex_start[vertex]:vertex_start[vertex] + valence[vertex]]
+    # in the same order as VertexInfo.triangle_indices
+    valence = [0] * num_vertices
+    for vertex in triangle_vertices:
+        valence[vertex] += 1
+    vertex_start = [0] * num_vertices
+    total = 0
+    for vertex in range(num_vertices):
+        vertex_start[vertex] = total
+        total += valence[vertex]
+    vertex_triangles = [0] * total
+    vertex_end = list(vertex_start)
+    for index, vertex in enumerate(triangle_vertices):
+        vertex_triangles[vertex_end[vertex]] = index // 3
+        vertex_end[vertex] += 1
+    del vertex_end
+    # extend score table so it can be indexed by any valence of the mesh
+    num_extra = max(valence, default=0) - vertex_score.MAX_TRIANGLES_PER_VERTEX
+    score_table = [row + row[-1:] * num_extra
+                   for row in vertex_score.SCORE_TABLE]
+    not_in_cache_scores = score_table[0]
+    cache_position = [-1] * num_vertices
+    vertex_scores = [not_in_cache_scores[num] for num in valence]
+    triangle_scores = [
+        vertex_scores[v0] + vertex_scores[v1] + vertex_scores[v2]
+        for v0, v1, v2 in unique_triangles]
+    drawn = bytearray(num_triangles)
+    num_left = num_triangles
+    # queue of (-score, triangle index) for triangles without vertices in
+    # the cache; entries whose score no longer matches are skipped
+    queue = [(-score, index) for index, score in enumerate(triangle_scores)]
+    heapq.heapify(queue)
+
+    result = []
+    cache = collections.deque()
+    updated_triangles = set()
+    while updated_triangles or num_left:
+        # pick triangle with highest score
+        if updated_triangles:
+            best = max(updated_triangles, key=triangle_scores.__getitem__)
+        else:
+            # no vertex in the cache has triangles left, so all triangles
+            # have an up to date entry in the queue
+            while True:
+                neg_score, best = heapq.heappop(queue)
+                if not drawn[best] and triangle_scores[best] == -neg_score:
+                    break
+        # mark as added
+        drawn[best] = 1
+        num_left -= 1
+        verts = unique_triangles[best]
+        result.append(verts)
+        # update in the same order as Mesh.get_cache_optimized_triangles,
+        # so the set of updated triangles iterates in the same order
+        updated_triangles = set()
+        update_triangles = updated_triangles.update
+        removed_vertices = []
+        for vertex in verts:
+            start = vertex_start[vertex]
+            end = start + valence[vertex]
+            # remove triangle from the triangle list of the vertex
+            index = vertex_triangles.index(best, start, end)
+            vertex_triangles[index:end - 1] = vertex_triangles[index + 1:end]
+            valence[vertex] -= 1
+            update_triangles(vertex_triangles[start:end - 1])
+        # add each vertex to cache
+        for vertex in verts:
+            if cache_position[vertex] < 0:
+                cache.appendleft(vertex)
+                cache_position[vertex] = 0
+                if len(cache) > cache_size:
+                    removed_vertex = cache.pop()
+                    removed_vertices.append(removed_vertex)
+                    cache_position[removed_vertex] = -1
+                    num = valence[removed_vertex]
+                    vertex_scores[removed_vertex] = not_in_cache_scores[num]
+                    start = vertex_start[removed_vertex]
+                    update_triangles(vertex_triangles[start:start + num])
+        # update cache positions and scores of all vertices in the cache
+        # (this includes those from the just added triangle)
+        for position, vertex in enumerate(cache, 1):
+            cache_position[vertex] = position - 1
+            num = valence[vertex]
+            vertex_scores[vertex] = score_table[position][num]
+            start = vertex_start[vertex]
+            update_triangles(vertex_triangles[start:start + num])
+        # update triangle scores
+        for triangle in updated_triangles:
+            v0, v1, v2 = unique_triangles[triangle]
+            triangle_scores[triangle] = (
+                vertex_scores[v0] + vertex_scores[v1] + vertex_scores[v2])
+        # triangles which no longer have a vertex in the cache can only
+        # have lost one through these vertices
+        for vertex in removed_vertices:
+            start = vertex_start[vertex]
+            for triangle in vertex_triangles[start:start + valence[vertex]]:
+                v0, v1, v2 = unique_triangles[triangle]
+                if (cache_position[v0] < 0 and cache_position[v1] < 0
+                        and cache_position[v2] < 0):
+                    heapq.heappush(
+                        queue, (-triangle_scores[triangle], triangle))
+    return result
 
 
 def get_unique_triangles(triangles):
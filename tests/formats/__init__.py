@@ -0,0 +1 @@
+"""Tests for file formats"""
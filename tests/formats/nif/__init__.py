@@ -0,0 +1,76 @@
+"""Tests for the nif format, and helpers to create test nifs"""
+
+import io
+
+from pyffi.formats.nif import NifFormat
+
+
+def make_nif(version=0x14020007, user_version=11, num_shapes=1,
+             num_triangles=1, share_data=False, num_nodes=0,
+             binary_data=None):
+    """Create a nif with a "Scene Root" node.
+
+    :param num_shapes: Number of NiTriShape children of the root, named
+        Shape0, Shape1, ... Shape i has a NiTriShapeData with
+        *num_triangles* triangles (0, 1, i + 2), and i + 3 vertices whose
+        x coordinates are 0, 1, 2, ...
+    :param share_data: If ``True``, all shapes share the data of the
+        first shape.
+    :param num_nodes: Number of NiNode children of the root, after the
+        shapes.
+    :param binary_data: If not ``None``, add a NiBinaryExtraData with
+        these bytes to the root.
+    :return: The data.
+    """
+    data = NifFormat.Data(version=version, user_version=user_version)
+    root = NifFormat.NiNode()
+    root.name = b"Scene Root"
+    shape_data = None
+    for i in range(num_shapes):
+        shape = NifFormat.NiTriShape()
+        shape.name = b"Shape%i" % i
+        if shape_data is None or not share_data:
+            shape_data = NifFormat.NiTriShapeData()
+            shape_data.set_triangles([(0, 1, i + 2)] * num_triangles)
+            shape_data.num_vertices = i + 3
+            shape_data.has_vertices = True
+            shape_data.vertices.update_size()
+            for j, vertex in enumerate(shape_data.vertices):
+                vertex.x = j
+        shape.data = shape_data
+        root.add_child(shape)
+    for i in range(num_nodes):
+        root.add_child(NifFormat.NiNode())
+    if binary_data is not None:
+        extra = NifFormat.NiBinaryExtraData()
+        extra.binary_data = binary_data
+        root.add_extra_data(extra)
+    data.roots = [root]
+    return data
+
+
+def get_bytes(data):
+    """Write the data, and return the bytes written."""
+    stream = io.BytesIO()
+    data.write(stream)
+    return stream.getvalue()
+
+
+def make_nif_bytes(**kwargs):
+    """Create a nif with :func:`make_nif`, and return its bytes."""
+    return get_bytes(make_nif(**kwargs))
+
+
+def make_nif_stream(**kwargs):
+    """Create a nif with :func:`make_nif`, and return a stream from which
+    it can be read."""
+    return io.BytesIO(make_nif_bytes(**kwargs))
+
+
+def read_nif(stream):
+    """Read a nif from a stream, or from bytes."""
+    if isinstance(stream, bytes):
+        stream = io.BytesIO(stream)
+    data = NifFormat.Data()
+    data.read(stream)
+    return data
@@ -0,0 +1,82 @@
+import io
+import sys
+
+from pyffi.formats.nif import NifFormat
+from nose.tools import assert_equals, assert_raises, assert_true
+
+
+class TestBlockList:
+    """Regression tests for the block list built by NifFormat.Data.write."""
+
+    def test_deep_tree(self):
+        # deeper than the recursion limit
+        depth = sys.getrecursionlimit() + 100
+        nodes = [NifFormat.NiNode() for i in range(depth)]
+        for parent, child in zip(nodes, nodes[1:]):
+            parent.add_child(child)
+        data = NifFormat.Data(version=0x14000005, user_version=11)
+        data.roots = [nodes[0]]
+        data.write(io.BytesIO())
+        assert_equals(len(data.blocks), depth)
+        assert_true(all(block is node
+                        for block, node in zip(data.blocks, nodes)))
+        assert_equals(len(list(nodes[0].tree(unique=True))), depth)
+
+    def test_shared_block(self):
+        root = NifFormat.NiNode()
+        prop = NifFormat.NiMaterialProperty()
+        for i in range(3):
+            child = NifFormat.NiNode()
+            child.add_property(prop)
+            root.add_child(child)
+        data = NifFormat.Data(version=0x14000005, user_version=11)
+        data.roots = [root]
+        data.write(io.BytesIO())
+        assert_equals(len(data.blocks), 5)
+        assert_equals(data.get_header_block_types(),
+                      set(["NiNode", "NiMaterialProperty"]))
+        assert_equals(len(list(root.tree(unique=True))), 5)
+        assert_equals(len(list(root.tree())), 7)
+        assert_raises(ValueError, root._validateTree)
+
+    def test_read_links(self):
+        root = NifFormat.NiNode()
+        prop = NifFormat.NiMaterialProperty()
+        for i in range(100):
+            child = NifFormat.NiNode()
+            child.add_property(prop)
+            root.add_child(child)
+        data = NifFormat.Data(version=0x14000005, user_version=11)
+        data.roots = [root]
+        stream = io.BytesIO()
+        data.write(stream)
+        stream.seek(0)
+        data = NifFormat.Data()
+        data.read(stream)
+        root = data.roots[0]
+        assert_equals(len(data.blocks), 102)
+        assert_equals(len(root.children), 100)
+        prop = root.children[0].properties[0]
+        assert_true(isinstance(prop, NifFormat.NiMaterialProperty))
+        assert_true(all(child.properties[0] is prop
+                        for child in root.children))
+
+    def test_string_table(self):
+        root = NifFormat.NiNode()
+        root.name = b"Root"
+        for name in (b"B", b"A", b"B", b"C"):
+            child = NifFormat.NiNode()
+            child.name = name
+            root.add_child(child)
+        data = NifFormat.Data(version=0x14020007, user_version=11)
+        data.roots = [root]
+        streams = [io.BytesIO(), io.BytesIO()]
+        for stream in streams:
+            data.write(stream)
+        assert_equals(list(data.header.strings), [b"Root", b"B", b"A", b"C"])
+        assert_equals(streams[0].getvalue(), streams[1].getvalue())
+        streams[0].seek(0)
+        data = NifFormat.Data()
+        data.read(streams[0])
+        assert_equals([child.name for child in data.roots[0].children],
+                      [b"B", b"A", b"B", b"C"])
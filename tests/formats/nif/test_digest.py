@@ -0,0 +1,44 @@
+from pyffi.formats.nif import NifFormat
+from nose.tools import assert_equals, assert_true
+
+from tests.formats.nif import make_nif, get_bytes, read_nif
+
+
+class TestDigest:
+    """Tests for digests of nif blocks and files."""
+
+    def test_block_digest(self):
+        data = make_nif(num_shapes=2, share_data=True)
+        shape1, shape2 = data.roots[0].children
+        assert_true(shape1.get_digest(data) != shape2.get_digest(data))
+        shape2.name = b"Shape0"
+        assert_equals(shape1.get_digest(data), shape2.get_digest(data))
+
+    def test_block_digest_ref(self):
+        data = make_nif(num_shapes=2, share_data=True)
+        shape = data.roots[0].children[0]
+        digest = shape.get_digest(data)
+        # changing a linked block changes the digest
+        shape.data.set_triangles([(0, 2, 1)])
+        assert_true(shape.get_digest(data) != digest)
+
+    def test_file_digest(self):
+        data = make_nif(num_shapes=2, share_data=True)
+        data2 = read_nif(get_bytes(data))
+        assert_equals(data.get_digest(), data2.get_digest())
+        data2.roots[0].children[1].name = b"Shape3"
+        assert_true(data.get_digest() != data2.get_digest())
+
+    def test_block_digest_cache(self):
+        data = make_nif(num_shapes=2, share_data=True)
+        shape1, shape2 = data.roots[0].children
+        digest = shape1.get_digest(data)
+        # changing another block keeps the cached digest
+        shape2.name = b"Shape3"
+        assert_true(shape1.get_digest(data) is digest)
+        # changing a nested structure or an array element does not
+        shape1.translation.x = 1.0
+        assert_true(shape1.get_digest(data) != digest)
+        digest = shape1.get_digest(data)
+        shape1.data.vertices[0].x = 5.0
+        assert_true(shape1.get_digest(data) != digest)
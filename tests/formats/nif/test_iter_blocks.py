@@ -0,0 +1,36 @@
+from pyffi.formats.nif import NifFormat
+from nose.tools import assert_equals, assert_true
+
+from tests.formats.nif import make_nif_stream
+
+
+class TestIterBlocks:
+    """Tests for streaming reads with NifFormat.Data.iter_blocks."""
+
+    def test_iter_blocks(self):
+        data = NifFormat.Data()
+        blocks = list(data.iter_blocks(make_nif_stream()))
+        assert_equals([(index, block_type) for index, block_type, block in blocks],
+                      [(0, "NiNode"), (1, "NiTriShape"), (2, "NiTriShapeData")])
+        assert_equals(blocks[2][2].get_triangles(), [(0, 1, 2)])
+        # nothing is kept
+        assert_equals(data.blocks, [])
+        assert_equals(data.header.num_blocks, 3)
+
+    def test_iter_blocks_types(self):
+        stream = make_nif_stream()
+        blocks = list(NifFormat.Data().iter_blocks(
+            stream, types=["NiTriShapeData"]))
+        assert_equals(len(blocks), 1)
+        index, block_type, block = blocks[0]
+        assert_equals(index, 2)
+        assert_true(isinstance(block, NifFormat.NiTriShapeData))
+        assert_equals(block.get_triangles(), [(0, 1, 2)])
+
+    def test_iter_blocks_types_no_block_size(self):
+        # older nifs do not store block sizes, so blocks are read to skip them
+        stream = make_nif_stream(version=0x14000005, user_version=0)
+        blocks = list(NifFormat.Data().iter_blocks(
+            stream, types=[NifFormat.NiAVObject]))
+        assert_equals([block_type for index, block_type, block in blocks],
+                      ["NiNode", "NiTriShape"])
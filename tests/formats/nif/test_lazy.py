@@ -0,0 +1,35 @@
+import io
+
+from pyffi.formats.nif import NifFormat
+from nose.tools import assert_equals, assert_false, assert_true
+
+from tests.formats.nif import make_nif_stream
+
+
+class TestLazyRead:
+    """Regression tests for lazy reading of NifFormat.Data."""
+
+    def test_lazy_read(self):
+        stream = make_nif_stream()
+        data = NifFormat.Data()
+        data.read(stream, lazy=True)
+        assert_equals(len(data.blocks), 3)
+        # only the root has been read
+        assert_equals(
+            [data.blocks.is_read(i) for i in range(3)], [True, False, False])
+        assert_equals(data.blocks.get_block_type(2), "NiTriShapeData")
+        # following the link reads the shape
+        shape = data.roots[0].children[0]
+        assert_true(isinstance(shape, NifFormat.NiTriShape))
+        assert_true(data.blocks.is_read(1))
+        assert_false(data.blocks.is_read(2))
+        assert_equals(shape.data.get_triangles(), [(0, 1, 2)])
+        assert_true(data.blocks[2] is shape.data)
+
+    def test_lazy_write(self):
+        stream = make_nif_stream()
+        data = NifFormat.Data()
+        data.read(stream, lazy=True)
+        result = io.BytesIO()
+        data.write(result)
+        assert_equals(result.getvalue(), stream.getvalue())
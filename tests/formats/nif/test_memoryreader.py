@@ -0,0 +1,55 @@
+from pyffi.formats.nif import NifFormat
+from pyffi.engines.xml import patch, snapshot
+from pyffi.utils.memoryreader import MemoryReader
+from nose.tools import assert_equals, assert_true
+
+from tests.formats.nif import make_nif, make_nif_bytes, get_bytes
+
+
+def read_memory(raw):
+    reader = MemoryReader(raw, name="test.nif")
+    data = NifFormat.Data()
+    data.inspect(reader)
+    data.read(reader)
+    return data
+
+
+class TestMemoryReader:
+    """Reading nif files from a MemoryReader."""
+
+    def setUp(self):
+        self.raw = make_nif_bytes(binary_data=b"\x01\x02\x03")
+
+    def test_read(self):
+        data = read_memory(self.raw)
+        root = data.roots[0]
+        assert_equals(root.name, b"Scene Root")
+        extra = root.extra_data_list[0]
+        # payload is a view of the buffer, not a copy
+        node = extra.get_attribute("binary_data")
+        assert_true(isinstance(node._value, memoryview))
+        assert_equals(get_bytes(data), self.raw)
+        # the view is not exposed
+        binary_data = extra.binary_data
+        assert_true(isinstance(binary_data, bytes))
+        assert_equals(binary_data, b"\x01\x02\x03")
+        assert_equals(get_bytes(data), self.raw)
+
+    def test_digest(self):
+        data = make_nif(binary_data=b"\x01\x02\x03")
+        assert_equals(read_memory(self.raw).get_digest(), data.get_digest())
+        data.roots[0].extra_data_list[0].binary_data = b"\x01\x02\x04"
+        assert_true(read_memory(self.raw).get_digest() != data.get_digest())
+
+    def test_snapshot(self):
+        data = snapshot.loads(snapshot.dumps(read_memory(self.raw)))
+        assert_equals(get_bytes(data), self.raw)
+
+    def test_patch(self):
+        data = read_memory(self.raw)
+        base = patch.PatchBase(data)
+        data.roots[0].extra_data_list[0].binary_data = b"\x04\x05"
+        patch_bytes = patch.dumps(data, base)
+        data2 = read_memory(self.raw)
+        patch.apply(data2, patch_bytes)
+        assert_equals(get_bytes(data2), get_bytes(data))
@@ -0,0 +1,93 @@
+import zlib
+
+from pyffi.formats.nif import NifFormat
+from pyffi.engines.xml import patch
+from nose.tools import assert_equals, assert_true, raises
+
+from tests.formats.nif import make_nif_bytes, get_bytes, read_nif
+
+
+class TestPatch:
+    """Tests for block level patches of nifs."""
+
+    def setUp(self):
+        self.raw = make_nif_bytes(num_shapes=10, num_triangles=100)
+        self.data = read_nif(self.raw)
+        self.base = patch.PatchBase(self.data)
+
+    def check_patch(self):
+        """Make a patch for the changed data, apply it to the original
+        file, and check the result."""
+        patch_bytes = patch.dumps(self.data, self.base)
+        data = read_nif(self.raw)
+        patch.apply(data, patch_bytes)
+        assert_equals(get_bytes(data), get_bytes(self.data))
+        return patch_bytes
+
+    def test_unchanged(self):
+        self.check_patch()
+
+    def test_change(self):
+        shape = self.data.roots[0].children[3]
+        shape.name = b"Renamed"
+        patch_bytes = self.check_patch()
+        # unchanged shape data is not stored
+        assert_true(len(patch_bytes) < len(self.raw) // 10)
+
+    def test_reorder(self):
+        root = self.data.roots[0]
+        children = list(root.children)
+        children.reverse()
+        root.set_children(children)
+        patch_bytes = self.check_patch()
+        assert_true(len(patch_bytes) < len(self.raw) // 10)
+
+    def test_new_block(self):
+        shape = self.data.roots[0].children[0]
+        shape.data = NifFormat.NiTriShapeData()
+        shape.data.set_triangles([(2, 1, 0)])
+        self.check_patch()
+
+    @raises(ValueError)
+    def test_mismatch(self):
+        self.data.roots[0].children[0].name = b"Renamed"
+        patch_bytes = patch.dumps(self.data, self.base)
+        # the patch does not apply to other files
+        patch.apply(read_nif(make_nif_bytes(num_shapes=9, num_triangles=100)), patch_bytes)
+
+    @raises(ValueError)
+    def test_invalid(self):
+        patch.apply(self.data, b"not a patch")
+
+    def make_patch(self, state):
+        out = bytearray()
+        patch._encode(out, state)
+        return patch._MAGIC + zlib.compress(bytes(out))
+
+    @raises(ValueError)
+    def test_invalid_block_type(self):
+        # only blocks of the format can be created
+        patch.apply(self.data, self.make_patch(
+            [patch.PATCH_VERSION, len(self.data.blocks), [], [],
+             [["Data", []]], []]))
+
+    @raises(ValueError)
+    def test_invalid_index(self):
+        patch.apply(self.data, self.make_patch(
+            [patch.PATCH_VERSION, len(self.data.blocks), [], [], [],
+             [["roots", [1]]]]))
+
+    @raises(ValueError)
+    def test_invalid_nesting(self):
+        # a list which contains a list which contains a list...
+        out = bytearray(b"l\x02")
+        patch._encode(out, patch.PATCH_VERSION)
+        out += b"l\x01" * 100000 + b"N"
+        patch.apply(self.data, patch._MAGIC + zlib.compress(bytes(out)))
+
+    def test_encode(self):
+        obj = [None, True, False, 0, -1, 2 ** 70, 1.5, b"\x00ab", "text",
+               [[], [1, [b"x"]]]]
+        out = bytearray()
+        patch._encode(out, obj)
+        assert_equals(patch._decode(out, 0), (obj, len(out)))
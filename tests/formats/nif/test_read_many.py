@@ -0,0 +1,70 @@
+import os.path
+import tempfile
+
+from pyffi.formats.nif import NifFormat
+from nose.tools import assert_equals, assert_true
+
+from tests.formats.nif import make_nif_bytes
+
+
+def num_blocks(data):
+    """Summary of a nif for read_many."""
+    return len(data.blocks)
+
+
+def write_nifs(folder, num_files):
+    """Write nifs with 1, 2, ..., num_files nodes, and a file which is not
+    a nif, and return their paths."""
+    paths = []
+    for i in range(num_files):
+        path = os.path.join(folder, "test%i.nif" % i)
+        with open(path, "wb") as stream:
+            stream.write(make_nif_bytes(num_shapes=0, num_nodes=i))
+        paths.append(path)
+    path = os.path.join(folder, "invalid.nif")
+    with open(path, "wb") as stream:
+        stream.write(b"not a nif")
+    paths.append(path)
+    return paths
+
+
+class TestReadMany:
+    """Tests for FileFormat.read_many."""
+
+    def test_read_many(self):
+        with tempfile.TemporaryDirectory() as folder:
+            paths = write_nifs(folder, 3)
+            results = dict(NifFormat.read_many(paths, workers=1))
+        assert_equals(set(results), set(paths))
+        for i in range(3):
+            data = results[paths[i]]
+            assert_true(isinstance(data, NifFormat.Data))
+            assert_equals(len(data.blocks), i + 1)
+        assert_true(isinstance(results[paths[3]], ValueError))
+
+    def test_read_many_workers_summary(self):
+        with tempfile.TemporaryDirectory() as folder:
+            paths = write_nifs(folder, 5)
+            results = dict(NifFormat.read_many(
+                paths, workers=2, summary=num_blocks, max_pending=3))
+        assert_equals([results[path] for path in paths[:5]], [1, 2, 3, 4, 5])
+        assert_true(isinstance(results[paths[5]], ValueError))
+
+    def test_read_many_workers(self):
+        with tempfile.TemporaryDirectory() as folder:
+            paths = write_nifs(folder, 3)
+            results = dict(NifFormat.read_many(paths, workers=2))
+        for i in range(3):
+            data = results[paths[i]]
+            assert_true(isinstance(data, NifFormat.Data))
+            assert_equals(len(data.blocks), i + 1)
+            assert_true(data.roots[0] is data.blocks[0])
+        assert_true(isinstance(results[paths[3]], ValueError))
+
+    def test_read_many_inspect(self):
+        with tempfile.TemporaryDirectory() as folder:
+            paths = write_nifs(folder, 2)
+            results = dict(NifFormat.read_many(
+                paths[:2], workers=1, mode='inspect'))
+        assert_equals(results[paths[1]].header.num_blocks, 2)
+        assert_equals(results[paths[1]].blocks, [])
@@ -0,0 +1,54 @@
+import pickle
+
+from pyffi.formats.nif import NifFormat
+from pyffi.engines.xml import snapshot
+from pyffi.utils.memoryreader import MemoryReader
+from nose.tools import assert_equals, assert_true, raises
+
+from tests.formats.nif import make_nif, make_nif_bytes, get_bytes, read_nif
+
+
+class TestSnapshot:
+    """Tests for snapshots of nif data."""
+
+    def check_round_trip(self, data):
+        data2 = snapshot.loads(snapshot.dumps(data))
+        assert_equals(data2.version, data.version)
+        assert_equals(data2.user_version, data.user_version)
+        assert_equals(get_bytes(data2), get_bytes(data))
+        return data2
+
+    def test_round_trip(self):
+        data = self.check_round_trip(make_nif(num_triangles=2))
+        root, = data.roots
+        shape = root.children[0]
+        assert_true(isinstance(shape, NifFormat.NiTriShape))
+        assert_equals(shape.data.get_triangles(), [(0, 1, 2), (0, 1, 2)])
+        assert_equals([vertex.x for vertex in shape.data.vertices],
+                      [0, 1, 2])
+
+    def test_round_trip_read(self):
+        data = read_nif(make_nif_bytes())
+        data2 = self.check_round_trip(data)
+        # links are shared between the block list and the roots
+        assert_true(data2.roots[0] is data2.blocks[0])
+
+    def test_round_trip_memory_reader(self):
+        raw = make_nif_bytes(binary_data=b"\x01\x02\x03")
+        reader = MemoryReader(raw, name="test.nif")
+        data = NifFormat.Data()
+        data.read(reader)
+        # the payload is held as a view of the buffer of the reader
+        extra = data.roots[0].extra_data_list[0]
+        assert_true(isinstance(
+            extra.get_attribute("binary_data")._value, memoryview))
+        data2 = self.check_round_trip(data)
+        assert_equals(data2.roots[0].extra_data_list[0].binary_data,
+                      b"\x01\x02\x03")
+
+    def test_round_trip_old_version(self):
+        self.check_round_trip(make_nif(version=0x04000002, user_version=0))
+
+    @raises(ValueError)
+    def test_bad_version(self):
+        snapshot.loads(pickle.dumps((0,)))
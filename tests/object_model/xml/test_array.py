@@ -0,0 +1,152 @@
+import io
+import unittest
+
+from nose.tools import assert_equals, assert_raises, assert_true
+
+from pyffi.engines.xml import StructAttribute as Attr
+from pyffi.engines.xml.array import ColumnArray, _get_bulk_codec
+from pyffi.engines.xml.struct_ import StructBase
+from pyffi.object_models import FileFormat
+import pyffi.types.common
+
+
+class SimpleFormat(object):
+    UShort = pyffi.types.common.UShort
+    Float = pyffi.types.common.Float
+    SizedString = pyffi.types.common.SizedString
+
+    @staticmethod
+    def name_attribute(name):
+        return name
+
+
+class Vector(StructBase):
+    _attrs = [
+        Attr(SimpleFormat, dict(name='x', type='Float')),
+        Attr(SimpleFormat, dict(name='y', type='Float'))]
+
+SimpleFormat.Vector = Vector
+
+
+class Named(StructBase):
+    _attrs = [
+        Attr(SimpleFormat, dict(name='name', type='SizedString'))]
+
+SimpleFormat.Named = Named
+
+
+class Geometry(StructBase):
+    _attrs = [
+        Attr(SimpleFormat, dict(name='num', type='UShort')),
+        Attr(SimpleFormat, dict(name='vectors', type='Vector', arr1='num')),
+        Attr(SimpleFormat, dict(name='indices', type='UShort', arr1='num')),
+        Attr(SimpleFormat, dict(name='matrix', type='Float',
+                                arr1='num', arr2='num'))]
+
+SimpleFormat.Geometry = Geometry
+
+
+class TestBulkArray(unittest.TestCase):
+
+    def setUp(self):
+        self.data = FileFormat.Data()
+        self.geom = Geometry()
+        self.geom.num = 3
+        self.geom.vectors.update_size()
+        self.geom.indices.update_size()
+        self.geom.matrix.update_size()
+        for i, vec in enumerate(self.geom.vectors):
+            vec.x = i
+            vec.y = -0.5 * i
+            self.geom.indices[i] = 7 + i
+            self.geom.matrix[i][i] = 1.0
+
+    def test_codec(self):
+        assert_true(_get_bulk_codec(SimpleFormat.UShort, self.data))
+        assert_equals(_get_bulk_codec(Vector, self.data)[0].format, '<ff')
+        assert_equals(_get_bulk_codec(Named, self.data), None)
+
+    def test_round_trip(self):
+        stream = io.BytesIO()
+        self.geom.write(stream, self.data)
+        assert_equals(len(stream.getvalue()), self.geom.get_size(self.data))
+        stream.seek(0)
+        geom = Geometry()
+        geom.read(stream, self.data)
+        assert_equals([(vec.x, vec.y) for vec in geom.vectors],
+                      [(0.0, 0.0), (1.0, -0.5), (2.0, -1.0)])
+        assert_equals(list(geom.indices), [7, 8, 9])
+        assert_equals([list(row) for row in geom.matrix],
+                      [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]])
+
+
+class ColumnGeometry(Geometry):
+    _attrs = []
+    _columnar_attrs = ('vectors', 'indices', 'matrix')
+    use_columnar_arrays = True
+
+
+class TestColumnArray(unittest.TestCase):
+
+    def setUp(self):
+        self.data = FileFormat.Data()
+        geom = TestBulkArray('test_round_trip')
+        geom.setUp()
+        self.stream = io.BytesIO()
+        geom.geom.write(self.stream, self.data)
+        self.stream.seek(0)
+        self.geom = ColumnGeometry()
+        self.geom.read(self.stream, self.data)
+
+    def test_storage(self):
+        assert_true(isinstance(self.geom.vectors, ColumnArray))
+        assert_true(isinstance(self.geom.vectors[0], Vector))
+        assert_equals(self.geom.vectors[1].y, -0.5)
+        assert_equals(list(self.geom.indices), [7, 8, 9])
+        assert_equals(self.geom.matrix[2][2], 1.0)
+
+    def test_modify(self):
+        self.geom.vectors[1].y = 3.0
+        self.geom.indices[0] = 1
+        assert_equals(self.geom.vectors[1].y, 3.0)
+        assert_equals(self.geom.indices[0], 1)
+        self.geom.num = 4
+        self.geom.vectors.update_size()
+        self.geom.matrix.update_size()
+        assert_equals(len(self.geom.vectors), 4)
+        assert_equals([len(row) for row in self.geom.matrix], [4, 4, 4, 4])
+
+    def test_write(self):
+        stream = io.BytesIO()
+        self.geom.write(stream, self.data)
+        assert_equals(stream.getvalue(), self.stream.getvalue())
+        assert_equals(self.geom.get_size(self.data),
+                      len(self.stream.getvalue()))
+
+    def test_assign(self):
+        vec = Vector()
+        vec.x = 5.0
+        vec.y = 6.0
+        self.geom.vectors[0] = vec
+        self.geom.vectors[-1] = self.geom.vectors[1]
+        assert_equals([(vec.x, vec.y) for vec in self.geom.vectors],
+                      [(5.0, 6.0), (1.0, -0.5), (1.0, -0.5)])
+        self.geom.matrix[0][1] = 2.0
+        assert_equals(list(self.geom.matrix[0]), [1.0, 2.0, 0.0])
+        assert_raises(TypeError, self.geom.vectors.__setitem__, 0, 1.0)
+        assert_raises(IndexError, self.geom.vectors.__setitem__, 3, vec)
+        assert_raises(TypeError, self.geom.matrix.__setitem__, 0, [])
+
+    def test_assign_digest(self):
+        digest = self.geom.get_digest(self.data)
+        vec = Vector()
+        self.geom.vectors[0] = vec
+        assert_true(self.geom.get_digest(self.data) != digest)
+
+    def test_fixed_size(self):
+        assert_raises(TypeError, self.geom.vectors.append, Vector())
+        assert_raises(TypeError, self.geom.vectors.pop)
+        assert_raises(TypeError, self.geom.matrix.extend, [])
+        assert_equals(len(self.geom.vectors), 3)
+        assert_equals([vec.x for vec in reversed(self.geom.vectors)],
+                      [2.0, 1.0, 0.0])
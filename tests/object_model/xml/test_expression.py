@@ -1,6 +1,7 @@
 import unittest
 
 from pyffi.engines.xml import Expression
+from pyffi.engines.xml.niftools.expression import Expression as NifExpression
 from nose.tools import assert_equals, assert_false, assert_true, raises
 
 
@@ -54,6 +55,23 @@ class TestExpression(unittest.TestCase):
         self.a.x = B()
         assert_equals(Expression('x * 10').eval(self.a), 70)
 
+    @raises(AttributeError)
+    def test_both_operands_evaluated(self):
+        # no short circuit evaluation
+        Expression('x && c').eval(self.a)
+
+    def test_map(self):
+        e = Expression('(x == 0) && y')
+        assert_true(bool(e.eval(self.a)))
+        e.map_(lambda name: A if name == 'y' else name)
+        assert_true(bool(e.eval(self.a)))
+        assert_false(bool(e.eval(type('C', (object,), {'x': 0})())))
+
+    def test_niftools_expression(self):
+        e = NifExpression('(x || y) && 1')
+        assert_equals(e.expression_str, '(x || y) && 1')
+        assert_equals(e.eval(self.a), 1)
+
 class TestPartition:
 
     def test_partition_empty(self):
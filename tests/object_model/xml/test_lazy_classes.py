@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from nose.tools import assert_equals, assert_false, assert_true
+
+import pyffi.engines.xml
+import pyffi.types.common
+
+SIMPLE_XML = """<?xml version="1.0"?>
+<fileformat>
+<basic name="UShort"/>
+<basic name="Float"/>
+<alias name="Count" type="UShort"/>
+<struct name="Vector"><add name="x" type="Float" default="1.5"/></struct>
+<struct name="Base">
+    <add name="num" type="Count" default="2"/>
+    <add name="later" type="Later"/>
+</struct>
+<struct name="Derived" inherit="Base">
+    <add name="vector" type="Vector"/>
+    <add name="extra" type="Float" cond="num == 1"/>
+</struct>
+<struct name="Custom" inherit="Derived"><add name="z" type="UShort" default="7"/></struct>
+<struct name="Later"><add name="y" type="UShort" default="3"/></struct>
+</fileformat>
+"""
+
+
+def make_format(xml_path, lazy):
+    class SimpleFormat(pyffi.engines.xml.FileFormat):
+        xml_file_name = "simple.xml"
+        xml_file_path = [xml_path]
+        lazy_classes = lazy
+        UShort = pyffi.types.common.UShort
+        Float = pyffi.types.common.Float
+
+        @staticmethod
+        def name_attribute(name):
+            return name.lower()
+
+        class Custom:
+            def get_z(self):
+                return self.z
+
+    return SimpleFormat
+
+
+def describe(fmt):
+    """Names, bases, and attributes of all generated classes, in order."""
+    return [
+        (klass.__name__,
+         [base.__name__ for base in klass.__mro__],
+         [(attr.name, attr.type_.__name__, attr.default)
+          for attr in klass.__dict__.get("_attrs", ())])
+        for klass in list(fmt.xml_alias) + list(fmt.xml_struct)]
+
+
+class TestLazyClasses(unittest.TestCase):
+
+    def setUp(self):
+        self.xml_path = tempfile.mkdtemp()
+        with open(os.path.join(self.xml_path, "simple.xml"), "w") as xml:
+            xml.write(SIMPLE_XML)
+        self.cache_dir = os.environ.get("PYFFI_CACHE_DIR")
+        os.environ["PYFFI_CACHE_DIR"] = ""
+
+    def tearDown(self):
+        shutil.rmtree(self.xml_path)
+        if self.cache_dir is None:
+            del os.environ["PYFFI_CACHE_DIR"]
+        else:
+            os.environ["PYFFI_CACHE_DIR"] = self.cache_dir
+
+    def test_deferred(self):
+        fmt = make_format(self.xml_path, True)
+        assert_false("Vector" in fmt.__dict__)
+        assert_false("Custom" in fmt.__dict__)
+        custom = fmt.Custom()
+        # the class and its bases now exist, unrelated classes do not
+        assert_true("Derived" in fmt.__dict__)
+        assert_false("Vector" in fmt.__dict__)
+        assert_true(isinstance(custom, fmt.Base))
+        assert_true(issubclass(fmt.Custom, fmt._Custom))
+        assert_equals(custom.get_z(), 7)
+        assert_equals(custom.num, 2)
+        assert_equals(custom.later.y, 3)
+        assert_equals(custom.vector.x, 1.5)
+        assert_true(fmt.Custom is fmt.Custom)
+        self.assertRaises(AttributeError, getattr, fmt, "Missing")
+
+    def test_same_classes(self):
+        assert_equals(describe(make_format(self.xml_path, True)),
+                      describe(make_format(self.xml_path, False)))
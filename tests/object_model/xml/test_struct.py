@@ -0,0 +1,176 @@
+import struct
+import unittest
+
+from nose.tools import assert_equals, assert_true
+
+from pyffi.engines.xml import StructAttribute as Attr
+from pyffi.engines.xml.struct_ import StructBase
+from pyffi.types.basic import BasicBase
+
+
+class SimpleFormat(object):
+    class UInt(BasicBase):
+        _is_template = False
+
+        def __init__(self, **kwargs):
+            BasicBase.__init__(self, **kwargs)
+            self.__value = 0
+
+        def get_value(self):
+            return self.__value
+
+        def set_value(self, value):
+            self.__value = int(value)
+
+        def write(self, stream, data):
+            stream.write(struct.pack('<I', self.__value))
+
+    @staticmethod
+    def name_attribute(name):
+        return name
+
+    @staticmethod
+    def version_number(version_str):
+        return int(version_str)
+
+
+class X(StructBase):
+    _is_template = False
+    _attrs = [
+        Attr(SimpleFormat, dict(name='a', type='UInt')),
+        Attr(SimpleFormat, dict(name='b', type='UInt', ver1='5')),
+        Attr(SimpleFormat, dict(name='c', type='UInt', cond='a == 1')),
+        Attr(SimpleFormat, dict(name='c', type='UInt', ver2='3')),
+        Attr(SimpleFormat, dict(name='d', type='UInt', userver='2'))]
+
+SimpleFormat.X = X
+
+
+class Data(object):
+    def __init__(self, version, user_version):
+        self.version = version
+        self.user_version = user_version
+
+
+class TestStructPlan(unittest.TestCase):
+
+    def setUp(self):
+        self.x = X()
+
+    def names(self, data=None):
+        return [attr.name for attr in self.x._get_filtered_attribute_list(data)]
+
+    def test_version_filter(self):
+        self.x.a = 1
+        assert_equals(self.names(Data(6, 2)), ['a', 'b', 'c', 'd'])
+        assert_equals(self.names(Data(2, 0)), ['a', 'c'])
+        assert_equals(self.names(), ['a', 'b', 'c', 'd'])
+
+    def test_runtime_condition(self):
+        self.x.a = 0
+        assert_equals(self.names(Data(6, 2)), ['a', 'b', 'd'])
+        # the duplicate name is used when the first condition fails
+        assert_equals(self.names(Data(2, 2)), ['a', 'c', 'd'])
+
+    def test_plan_cache(self):
+        self.names(Data(6, 2))
+        self.names(Data(6, 2))
+        assert_true((6, 2) in X._plans)
+        steps, has_duplicates = X._plans[(6, 2)]
+        assert_equals([entry[1] for entry, cond, vercond in steps],
+                      ['_a_value_', '_b_value_', '_c_value_', '_d_value_'])
+        assert_true(not has_duplicates)
+        assert_true(X._get_plan(2, 2)[1])
+
+
+class TestStructSlots(unittest.TestCase):
+
+    def test_value_slots(self):
+        assert_equals(X.__slots__, ('_a_value_', '_b_value_', '_c_value_',
+                                    '_d_value_'))
+        x = X()
+        x.a = 3
+        assert_equals(x._a_value_.get_value(), 3)
+        # values are not stored in the instance dictionary
+        assert_equals(vars(x), {})
+
+    def test_customizer(self):
+        class Y(X):
+            _attrs = [Attr(SimpleFormat, dict(name='a', type='UInt')),
+                      Attr(SimpleFormat, dict(name='e', type='UInt'))]
+
+        class Custom(object):
+            def get_e(self):
+                return self.e
+
+        # as done by the xml handler for customized classes
+        klass = type('Custom', (Y,) + Custom.__bases__, dict(Custom.__dict__))
+        assert_equals(Y.__slots__, ('_e_value_',))
+        y = klass()
+        y.e = 4
+        y.extra = 5
+        assert_equals(y.get_e(), 4)
+        assert_equals(vars(y), {'extra': 5})
+
+
+class TestStructDescriptors(unittest.TestCase):
+
+    def test_basic(self):
+        assert_equals(X.a.slot, '_a_value_')
+        x = X()
+        x.a = 5
+        assert_equals(x.a, 5)
+        assert_equals(x.get_basic_attribute('a'), 5)
+
+    def test_struct(self):
+        class Z(StructBase):
+            _attrs = [
+                Attr(SimpleFormat, dict(name='x', type='X')),
+                Attr(SimpleFormat, dict(name='t', type='TEMPLATE')),
+                Attr(SimpleFormat, dict(name='n', type='UInt', arr1='2'))]
+
+        z = Z(template=SimpleFormat.UInt)
+        x = X()
+        z.x = x
+        assert_true(z.x is x)
+        self.assertRaises(TypeError, setattr, z, 'x', 1)
+        # template attributes of basic type get and set the value
+        z.t = 3
+        assert_equals(z.t, 3)
+        # arrays cannot be replaced
+        assert_equals(len(z.n), 2)
+        self.assertRaises(AttributeError, setattr, z, 'n', [])
+        assert_equals(Z._slot_names['x'], '_x_value_')
+
+
+class TestStructDigest(unittest.TestCase):
+
+    def setUp(self):
+        self.x = X()
+        self.x.a = 2
+
+    def test_equal(self):
+        y = X()
+        y.a = 2
+        assert_equals(self.x.get_digest(), y.get_digest())
+
+    def test_cache(self):
+        digest = self.x.get_digest()
+        assert_true(self.x.get_digest() is digest)
+
+    def test_set_value(self):
+        digest = self.x.get_digest()
+        self.x.a = 3
+        assert_true(self.x.get_digest() != digest)
+        self.x.a = 2
+        assert_equals(self.x.get_digest(), digest)
+
+    def test_version(self):
+        # b is only present from version 5 onwards
+        self.x.b = 1
+        y = X()
+        y.a = 2
+        assert_equals(self.x.get_digest(Data(4, 0)),
+                      y.get_digest(Data(4, 0)))
+        assert_true(self.x.get_digest(Data(5, 0))
+                    != y.get_digest(Data(5, 0)))
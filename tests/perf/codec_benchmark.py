@@ -0,0 +1,129 @@
+"""Time reading, writing and packing of the numeric and bitfield types.
+
+For every type, prints the time per value of reading and writing it
+through its codec, and of packing it with struct.pack and a format
+string built on every call, as all types did before the codec registry.
+
+Usage: python codec_benchmark.py [num_values]
+"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright (c) 2007-2012, Python File Format Interface
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the Python File Format Interface
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import io
+import struct
+import sys
+import timeit
+
+from pyffi.context import Context
+from pyffi.types import binary
+from pyffi.types.codec import BitLayout
+
+TYPES = [
+    binary.ByteType, binary.UByteType, binary.ShortType, binary.UShortType,
+    binary.IntType, binary.UIntType, binary.Int64Type, binary.UInt64Type,
+    binary.HFloat, binary.Float, binary.Double]
+
+
+def benchmark(name, func, num_values):
+    seconds = min(timeit.repeat(func, number=1, repeat=3))
+    return "%8.1f" % (1e9 * seconds / num_values)
+
+
+def benchmark_type(type_, num_values):
+    context = Context()
+    value = type_()
+    value.value = 1
+    stream = io.BytesIO()
+    for i in range(num_values):
+        value.write(stream, context)
+    buf = stream.getvalue()
+
+    def read():
+        stream = io.BytesIO(buf)
+        for i in range(num_values):
+            value.read(stream, context)
+
+    def write():
+        stream = io.BytesIO()
+        for i in range(num_values):
+            value.write(stream, context)
+
+    def pack():
+        codec = type_._codecs[context.byte_order]
+        for i in range(num_values):
+            codec.pack(1)
+
+    def pack_format():
+        for i in range(num_values):
+            struct.pack(context.byte_order + type_._struct, 1)
+
+    print("%-12s %s %s %s %s" % (
+        type_.__name__,
+        benchmark("read", read, num_values),
+        benchmark("write", write, num_values),
+        benchmark("pack", pack, num_values),
+        benchmark("format", pack_format, num_values)))
+
+
+def benchmark_bitfield(numbits, num_values):
+    layout = BitLayout(numbits)
+    fields = layout.unpack(0x12345678)
+
+    def unpack():
+        for i in range(num_values):
+            layout.unpack(0x12345678)
+
+    def pack():
+        for i in range(num_values):
+            layout.pack(fields)
+
+    print("%-12s %s %s" % (
+        "bits %i" % len(numbits),
+        benchmark("unpack", unpack, num_values),
+        benchmark("pack", pack, num_values)))
+
+
+if __name__ == "__main__":
+    num_values = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print("nanoseconds per value")
+    print("%-12s %8s %8s %8s %8s" % ("type", "read", "write", "pack", "format"))
+    for type_ in TYPES:
+        benchmark_type(type_, num_values)
+    print("%-12s %8s %8s" % ("bitfield", "unpack", "pack"))
+    for numbits in ([1] * 8, [4, 4, 8, 16], [1] * 32):
+        benchmark_bitfield(numbits, num_values)
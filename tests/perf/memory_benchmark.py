@@ -0,0 +1,83 @@
+"""Measure the memory used per block when reading nif and cgf files.
+
+Every file is read completely, and the memory allocated while reading
+it, as reported by tracemalloc, is divided by the number of blocks (nif)
+or chunks (cgf).
+
+Usage: python memory_benchmark.py file.nif file.cgf ...
+"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright (c) 2007-2012, Python File Format Interface
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the Python File Format Interface
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import gc
+import sys
+import tracemalloc
+
+from pyffi.formats.cgf import CgfFormat
+from pyffi.formats.nif import NifFormat
+
+
+def measure(filename):
+    """Read the file, and return the number of blocks, and the number of
+    bytes allocated for them."""
+    if filename.lower().endswith(".cgf"):
+        data = CgfFormat.Data()
+    else:
+        data = NifFormat.Data()
+    with open(filename, "rb") as stream:
+        gc.collect()
+        tracemalloc.start()
+        data.read(stream)
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+    blocks = data.chunks if isinstance(data, CgfFormat.Data) else data.blocks
+    return len(blocks), size
+
+
+if __name__ == "__main__":
+    total_blocks = total_size = 0
+    for filename in sys.argv[1:]:
+        num_blocks, size = measure(filename)
+        total_blocks += num_blocks
+        total_size += size
+        print("%s: %i blocks, %i bytes per block"
+              % (filename, num_blocks, size // max(num_blocks, 1)))
+    if total_blocks:
+        print("total: %i blocks, %i bytes per block"
+              % (total_blocks, total_size // total_blocks))
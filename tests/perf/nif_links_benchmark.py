@@ -0,0 +1,79 @@
+"""Time reading of a synthetic nif file with many links.
+
+The file has a root node with one child node per link, so resolving the
+links dominates the time to read it.
+
+Usage: python nif_links_benchmark.py [num_links]
+"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright (c) 2007-2012, Python File Format Interface
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the Python File Format Interface
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import io
+import sys
+import time
+
+from pyffi.formats.nif import NifFormat
+
+
+def make_nif(num_links):
+    """Write a nif whose root node links to *num_links* child nodes."""
+    root = NifFormat.NiNode()
+    root.num_children = num_links
+    root.children.update_size()
+    for i in range(num_links):
+        root.children[i] = NifFormat.NiNode()
+    data = NifFormat.Data(version=0x14020007, user_version=11)
+    data.roots = [root]
+    stream = io.BytesIO()
+    data.write(stream)
+    return stream
+
+
+if __name__ == "__main__":
+    num_links = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    stream = make_nif(num_links)
+    for lazy in (False, True):
+        stream.seek(0)
+        data = NifFormat.Data()
+        start = time.perf_counter()
+        data.read(stream, lazy=lazy)
+        children = data.roots[0].children
+        end = time.perf_counter()
+        assert len(children) == num_links
+        print("read %i links%s: %.3fs"
+              % (num_links, " (lazy)" if lazy else "", end - start))
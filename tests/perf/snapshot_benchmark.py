@@ -0,0 +1,76 @@
+"""Time restoring nifs from snapshots against reading them.
+
+For every nif given on the command line, prints the size of the file and
+of its snapshot, and the time taken by NifFormat.Data.read and by
+pyffi.engines.xml.snapshot.loads.
+
+Usage: python snapshot_benchmark.py file.nif [file.nif ...]
+"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright (c) 2007-2012, Python File Format Interface
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the Python File Format Interface
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import io
+import sys
+import timeit
+
+from pyffi.formats.nif import NifFormat
+from pyffi.engines.xml import snapshot
+
+
+def benchmark_file(path, number=10):
+    with open(path, "rb") as stream:
+        raw = stream.read()
+
+    def read():
+        data = NifFormat.Data()
+        data.read(io.BytesIO(raw))
+        return data
+
+    snap = snapshot.dumps(read())
+    read_time = timeit.timeit(read, number=number) / number
+    loads_time = timeit.timeit(
+        lambda: snapshot.loads(snap), number=number) / number
+    print("%-40s %10i %10i %10.2f %10.2f" % (
+        path[-40:], len(raw), len(snap), 1000 * read_time, 1000 * loads_time))
+
+
+if __name__ == "__main__":
+    print("%-40s %10s %10s %10s %10s" % (
+        "file", "size", "snapshot", "read (ms)", "loads (ms)"))
+    for path in sys.argv[1:]:
+        benchmark_file(path)
@@ -0,0 +1,84 @@
+"""Time the import of the xml based file formats, with and without the
+xml cache.
+
+Every import runs in a fresh interpreter, as for a command line tool or a
+process pool worker.
+
+Usage: python startup_benchmark.py [module ...]
+"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright (c) 2007-2012, Python File Format Interface
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the Python File Format Interface
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def time_import(module, cache_dir, lazy=""):
+    """Import the module in a new interpreter, and return the time taken
+    and the peak resident set size in kilobytes.
+    """
+    env = dict(os.environ, PYFFI_CACHE_DIR=cache_dir,
+               PYFFI_LAZY_CLASSES=lazy)
+    start = time.perf_counter()
+    rss = subprocess.check_output(
+        [sys.executable, "-c",
+         "import resource, %s; "
+         "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+         % module], env=env)
+    return time.perf_counter() - start, int(rss)
+
+
+if __name__ == "__main__":
+    modules = sys.argv[1:] or ["pyffi.formats.nif", "pyffi.formats.cgf"]
+    for module in modules:
+        cache_dir = tempfile.mkdtemp()
+        try:
+            uncached = time_import(module, "")
+            cold = time_import(module, cache_dir)
+            warm = min(time_import(module, cache_dir) for i in range(3))
+            lazy = min(time_import(module, cache_dir, "1") for i in range(3))
+        finally:
+            shutil.rmtree(cache_dir)
+        print("%-20s no cache %.3fs, cold cache %.3fs, warm cache %.3fs"
+              % (module, uncached[0], cold[0], warm[0]))
+        print("%-20s lazy classes %.3fs, rss %i kB (%i kB without)"
+              % ("", lazy[0], lazy[1], warm[1]))
@@ -0,0 +1,107 @@
+"""Compare the reference and the fast vertex cache optimizer.
+
+Prints the average transform to vertex ratio and the runtime of both
+implementations, for all triangle based geometries in the given nif files
+(by default, the test nifs), and for a few synthetic grids.
+
+Usage: python vertex_cache_benchmark.py [file.nif ...]
+"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright (c) 2007-2012, Python File Format Interface
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the Python File Format Interface
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import glob
+import os.path
+import random
+import sys
+import time
+
+from pyffi.formats.nif import NifFormat
+from pyffi.utils.vertex_cache import (
+    Mesh, get_cache_optimized_triangles, average_transform_to_vertex_ratio)
+
+
+def grid(size):
+    triangles = []
+    for i in range(size):
+        for j in range(size):
+            v0 = i * (size + 1) + j
+            v1 = v0 + size + 1
+            triangles.append((v0, v0 + 1, v1))
+            triangles.append((v0 + 1, v1 + 1, v1))
+    random.shuffle(triangles)
+    return triangles
+
+
+def nif_meshes(filenames):
+    for filename in filenames:
+        data = NifFormat.Data()
+        with open(filename, "rb") as stream:
+            data.read(stream)
+        for block in data.blocks:
+            if isinstance(block, NifFormat.NiTriBasedGeomData):
+                triangles = list(block.get_triangles())
+                if triangles:
+                    yield os.path.basename(filename), triangles
+
+
+def benchmark(name, triangles):
+    start = time.perf_counter()
+    reference = Mesh(triangles).get_cache_optimized_triangles()
+    middle = time.perf_counter()
+    result = get_cache_optimized_triangles(triangles)
+    end = time.perf_counter()
+    if result != reference:
+        print("%s: results differ!" % name)
+    print("%-30s %7i %6.3f %6.3f %8.3fs %8.3fs" % (
+        name, len(triangles),
+        average_transform_to_vertex_ratio(triangles),
+        average_transform_to_vertex_ratio(result),
+        middle - start, end - middle))
+
+
+if __name__ == "__main__":
+    filenames = sys.argv[1:] or glob.glob(os.path.join(
+        os.path.dirname(__file__), os.pardir, "spells", "nif", "files",
+        "*.nif"))
+    random.seed(0)
+    print("%-30s %7s %6s %6s %9s %9s" % (
+        "mesh", "tris", "atvr", "opt", "reference", "fast"))
+    for name, triangles in nif_meshes(filenames):
+        benchmark(name, triangles)
+    for size in (10, 50, 100):
+        benchmark("grid %i" % size, grid(size))
@@ -80,4 +80,18 @@ class TestExplicitMergeDuplicatesGeomOptimisation(BaseFileTestCase):
         spell = pyffi.spells.nif.optimize.SpellMergeDuplicates(data=self.data)
         spell.recurse()
 
-        assert_false(has_duplicates(self.data.roots[0]))
\ No newline at end of file
+        assert_false(has_duplicates(self.data.roots[0]))
+
+class TestMergeDuplicatesAvoidedChecks(BaseFileTestCase):
+
+    def setUp(self):
+        super(TestMergeDuplicatesAvoidedChecks, self).setUp()
+        self.src_name = "test_opt_mergeduplicates.nif"
+        super(TestMergeDuplicatesAvoidedChecks, self).copyFile()
+        super(TestMergeDuplicatesAvoidedChecks, self).readNifData()
+
+    def test_avoided_checks(self):
+        spell = pyffi.spells.nif.optimize.SpellMergeDuplicates(data=self.data)
+        spell.recurse()
+        assert_true(spell.reports[0]["avoided_checks"] > 0)
+        assert_false(has_duplicates(self.data.roots[0]))
@@ -7,6 +7,12 @@ import nose.tools
 
 from pyffi.formats.nif import NifFormat
 from pyffi.spells import Toaster
+from pyffi.spells.index import HeaderIndex, HeaderSummary
+from pyffi.spells.nif import NifSpell, NifToaster
+from pyffi.spells.nif.check import SpellCheckTriangles, SpellCheckVersion
+from pyffi.spells.nif.fix import (
+    SpellFixEmptySkeletonRoots, SpellSendBonesToBindPosition)
+from pyffi.spells.tga import TgaSpell, TgaToaster
 
 
 class MyToaster(Toaster):
@@ -164,3 +170,147 @@ class TestIniParser:
 
 
 
+
+
+class SpellNoop(NifSpell):
+    SPELLNAME = "test_noop"
+    READONLY = True
+
+    def branchinspect(self, branch):
+        return False
+
+
+class NoopToaster(NifToaster):
+    SPELLS = [SpellNoop]
+
+
+class VersionToaster(NifToaster):
+    SPELLS = [SpellCheckVersion]
+
+
+class SpellTgaNoop(TgaSpell):
+    SPELLNAME = "test_tga_noop"
+    READONLY = True
+
+    def branchinspect(self, branch):
+        return False
+
+
+class TgaNoopToaster(TgaToaster):
+    SPELLS = [SpellTgaNoop]
+
+
+class TestHeaderIndex:
+    """Test skipping files through the header index."""
+
+    def setup(self):
+        self.out = tempfile.mkdtemp()
+        self.index = os.path.join(self.out, "index.db")
+        dir_path = os.path.dirname(os.path.dirname(__file__))
+        self.nif = os.path.join(dir_path, 'spells', 'nif', 'files', 'test.nif')
+
+    def teardown(self):
+        shutil.rmtree(self.out)
+
+    def toast(self, include):
+        toaster = NoopToaster(
+            spellnames=["test_noop"],
+            options={"index": self.index, "include": include, "jobs": 1,
+                     "verbose": 0})
+        toaster.toast(self.nif)
+        return toaster
+
+    def test_index(self):
+        # first run fills the index
+        toaster = self.toast(["NiSkinInstance"])
+        nose.tools.assert_equal(list(toaster.files_done), [self.nif])
+        nose.tools.assert_false(toaster.files_skipped)
+        # second run skips the file without opening it
+        toaster = self.toast(["NiSkinInstance"])
+        nose.tools.assert_false(toaster.files_done)
+        nose.tools.assert_equal(toaster.files_skipped, {self.nif})
+        # a file with matching block types is still toasted
+        toaster = self.toast(["NiNode"])
+        nose.tools.assert_equal(list(toaster.files_done), [self.nif])
+
+    def test_index_unknown_block_type(self):
+        toaster = NoopToaster(options={"include": ["NiNode"]})
+        summary = HeaderSummary(
+            0x14020007, 11, frozenset(["NiUnknownBlock"]))
+        nose.tools.assert_true(SpellNoop.indexinspect(toaster, summary))
+        nose.tools.assert_true(
+            SpellNoop.indexblocktype(summary, NifFormat.NiNode))
+
+    def test_index_blocktypes(self):
+        toaster = NoopToaster()
+        summary = HeaderSummary(
+            0x14020007, 11, frozenset(["NiNode", "NiTriShape"]))
+        nose.tools.assert_true(SpellCheckTriangles.indexinspect(
+            toaster, summary))
+        nose.tools.assert_false(SpellFixEmptySkeletonRoots.indexinspect(
+            toaster, summary))
+        nose.tools.assert_false(SpellSendBonesToBindPosition.indexinspect(
+            toaster, summary))
+        # old nifs do not list their block types
+        summary = HeaderSummary(0x04000002, 0, None)
+        nose.tools.assert_true(SpellFixEmptySkeletonRoots.indexinspect(
+            toaster, summary))
+
+    def test_index_error(self):
+        # errors of the index do not make the file fail
+        toaster = self.toast(["NiNode"])
+        toaster.index = HeaderIndex(self.index)
+        toaster.index.close()
+        with open(self.nif, 'rb') as stream:
+            toaster._toast(stream)
+        nose.tools.assert_equal(list(toaster.files_done), [self.nif])
+        nose.tools.assert_false(toaster.files_failed)
+
+
+class TestLazy:
+    """Test toasting with --lazy."""
+
+    def test_lazy_unsupported(self):
+        """Formats which cannot read lazily are read in full."""
+        dir_path = os.path.dirname(os.path.dirname(__file__))
+        tga = os.path.join(dir_path, 'formats', 'tga', 'test.tga')
+        toaster = TgaNoopToaster(spellnames=["test_tga_noop"],
+                                 options={"lazy": True, "jobs": 1,
+                                          "verbose": 0})
+        toaster.toast(tga)
+        nose.tools.assert_equal(list(toaster.files_done), [tga])
+        nose.tools.assert_false(toaster.files_failed)
+
+
+class TestMultiprocess:
+    """Test toasting with multiple jobs."""
+
+    def setup(self):
+        self.out = tempfile.mkdtemp()
+        dir_path = os.path.dirname(os.path.dirname(__file__))
+        for name in ('test.nif', 'test_vertexcolor.nif', 'invalid.nif'):
+            shutil.copy(
+                os.path.join(dir_path, 'spells', 'nif', 'files', name),
+                self.out)
+
+    def teardown(self):
+        shutil.rmtree(self.out)
+
+    def test_results(self):
+        """Results of all workers are available to the parent."""
+        toaster = NoopToaster(spellnames=["test_noop"],
+                              options={"jobs": 2, "verbose": 0})
+        toaster.toast(self.out)
+        nose.tools.assert_equal(
+            sorted(os.path.basename(name) for name in toaster.files_done),
+            ['test.nif', 'test_vertexcolor.nif'])
+        nose.tools.assert_equal(
+            [os.path.basename(name) for name in toaster.files_failed],
+            ['invalid.nif'])
+
+    def test_toastexit(self):
+        """Statistics of all workers are available to toastexit."""
+        toaster = VersionToaster(spellnames=["check_version"],
+                                 options={"jobs": 2, "verbose": 0})
+        toaster.toast(self.out)
+        nose.tools.assert_equal(sum(toaster.versions.values()), 2)
@@ -14,6 +14,7 @@ import pyffi.types.array
 import pyffi.types.binary
 import pyffi.types.basic
 import pyffi.engines.xml.bit_struct
+import pyffi.engines.xml.cache
 import pyffi.engines.xml.enum
 import pyffi.engines.xml.expression
 import pyffi.engines.xml.struct_
@@ -25,6 +26,8 @@ import pyffi.utils.quickhull
 import pyffi.utils.inertia
 import pyffi.utils.tangentspace
 import pyffi.utils.mopp
+import pyffi.utils.geometry
+import pyffi.utils.memoryreader
 # import pyffi.formats.nif
 """
 import pyffi.formats.cgf
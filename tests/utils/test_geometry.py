@@ -0,0 +1,48 @@
+"""Tests for pyffi.utils.geometry module."""
+import nose.tools
+
+from pyffi.formats.nif import NifFormat
+from pyffi.utils import geometry
+
+
+def make_geomdata():
+    geomdata = NifFormat.NiTriShapeData()
+    geomdata.num_vertices = 4
+    geomdata.has_vertices = True
+    geomdata.has_normals = True
+    geomdata.vertices.update_size()
+    geomdata.normals.update_size()
+    for i, (vert, norm) in enumerate(zip(geomdata.vertices, geomdata.normals)):
+        vert.x = i * 0.5
+        vert.y = -i
+        vert.z = 2.0 if i == 2 else 0.0
+        norm.z = 1.0
+    return geomdata
+
+
+class TestGeometry:
+    """Tests geometry kernels on geometry data."""
+
+    def teardown(self):
+        NifFormat.NiGeometryData.use_columnar_arrays = False
+
+    def check_geomdata(self):
+        geomdata = make_geomdata()
+        geomdata.update_center_radius()
+        nose.tools.assert_equal(geomdata.center.as_tuple(), (0.75, -1.5, 1.0))
+        nose.tools.assert_almost_equal(geomdata.radius, 1.9525624)
+        hashes = list(geomdata.get_vertex_hash_generator())
+        nose.tools.assert_equal(hashes[2], (1000, -2000, 2000, 0, 0, 1000))
+        geomdata.apply_scale(2.0)
+        nose.tools.assert_equal(geomdata.vertices[3].as_tuple(), (3.0, -6.0, 0.0))
+        index, dist2 = geometry.get_farthest_point(
+            geometry.get_buffer(geomdata.vertices, geometry.VECTOR3), 3,
+            (0.0, 0.0, 0.0))
+        nose.tools.assert_equal((index, dist2), (3, 45.0))
+
+    def test_geomdata(self):
+        self.check_geomdata()
+
+    def test_geomdata_columnar(self):
+        NifFormat.NiGeometryData.use_columnar_arrays = True
+        self.check_geomdata()
@@ -1,6 +1,6 @@
 """Tests for pyffi.utils module."""
 
-from pyffi.utils import unique_map, hex_dump
+from pyffi.utils import unique_map, hex_dump, write_buffers
 import nose.tools
 
 
@@ -25,3 +25,15 @@ def test_unique_map():
     nose.tools.assert_equals(unique_map([3, 2, 6, None, 1]), ([0, 1, 2, None, 3], [0, 1, 2, 4]))
     nose.tools.assert_equals(unique_map([3, 1, 6, 1]), ([0, 1, 2, 1], [0, 1, 2]))
     nose.tools.assert_equals(unique_map([3, 1, 6, 1, 2, 2, 9, 3, 2]), ([0, 1, 2, 1, 3, 3, 4, 0, 3], [0, 1, 2, 4, 6]))
+
+
+def test_write_buffers():
+    """Test vectored write to a file"""
+    from tempfile import TemporaryFile
+    f = TemporaryFile()
+    f.write(b'xy')
+    write_buffers(f, [b'ab', bytearray(b'cd'), memoryview(b''), b'ef'])
+    nose.tools.assert_equals(f.tell(), 8)
+    f.write(b'z')
+    f.seek(0)
+    nose.tools.assert_equals(f.read(), b'xyabcdefz')
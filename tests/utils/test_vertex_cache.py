@@ -0,0 +1,46 @@
+"""Tests for pyffi.utils.vertex_cache module."""
+
+import random
+
+import nose.tools
+from pyffi.utils.vertex_cache import (
+    Mesh, get_cache_optimized_triangles, average_transform_to_vertex_ratio)
+
+
+def grid(size):
+    """Triangles of a square grid, in random order."""
+    triangles = []
+    for i in range(size):
+        for j in range(size):
+            v0 = i * (size + 1) + j
+            v1 = v0 + size + 1
+            triangles.append((v0, v0 + 1, v1))
+            triangles.append((v0 + 1, v1 + 1, v1))
+    random.shuffle(triangles)
+    return triangles
+
+
+class TestCacheOptimizedTriangles:
+    """The fast optimizer must produce exactly the reference ordering."""
+
+    def setUp(self):
+        random.seed(42)
+
+    def test_random_meshes(self):
+        for i in range(50):
+            num_verts = random.randint(3, 40)
+            triangles = [
+                tuple(random.randrange(num_verts) for j in range(3))
+                for k in range(random.randint(0, 100))]
+            nose.tools.assert_equals(
+                get_cache_optimized_triangles(triangles),
+                Mesh(triangles).get_cache_optimized_triangles())
+
+    def test_grid(self):
+        triangles = grid(20)
+        result = get_cache_optimized_triangles(triangles)
+        nose.tools.assert_equals(
+            result, Mesh(triangles).get_cache_optimized_triangles())
+        nose.tools.assert_true(
+            average_transform_to_vertex_ratio(triangles)
+            > average_transform_to_vertex_ratio(result))